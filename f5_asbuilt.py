@@ -9,8 +9,24 @@ Features:
 - CLI options:
     - -l / --list            : list inventory devices
     - -d / --device NAME     : run against specific device (by inventory name)
+    - -s / --select EXPR     : run against every device matching a selector
+                               (e.g. site=FLL2,env=prod or name=FLL2*)
     - -f / --file FILE       : output filename (extension inferred by format)
-    - --format {md,json}     : output format (Markdown or JSON)
+    - --format {md,json,html}: output format (Markdown, JSON or interactive HTML)
+    - --compress {gzip,zstd} : stream md/json output into .gz / .zst files
+    - --split-markdown       : one Markdown file per section and partition
+                               plus index.md; unchanged ones are not re-rendered
+    - --poll                 : keep polling the fleet, re-collecting devices
+                               whose config generation changed
+    - --modules LIST         : add net / gtm / apm / asm sections
+                               (collector registry, see register_collector)
+    - --index [DB]           : keep a SQLite query index of every written
+                               as-built up to date (f5_asbuilt_query.py)
+    - --resume               : continue an interrupted --select run from its
+                               checkpoint (.f5_asbuilt_state/)
+    - --fixed-concurrency    : do not adapt the per-device request limit
+    - --events TARGET        : NDJSON progress events to stdout ('-') or a
+                               socket (tcp:HOST:PORT, unix:PATH)
 
 Inventory example (f5_inventory.yml):
 
@@ -21,6 +37,13 @@ devices:
   - name: f5-qa-1
     host: "https://10.0.1.10"
     description: "QA F5 in DC2"
+    site: DC2
+    env: qa
+    tags: [lab]
+    username: asbuilt-ro        # optional per-device credentials
+    password_env: F5_PASS_QA    # env var holding this device's password
+    concurrency: 2              # optional limit of parallel REST requests
+    max_concurrency: 6          # optional: let the adaptive limit grow up to 6
 
 .env example:
 
@@ -31,16 +54,38 @@ F5_VERIFY_SSL=false
 """
 
 import argparse
+import atexit
+import fnmatch
+import hashlib
 import json
+import marshal
+import multiprocessing
 import os
+import pickle
+import random
+import re
+import shutil
+import socket
 import sys
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from datetime import datetime
-from urllib.parse import urljoin
+from urllib.parse import urlencode, urljoin
 
 import requests
 import yaml
 from dotenv import load_dotenv
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Callable, Dict, List, Tuple, Optional, Any
+
+import f5_asbuilt_html
+import f5_asbuilt_io
+import f5_asbuilt_query
 
 # Disable SSL warnings if verify is False
 requests.packages.urllib3.disable_warnings(  # type: ignore[attr-defined]
@@ -48,27 +93,262 @@ requests.packages.urllib3.disable_warnings(  # type: ignore[attr-defined]
 )
 
 
+# =============================================================================
+# Progress events (NDJSON)
+# =============================================================================
+
+
+class EventStream:
+    """
+    Machine-readable progress: one JSON object per line, each with 'ts'
+    (UTC, ISO 8601) and 'event'. Writes are serialized across threads and
+    flushed immediately, so a consumer sees a device's output as soon as it
+    lands. If the consumer goes away, events are dropped with one warning
+    and the run carries on.
+    """
+
+    def __init__(self, out: Any, sock: Optional[socket.socket] = None):
+        self.out = out
+        self.sock = sock
+        self._lock = threading.Lock()
+        self._broken = False
+
+    def write(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._broken:
+                return
+            try:
+                self.out.write(line)
+                self.out.flush()
+            except (OSError, ValueError) as e:
+                self._broken = True
+                print(
+                    f"[WARN] Event stream closed, events dropped: {e}", file=sys.stderr
+                )
+
+
+_EVENTS: Optional[EventStream] = None
+
+
+def open_event_stream(target: str) -> EventStream:
+    """
+    Start emitting events to target: '-' (stdout), 'tcp:HOST:PORT' or
+    'unix:PATH' (connects to a listening socket).
+    """
+    global _EVENTS
+    kind, _, addr = target.partition(":")
+    if target == "-":
+        stream = EventStream(sys.stdout)
+    elif kind == "tcp" and addr.rpartition(":")[0]:
+        host, _, port = addr.rpartition(":")
+        sock = socket.create_connection((host.strip("[]"), int(port)))
+        stream = EventStream(sock.makefile("w", encoding="utf-8"), sock)
+    elif kind == "unix" and addr:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(addr)
+        stream = EventStream(sock.makefile("w", encoding="utf-8"), sock)
+    else:
+        raise ValueError(f"expected -, tcp:HOST:PORT or unix:PATH, got '{target}'")
+    _EVENTS = stream
+    return stream
+
+
+def emit(event: str, **fields: Any) -> None:
+    """Send one progress event, if an event stream is open (--events)."""
+    if _EVENTS is None:
+        return
+    now = datetime.utcnow().isoformat(timespec="milliseconds") + "Z"
+    _EVENTS.write({"ts": now, "event": event, **fields})
+
+
 # =============================================================================
 # REST client
 # =============================================================================
 
 
+# Parallel REST requests allowed against one device unless the inventory
+# overrides it with 'concurrency' (small VEs struggle above a few). With
+# adaptive concurrency this is only the starting point for devices that
+# have no learned limit yet.
+DEFAULT_DEVICE_CONCURRENCY = 4
+
+# Per-request timeout in seconds unless overridden (CLI --timeout / inventory)
+DEFAULT_REQUEST_TIMEOUT = 60.0
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The device's time budget ran out before the request could be made."""
+
+
+class ConcurrencyLimiter:
+    """
+    AIMD limit on in-flight requests to one device, protecting restjavad.
+
+    Every completed request raises the limit by 1/limit (about +1 per round
+    of requests). An overload signal cuts it: an error that points at an
+    overloaded management plane (timeout, connection error, HTTP 429/5xx)
+    halves it, and a response much slower than the fastest seen for the
+    same endpoint (path and query parameters, since e.g. the partition
+    shards of one collection differ in size) reduces it by a quarter. At
+    most one cut per round trip (the signalling request's latency, capped
+    at DECREASE_INTERVAL), since requests already in flight report the
+    same congestion. With adaptive=False the limit stays at 'initial'.
+    """
+
+    # A response this many times slower than the endpoint's best is congestion
+    LATENCY_FACTOR = 3.0
+    # ...if it also took at least this long (seconds); small calls are noisy
+    LATENCY_FLOOR = 0.5
+    DECREASE_INTERVAL = 1.0
+
+    def __init__(
+        self, initial: float, maximum: int, adaptive: bool = True, minimum: int = 1
+    ):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.adaptive = adaptive
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.in_flight = 0
+        self._best: Dict[str, float] = {}
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(
+        self, endpoint: str, latency: Optional[float] = None, overloaded: bool = False
+    ) -> None:
+        """
+        Return a slot; 'endpoint' is the request's path and query string,
+        latency None means the request was never sent.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if self.adaptive and latency is not None:
+                self._adjust(endpoint, latency, overloaded)
+            self._cond.notify_all()
+
+    def _adjust(self, endpoint: str, latency: float, overloaded: bool) -> None:
+        best = self._best.get(endpoint)
+        self._best[endpoint] = latency if best is None else min(best, latency)
+        slow = (
+            best is not None
+            and latency >= self.LATENCY_FLOOR
+            and latency > best * self.LATENCY_FACTOR
+        )
+        if overloaded or slow:
+            now = time.monotonic()
+            if now - self._last_decrease >= min(latency, self.DECREASE_INTERVAL):
+                self._last_decrease = now
+                factor = 0.5 if overloaded else 0.75
+                self.limit = max(self.minimum, self.limit * factor)
+        else:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+
 class F5Client:
     """Simple iControl REST client for BIG-IP."""
 
     def __init__(
-        self, host: str, username: str, password: str, verify_ssl: bool = False
+        self,
+        host: str,
+        username: str,
+        password: str,
+        verify_ssl: bool = False,
+        concurrency: int = DEFAULT_DEVICE_CONCURRENCY,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        budget: Optional[float] = None,
+        adaptive: bool = False,
+        max_concurrency: Optional[int] = None,
+        name: Optional[str] = None,
     ):
+        """
+        concurrency:     in-flight request limit; with adaptive, the limit
+                         the AIMD controller starts from and, unless
+                         max_concurrency is given, never exceeds
+        max_concurrency: with adaptive, the highest limit it may reach
+                         (default: concurrency)
+        name:            inventory name, used in progress events
+        """
         self.base_url = host.rstrip("/") + "/mgmt/"
+        self.name = name or host
+        ceiling = max_concurrency or concurrency
+        self.limiter = ConcurrencyLimiter(
+            concurrency, ceiling if adaptive else concurrency, adaptive=adaptive
+        )
+        # Worker pools are sized for the highest limit; the limiter gates them
+        self.concurrency = self.limiter.maximum
+        self.timeout = timeout
+        self.budget = budget
+        self.deadline: Optional[float] = None
+        self.start_budget()
         self.session = requests.Session()
         self.session.auth = (username, password)
         self.session.verify = verify_ssl
         self.session.headers.update({"Content-Type": "application/json"})
 
+    def start_budget(self) -> None:
+        """(Re)start the device time budget, if one is configured."""
+        if self.budget is not None:
+            self.deadline = time.monotonic() + self.budget
+
+    def _request_timeout(self) -> float:
+        """Per-request timeout, shortened to what is left of the budget."""
+        if self.deadline is None:
+            return self.timeout
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"time budget of {self.budget:.0f}s exhausted")
+        return min(self.timeout, remaining)
+
+    def _send(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        """One request, within the device's in-flight limit."""
+        url = urljoin(self.base_url, path.lstrip("/"))
+        params = kwargs.get("params")
+        endpoint = f"{path}?{urlencode(sorted(params.items()))}" if params else path
+        self.limiter.acquire()
+        try:
+            timeout = self._request_timeout()
+        except DeadlineExceeded:
+            self.limiter.release(endpoint)
+            raise
+        start = time.monotonic()
+        overloaded = True
+        try:
+            resp = self.session.request(method, url, timeout=timeout, **kwargs)
+            overloaded = resp.status_code == 429 or resp.status_code >= 500
+        except requests.RequestException as e:
+            emit(
+                "endpoint_fetched",
+                device=self.name,
+                method=method,
+                path=path,
+                status=None,
+                seconds=round(time.monotonic() - start, 3),
+                error=str(e),
+            )
+            raise
+        finally:
+            self.limiter.release(endpoint, time.monotonic() - start, overloaded)
+        emit(
+            "endpoint_fetched",
+            device=self.name,
+            method=method,
+            path=path,
+            status=resp.status_code,
+            seconds=round(resp.elapsed.total_seconds(), 3),
+            bytes=len(resp.content),
+        )
+        return resp
+
     def get_collection(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
         """GET a collection endpoint like 'tm/ltm/virtual'. Returns list or dict."""
-        url = urljoin(self.base_url, path.lstrip("/"))
-        resp = self.session.get(url, params=params)
+        resp = self._send("GET", path, params=params)
         resp.raise_for_status()
         data = resp.json()
         if isinstance(data, dict) and "items" in data:
@@ -79,11 +359,49 @@ class F5Client:
         self, path: str, params: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """GET a single object endpoint."""
-        url = urljoin(self.base_url, path.lstrip("/"))
-        resp = self.session.get(url, params=params)
+        resp = self._send("GET", path, params=params)
         resp.raise_for_status()
         return resp.json()
 
+    def run_bash(self, command: str) -> str:
+        """Run a shell command through tm/util/bash and return its output."""
+        body = {"command": "run", "utilCmdArgs": f"-c {json.dumps(command)}"}
+        resp = self._send("POST", "tm/util/bash", json=body)
+        resp.raise_for_status()
+        return resp.json().get("commandResult", "")
+
+
+# Local state that must survive between runs (checkpoints, learned limits)
+STATE_DIR = ".f5_asbuilt_state"
+
+CONCURRENCY_STATE = os.path.join(STATE_DIR, "concurrency.json")
+_LIMITS_LOCK = threading.Lock()
+
+
+def load_concurrency_limits(path: str = CONCURRENCY_STATE) -> Dict[str, Any]:
+    """Learned in-flight limits per device URL, from earlier runs."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def remember_concurrency_limit(client: F5Client, path: str = CONCURRENCY_STATE) -> None:
+    """Persist the limit the adaptive controller arrived at for this device."""
+    if not client.limiter.adaptive:
+        return
+    with _LIMITS_LOCK:
+        limits = load_concurrency_limits(path)
+        limits[client.base_url] = {
+            "limit": round(client.limiter.limit, 2),
+            "updated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        try:
+            _write_atomic(path, json.dumps(limits, indent=2, sort_keys=True))
+        except OSError as e:
+            print(f"[WARN] Could not save concurrency limits: {e}", file=sys.stderr)
+
 
 # =============================================================================
 # Helpers
@@ -96,27 +414,47 @@ def parse_bool_env(value: Optional[str], default: bool = False) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "y"}
 
 
-def parse_destination(dest: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+def split_route_domain(address: str) -> Tuple[str, Optional[int]]:
+    """'10.1.1.10%3' -> ('10.1.1.10', 3); no '%' -> (address, None)."""
+    ip, sep, rd = address.partition("%")
+    if sep and rd.isdigit():
+        return ip, int(rd)
+    return address, None
+
+
+def parse_destination_rd(
+    dest: Optional[str],
+) -> Tuple[Optional[str], Optional[int], Optional[str]]:
     """
-    F5 virtual 'destination' looks like: '/Common/10.1.1.10:443' or '/Common/10.1.1.10%1:443'.
-    Returns (ip, port).
+    F5 virtual 'destination' looks like: '/Common/10.1.1.10:443',
+    '/Common/10.1.1.10%1:443' or, for IPv6, '/Common/2001:db8::10%1.443'
+    (IPv6 uses '.' before the port). Returns (ip, route_domain, port);
+    route_domain is None when the destination has no '%<id>'.
     """
     if not dest:
-        return None, None
+        return None, None, None
 
     # Strip partition (/Common/...)
     if dest.startswith("/"):
         parts = dest.split("/")
         dest = parts[-1]
 
-    # Now dest should be '10.1.1.10:443' or '10.1.1.10%1:443'
-    ip_part, sep, port = dest.partition(":")
+    if dest.count(":") > 1:
+        # IPv6: '2001:db8::10.443'
+        addr, sep, port = dest.rpartition(".")
+    else:
+        addr, sep, port = dest.partition(":")
     if not sep:
         # No port found
-        return dest, None
+        addr, port = dest, ""
+
+    ip, rd = split_route_domain(addr)
+    return ip, rd, port or None
+
 
-    # Remove route-domain if present (10.1.1.10%1)
-    ip = ip_part.split("%")[0]
+def parse_destination(dest: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(ip, port) of a virtual 'destination', route domain dropped."""
+    ip, _, port = parse_destination_rd(dest)
     return ip, port
 
 
@@ -125,14 +463,68 @@ def parse_destination(dest: Optional[str]) -> Tuple[Optional[str], Optional[str]
 # =============================================================================
 
 
-def load_inventory(inventory_path: str) -> Dict[str, Any]:
+CACHE_DIR = f5_asbuilt_io.cache_dir()
+
+# Inventory fields that get a value -> device-positions index. 'tags' is a list.
+INDEXED_FIELDS = ("name", "site", "env", "sync_group", "tags")
+
+# Bump when load_inventory() changes what it stores, so cached pickles
+# written by an older version are re-parsed instead of used
+INVENTORY_CACHE_FORMAT = 1
+
+# Loader for big inventories; libyaml's C loader is much faster when present
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _inventory_cache_path(inventory_path: str) -> str:
+    key = hashlib.sha1(os.path.abspath(inventory_path).encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, "inventory", f"{key}.pickle")
+
+
+def build_inventory_index(
+    devices: List[Dict[str, Any]],
+) -> Dict[str, Dict[str, List[int]]]:
+    """Map each indexed field to {value: [device positions]}."""
+    index: Dict[str, Dict[str, List[int]]] = {f: {} for f in INDEXED_FIELDS}
+    for pos, dev in enumerate(devices):
+        for field in INDEXED_FIELDS:
+            value = dev.get(field)
+            if value is None:
+                continue
+            values = value if isinstance(value, list) else [value]
+            for v in values:
+                index[field].setdefault(str(v), []).append(pos)
+    return index
+
+
+def load_inventory(inventory_path: str, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Load and validate the YAML inventory.
+
+    Optional top-level 'defaults' are merged into every device. The parsed
+    inventory (with its selection index under '_index') is cached as a pickle
+    keyed on the file's mtime and size, INVENTORY_CACHE_FORMAT and
+    INDEXED_FIELDS, so big inventories are parsed once.
+    """
     if not os.path.exists(inventory_path):
         print(f"[ERROR] Inventory file not found: {inventory_path}", file=sys.stderr)
         sys.exit(1)
 
+    st = os.stat(inventory_path)
+    stamp = (INVENTORY_CACHE_FORMAT, INDEXED_FIELDS, st.st_mtime_ns, st.st_size)
+    cache_path = _inventory_cache_path(inventory_path)
+    if use_cache and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as cf:
+                cached = pickle.load(cf)
+            if cached.get("stamp") == stamp:
+                return cached["inventory"]
+        except Exception:
+            pass  # stale or unreadable cache, just re-parse
+
     with open(inventory_path, "r", encoding="utf-8") as f:
         try:
-            inv = yaml.safe_load(f) or {}
+            inv = yaml.load(f, Loader=_YAML_LOADER) or {}
         except yaml.YAMLError as e:
             print(f"[ERROR] Failed to parse inventory YAML: {e}", file=sys.stderr)
             sys.exit(1)
@@ -141,96 +533,572 @@ def load_inventory(inventory_path: str) -> Dict[str, Any]:
         print("[ERROR] Inventory must contain a 'devices' list.", file=sys.stderr)
         sys.exit(1)
 
+    defaults = inv.get("defaults") or {}
+    devices: List[Dict[str, Any]] = []
+    for dev in inv["devices"]:
+        if not isinstance(dev, dict) or not dev.get("name"):
+            print(f"[ERROR] Inventory device without a name: {dev}", file=sys.stderr)
+            sys.exit(1)
+        devices.append({**defaults, **dev})
+    inv["devices"] = devices
+
+    inv["_index"] = build_inventory_index(devices)
+    dupes = [n for n, pos in inv["_index"]["name"].items() if len(pos) > 1]
+    if dupes:
+        print(
+            f"[ERROR] Duplicate device names in inventory: {', '.join(sorted(dupes))}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if use_cache:
+        try:
+            os.makedirs(os.path.dirname(cache_path), mode=0o700, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "wb") as cf:
+                pickle.dump(
+                    {"stamp": stamp, "inventory": inv},
+                    cf,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # caching is best-effort
+
     return inv
 
 
-def list_devices(inventory: Dict[str, Any]) -> None:
+def list_devices(
+    inventory: Dict[str, Any], devices: Optional[List[Dict[str, Any]]] = None
+) -> None:
     print("Available F5 devices:")
     print("---------------------")
-    for dev in inventory["devices"]:
+    for dev in inventory["devices"] if devices is None else devices:
         name = dev.get("name", "<no-name>")
         host = dev.get("host", "<no-host>")
         desc = dev.get("description", "")
         line = f"- {name}: {host}"
         if desc:
             line += f"  ({desc})"
+        labels = [f"{k}={dev[k]}" for k in ("site", "env", "sync_group") if dev.get(k)]
+        if dev.get("tags"):
+            labels.append("tags=" + "|".join(str(t) for t in dev["tags"]))
+        if labels:
+            line += f"  [{', '.join(labels)}]"
         print(line)
 
 
+def find_device(inventory: Dict[str, Any], name: str) -> Optional[Dict[str, Any]]:
+    positions = inventory["_index"]["name"].get(name)
+    if not positions:
+        return None
+    return inventory["devices"][positions[0]]
+
+
 def get_device_by_name(inventory: Dict[str, Any], name: str) -> Dict[str, Any]:
-    for dev in inventory["devices"]:
-        if dev.get("name") == name:
-            return dev
+    dev = find_device(inventory, name)
+    if dev is not None:
+        return dev
     print(f"[ERROR] Device '{name}' not found in inventory.", file=sys.stderr)
     sys.exit(1)
 
 
+def _split_selector_terms(expr: str) -> List[str]:
+    """
+    Split a selector on the commas between terms. Commas inside (), [] or
+    {} or after a backslash belong to the value, so regexes such as
+    'name=~^x{1,3}$' stay whole.
+    """
+    terms: List[str] = []
+    depth = 0
+    start = 0
+    escaped = False
+    for pos, ch in enumerate(expr):
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth = max(0, depth - 1)
+        elif ch == "," and depth == 0:
+            terms.append(expr[start:pos])
+            start = pos + 1
+    terms.append(expr[start:])
+    return terms
+
+
+def parse_selector(expr: str) -> List[Tuple[str, str, List[str]]]:
+    """
+    Parse a selection like 'site=FLL2,env=prod,name=FLL2*,tags!=lab'.
+
+    Terms are AND-ed; 'a|b' in a value means either. Operators: '=' (exact,
+    or glob when the value contains * ? [), '!=' (negated) and '=~' (regex).
+    A regex is kept whole: '|' is its own alternation and commas inside
+    brackets do not end the term (see _split_selector_terms).
+    Returns [(field, op, values)].
+    """
+    terms: List[Tuple[str, str, List[str]]] = []
+    for raw in _split_selector_terms(expr):
+        raw = raw.strip()
+        if not raw:
+            continue
+        for op in ("=~", "!=", "="):
+            field, sep, value = raw.partition(op)
+            if sep:
+                break
+        else:
+            raise ValueError(f"invalid selector term '{raw}' (expected key=value)")
+        field = field.strip()
+        if field not in INDEXED_FIELDS:
+            raise ValueError(
+                f"unknown selector field '{field}' "
+                f"(expected one of: {', '.join(INDEXED_FIELDS)})"
+            )
+        if op == "=~":
+            values = [value.strip()]
+        else:
+            values = [v.strip() for v in value.split("|")]
+        terms.append((field, op, values))
+    return terms
+
+
+def _match_positions(
+    field_index: Dict[str, List[int]], op: str, values: List[str]
+) -> set:
+    positions: set = set()
+    for value in values:
+        if op == "=~":
+            rx = re.compile(value)
+            keys = [k for k in field_index if rx.search(k)]
+        elif any(ch in value for ch in "*?["):
+            keys = fnmatch.filter(field_index, value)
+        else:
+            keys = [value] if value in field_index else []
+        for k in keys:
+            positions.update(field_index[k])
+    return positions
+
+
+def select_devices(inventory: Dict[str, Any], expr: str) -> List[Dict[str, Any]]:
+    """Devices matching a selector expression, in inventory order."""
+    index = inventory["_index"]
+    selected = set(range(len(inventory["devices"])))
+    for field, op, values in parse_selector(expr):
+        matched = _match_positions(index[field], op, values)
+        if op == "!=":
+            selected -= matched
+        else:
+            selected &= matched
+    return [inventory["devices"][pos] for pos in sorted(selected)]
+
+
+def device_credentials(
+    device: Dict[str, Any], username: str, password: str, verify_ssl: bool
+) -> Tuple[str, str, bool]:
+    """
+    Per-device credential overrides: 'username', 'password_env' (name of the
+    environment variable holding the password) and 'verify_ssl'.
+    """
+    user = device.get("username") or username
+    password_env = device.get("password_env")
+    if password_env:
+        password = os.getenv(password_env) or ""
+        if not password:
+            raise ValueError(
+                f"environment variable {password_env} for device "
+                f"'{device.get('name')}' is not set"
+            )
+    if "verify_ssl" in device:
+        verify_ssl = parse_bool_env(str(device["verify_ssl"]))
+    return user, password, verify_ssl
+
+
 # =============================================================================
 # Data collection
 # =============================================================================
 
 
-def collect_device_info(client: F5Client) -> Dict[str, Any]:
-    # Hostname
-    try:
-        global_settings = client.get_object("tm/sys/global-settings")
-        hostname = global_settings.get("hostname", "unknown")
-    except Exception:
-        hostname = "unknown"
+# What a device info request may fail with when the endpoint is missing or
+# answers in an unexpected shape; the field is then reported as "unknown".
+# Timeouts are not among them: they mark the device report incomplete.
+DEVICE_INFO_ERRORS = (requests.HTTPError, ValueError, KeyError, AttributeError)
 
-    # Version
-    try:
-        version_info = client.get_object("tm/sys/version")
-        entries = version_info.get("entries", {})
-        full_version = "unknown"
-        for v in entries.values():
-            fv = (
-                v.get("nestedStats", {})
-                .get("entries", {})
-                .get("Version", {})
-                .get("description")
+# Device info fields and their values when they cannot be read
+DEVICE_INFO_DEFAULTS: Dict[str, Any] = {
+    "hostname": "unknown",
+    "version": "unknown",
+    "ha_status": "unknown",
+    "sync_group": "unknown",
+    "sync_status": "unknown",
+    "trust_devices": [],
+    "partitions": [],
+    # partition -> route domain of its addresses that carry no '%<id>'
+    "default_route_domains": {},
+}
+
+
+def _device_info_defaults() -> Dict[str, Any]:
+    """A fresh copy of DEVICE_INFO_DEFAULTS (its lists and dicts not shared)."""
+    return {
+        k: v.copy() if isinstance(v, (list, dict)) else v
+        for k, v in DEVICE_INFO_DEFAULTS.items()
+    }
+
+
+def _read_hostname(client: F5Client) -> Dict[str, Any]:
+    global_settings = client.get_object("tm/sys/global-settings")
+    return {"hostname": global_settings.get("hostname", "unknown")}
+
+
+def _read_version(client: F5Client) -> Dict[str, Any]:
+    version_info = client.get_object("tm/sys/version")
+    for v in version_info.get("entries", {}).values():
+        fv = (
+            v.get("nestedStats", {})
+            .get("entries", {})
+            .get("Version", {})
+            .get("description")
+        )
+        if fv:
+            return {"version": fv}
+    return {}
+
+
+def _read_ha(client: F5Client) -> Dict[str, Any]:
+    """HA state and sync group of the device itself, and its trust domain."""
+    devices = client.get_collection("tm/cm/device")
+    fields: Dict[str, Any] = {
+        "trust_devices": sorted(d.get("name") or "" for d in devices)
+    }
+    for d in devices:
+        if d.get("selfDevice") == "true":
+            fields["ha_status"] = d.get("failoverState", "unknown")
+            fields["sync_group"] = d.get("configSyncGroup", "unknown")
+            break
+    return fields
+
+
+def _read_sync_status(client: F5Client) -> Dict[str, Any]:
+    """Config sync status ("In Sync", "Changes Pending", "Standalone", ...)."""
+    status_info = client.get_object("tm/cm/sync-status")
+    for v in status_info.get("entries", {}).values():
+        desc = (
+            v.get("nestedStats", {})
+            .get("entries", {})
+            .get("status", {})
+            .get("description")
+        )
+        if desc:
+            return {"sync_status": desc}
+    return {}
+
+
+def _read_partitions(client: F5Client) -> Dict[str, Any]:
+    """Partition names and their default route domains."""
+    parts = client.get_collection("tm/auth/partition")
+    return {
+        "partitions": [p.get("name") for p in parts],
+        "default_route_domains": {
+            p.get("name"): int(p.get("defaultRouteDomain") or 0) for p in parts
+        },
+    }
+
+
+# Device info parts: name (as listed in 'incomplete') -> REST reader
+DEVICE_INFO_READERS: Dict[str, Callable[[F5Client], Dict[str, Any]]] = {
+    "hostname": _read_hostname,
+    "version": _read_version,
+    "ha_status": _read_ha,
+    "sync_status": _read_sync_status,
+    "partitions": _read_partitions,
+}
+
+
+def read_device_info(
+    client: F5Client, info: Dict[str, Any], parts: List[str]
+) -> Dict[str, Any]:
+    """
+    Fill the given device info parts of 'info' over REST. A part whose
+    endpoint fails keeps its current value; one that times out (request
+    timeout or exhausted time budget) is also added to info['incomplete'].
+    """
+    for name in parts:
+        try:
+            info.update(DEVICE_INFO_READERS[name](client))
+        except requests.Timeout as e:
+            print(
+                f"[WARN] Device info '{name}' incomplete on {client.base_url}: {e}",
+                file=sys.stderr,
             )
-            if fv:
-                full_version = fv
-                break
-    except Exception:
-        full_version = "unknown"
+            info.setdefault("incomplete", []).append(name)
+        except DEVICE_INFO_ERRORS:
+            pass
+    return info
 
-    # HA / sync group
-    ha_status = "unknown"
-    sync_group = "unknown"
-    try:
-        devices = client.get_collection("tm/cm/device")
-        for d in devices:
-            if d.get("selfDevice") == "true":
-                ha_status = d.get("failoverState", "unknown")
-                sync_group = d.get("configSyncGroup", "unknown")
+
+def collect_device_info(client: F5Client) -> Dict[str, Any]:
+    """
+    Hostname, version, HA state, sync group/status, partitions and their
+    default route domains. A field whose endpoint fails is "unknown"; parts
+    that timed out are listed in 'incomplete' (see
+    mark_device_info_incomplete).
+    """
+    info = _device_info_defaults()
+    return read_device_info(client, info, list(DEVICE_INFO_READERS))
+
+
+def mark_device_info_incomplete(
+    device_info: Dict[str, Any], ltm_data: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    ltm_data with 'device_report' added to its incomplete sections when
+    some device info fields timed out (a copy; shared config stays as is).
+    """
+    if not device_info.get("incomplete"):
+        return ltm_data
+    incomplete = list(ltm_data.get("incomplete", []))
+    if "device_report" not in incomplete:
+        incomplete.append("device_report")
+    return {**ltm_data, "incomplete": incomplete}
+
+
+def fetch_collection(
+    client: F5Client,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    partitions: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    GET a collection, optionally sharded into one '$filter=partition eq X'
+    request per partition. Shards run concurrently (at most
+    client.concurrency at a time) and are merged in partition order, which
+    keeps each response small on boxes with many partitions.
+    """
+    if partitions is None:
+        return client.get_collection(path, params=params)
+
+    def fetch_shard(partition: str) -> List[Dict[str, Any]]:
+        shard_params = dict(params or {})
+        shard_params["$filter"] = f"partition eq {partition}"
+        return client.get_collection(path, params=shard_params)
+
+    with ThreadPoolExecutor(max_workers=client.concurrency) as pool:
+        shards = list(pool.map(fetch_shard, partitions))
+    return [item for shard in shards for item in shard]
+
+
+# =============================================================================
+# iRule sources (content-addressed cache)
+# =============================================================================
+
+
+def _irule_blob_path(sha: str) -> str:
+    return os.path.join(CACHE_DIR, "irules", "objects", sha[:2], f"{sha}.tcl")
+
+
+def _irule_manifest_path(client: F5Client) -> str:
+    key = hashlib.sha1(client.base_url.encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, "irules", f"{key}.json")
+
+
+def _write_atomic(path: str, data: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def store_irule_source(body: str) -> str:
+    """Store an iRule body under its sha256 (once) and return the hash."""
+    sha = hashlib.sha256(body.encode("utf-8")).hexdigest()
+    path = _irule_blob_path(sha)
+    if not os.path.exists(path):
+        _write_atomic(path, body)
+    return sha
+
+
+def read_irule_source(sha: str) -> str:
+    with open(_irule_blob_path(sha), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def sync_irule_sources(
+    client: F5Client,
+    rules: List[Dict[str, Any]],
+    partitions: Optional[List[str]] = None,
+) -> Dict[str, str]:
+    """
+    Make sure the source of every rule in 'rules' (name/fullPath/generation
+    only) is in the local store, and return {fullPath: sha256}.
+
+    A per-device manifest remembers the generation each body was fetched at,
+    so only new or modified rules are downloaded: one by one when few
+    changed, as a single collection otherwise.
+    """
+    manifest_path = _irule_manifest_path(client)
+    manifest: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+    stale: List[Dict[str, Any]] = []
+    for r in rules:
+        known = manifest.get(r.get("fullPath") or "")
+        if (
+            not known
+            or known.get("generation") != r.get("generation")
+            or not os.path.exists(_irule_blob_path(known["sha256"]))
+        ):
+            stale.append(r)
+
+    select = {"$select": "fullPath,generation,apiAnonymous"}
+    if len(stale) * 2 > len(rules):
+        fetched = fetch_collection(
+            client, "tm/ltm/rule", params=select, partitions=partitions
+        )
+    elif stale:
+
+        def fetch_rule(r: Dict[str, Any]) -> Dict[str, Any]:
+            path = "tm/ltm/rule/" + (r.get("fullPath") or "").replace("/", "~")
+            return client.get_object(path, params=select)
+
+        with ThreadPoolExecutor(max_workers=client.concurrency) as pool:
+            fetched = list(pool.map(fetch_rule, stale))
+    else:
+        fetched = []
+
+    for r in fetched:
+        manifest[r.get("fullPath") or ""] = {
+            "generation": r.get("generation"),
+            "sha256": store_irule_source(r.get("apiAnonymous") or ""),
+        }
+
+    current = {r.get("fullPath") or "" for r in rules}
+    if partitions is None:
+        # Full listing: forget rules that were deleted on the device
+        manifest = {fp: v for fp, v in manifest.items() if fp in current}
+    if fetched or len(manifest) != len(current):
+        _write_atomic(manifest_path, json.dumps(manifest))
+
+    return {fp: manifest[fp]["sha256"] for fp in current if fp in manifest}
+
+
+# Commands inside iRules that name other config objects
+_IRULE_REF_RE = re.compile(
+    r"(?<![\w:$-])(pool|active_members|node|virtual|class|matchclass)(?![\w:-])"
+)
+_CLASS_LAST_ARG = {"match", "lookup", "element"}
+
+
+def _command_args(text: str, pos: int, limit: int = 8) -> List[str]:
+    """
+    Read up to 'limit' Tcl words starting at 'pos', stopping at the end of
+    the command (newline, ';', or an unbalanced ']' / '}').
+    """
+    words: List[str] = []
+    n = len(text)
+    while len(words) < limit:
+        while pos < n and text[pos] in " \t":
+            pos += 1
+        if pos >= n or text[pos] in "\n;]}":
+            break
+        start = pos
+        depth = 0
+        while pos < n:
+            ch = text[pos]
+            if ch in "[{":
+                depth += 1
+            elif ch in "]}":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0 and ch in " \t\n;":
                 break
-    except Exception:
-        pass
+            elif ch == "\\":
+                pos += 1
+            pos += 1
+        words.append(text[start:pos])
+    return words
 
-    # Partitions
-    try:
-        parts = client.get_collection("tm/auth/partition")
-        partitions = [p.get("name") for p in parts]
-    except Exception:
-        partitions = []
 
-    return {
-        "hostname": hostname,
-        "version": full_version,
-        "ha_status": ha_status,
-        "sync_group": sync_group,
-        "partitions": partitions,
+def _static_name(word: str) -> Optional[str]:
+    """Object name from a literal argument; None for variables/expressions."""
+    word = word.strip('"{}')
+    if not word or word[0] in "$[-":
+        return None
+    return word
+
+
+def scan_irule_references(body: str) -> Dict[str, List[str]]:
+    """
+    Extract statically named pools, nodes, data-groups (classes) and
+    virtual servers from an iRule body. Comment lines are ignored and
+    names computed at runtime ($var, [cmd]) are skipped.
+    """
+    refs: Dict[str, set] = {
+        "pools": set(),
+        "nodes": set(),
+        "classes": set(),
+        "virtuals": set(),
     }
+    if not _IRULE_REF_RE.search(body):
+        return {k: [] for k in refs}
+
+    text = "\n".join(
+        "" if line.lstrip().startswith("#") else line for line in body.splitlines()
+    )
+    for m in _IRULE_REF_RE.finditer(text):
+        cmd = m.group(1)
+        args = _command_args(text, m.end())
+        if not args:
+            continue
+        if cmd in ("pool", "active_members"):
+            name = _static_name(args[0])
+            if name:
+                refs["pools"].add(name.split("/")[-1])
+        elif cmd == "node":
+            name = _static_name(args[0])
+            if name:
+                refs["nodes"].add(name.split("/")[-1])
+        elif cmd == "virtual":
+            name = _static_name(args[0])
+            if name and name != "name":
+                refs["virtuals"].add(name.split("/")[-1])
+        elif cmd == "matchclass":
+            name = _static_name(args[-1].replace("$::", ""))
+            if name and len(args) >= 3:
+                refs["classes"].add(name.split("/")[-1])
+        else:  # class <subcommand> ...
+            sub, rest = args[0], [a for a in args[1:] if a != "--"]
+            if sub in _CLASS_LAST_ARG:
+                candidates = rest[-1:]
+            else:
+                candidates = [a for a in rest if not a.startswith("-")][:1]
+            for c in candidates:
+                name = _static_name(c)
+                if name:
+                    refs["classes"].add(name.split("/")[-1])
+    return {k: sorted(v) for k, v in refs.items()}
+
+
+# Monitor types included in the as-built
+MONITOR_TYPES = ["http", "https", "tcp", "gateway-icmp", "icmp"]
 
 
-def collect_ltm_objects(client: F5Client) -> Dict[str, Any]:
-    # Virtual servers
-    virtuals_raw = client.get_collection("tm/ltm/virtual")
+def _collect_virtuals(
+    client: F5Client, partitions: Optional[List[str]]
+) -> Dict[str, Any]:
+    """Virtual servers."""
+    virtuals_raw = fetch_collection(client, "tm/ltm/virtual", partitions=partitions)
     virtuals: List[Dict[str, Any]] = []
     for vs in virtuals_raw:
-        ip, port = parse_destination(vs.get("destination"))
+        ip, rd, port = parse_destination_rd(vs.get("destination"))
         pool = vs.get("pool")
         if pool:
             pool = pool.split("/")[-1]
@@ -253,8 +1121,10 @@ def collect_ltm_objects(client: F5Client) -> Dict[str, Any]:
         virtuals.append(
             {
                 "name": vs.get("name"),
+                "partition": vs.get("partition", "Common"),
                 "destination_ip": ip,
                 "destination_port": port,
+                "route_domain": rd,
                 "pool": pool,
                 "profiles": profiles,
                 "persistence": persistence,
@@ -262,9 +1132,16 @@ def collect_ltm_objects(client: F5Client) -> Dict[str, Any]:
             }
         )
 
-    # Pools
-    pools_raw = client.get_collection(
-        "tm/ltm/pool", params={"expandSubcollections": "true"}
+    return {"virtuals": virtuals}
+
+
+def _collect_pools(client: F5Client, partitions: Optional[List[str]]) -> Dict[str, Any]:
+    """Pools with their members."""
+    pools_raw = fetch_collection(
+        client,
+        "tm/ltm/pool",
+        params={"expandSubcollections": "true"},
+        partitions=partitions,
     )
     pools: List[Dict[str, Any]] = []
     for p in pools_raw:
@@ -286,43 +1163,75 @@ def collect_ltm_objects(client: F5Client) -> Dict[str, Any]:
         pools.append(
             {
                 "name": p.get("name"),
+                "partition": p.get("partition", "Common"),
                 "lb_method": p.get("loadBalancingMode"),
                 "monitor": p.get("monitor"),
                 "members": members,
             }
         )
 
-    # Nodes
-    nodes_raw = client.get_collection("tm/ltm/node")
+    return {"pools": pools}
+
+
+def _collect_nodes(client: F5Client, partitions: Optional[List[str]]) -> Dict[str, Any]:
+    """Nodes."""
+    nodes_raw = fetch_collection(client, "tm/ltm/node", partitions=partitions)
     nodes: List[Dict[str, Any]] = []
     for n in nodes_raw:
         nodes.append(
             {
                 "name": n.get("name"),
+                "partition": n.get("partition", "Common"),
                 "address": n.get("address"),
                 "state": n.get("state"),
                 "session": n.get("session"),
             }
         )
 
-    # iRules
-    irules_raw = client.get_collection("tm/ltm/rule")
+    return {"nodes": nodes}
+
+
+def _collect_irules(
+    client: F5Client, partitions: Optional[List[str]], irule_source: bool
+) -> Dict[str, Any]:
+    """iRules (bodies come from the local content-addressed source cache)."""
+    irules_raw = fetch_collection(
+        client,
+        "tm/ltm/rule",
+        params={"$select": "name,partition,fullPath,generation"},
+        partitions=partitions,
+    )
+    rule_hashes: Dict[str, str] = {}
+    if irule_source:
+        rule_hashes = sync_irule_sources(client, irules_raw, partitions)
     irules: List[Dict[str, Any]] = []
+    irule_sources: Dict[str, str] = {}
     for r in irules_raw:
-        irules.append(
-            {
-                "name": r.get("name"),
-                "partition": r.get("partition", "Common"),
-                "fullPath": r.get("fullPath"),
-            }
-        )
+        entry = {
+            "name": r.get("name"),
+            "partition": r.get("partition", "Common"),
+            "fullPath": r.get("fullPath"),
+        }
+        if irule_source:
+            sha = rule_hashes.get(r.get("fullPath") or "")
+            entry["sha256"] = sha
+            if sha and sha not in irule_sources:
+                irule_sources[sha] = read_irule_source(sha)
+        irules.append(entry)
+
+    return {"irules": irules, "irule_sources": irule_sources}
 
-    # Monitors by type
+
+def _collect_monitors(
+    client: F5Client, partitions: Optional[List[str]]
+) -> Dict[str, Any]:
+    """Monitors of the common types."""
     monitors: List[Dict[str, Any]] = []
-    monitor_types = ["http", "https", "tcp", "gateway-icmp", "icmp"]
-    for mtype in monitor_types:
+    for mtype in MONITOR_TYPES:
         try:
-            items = client.get_collection(f"tm/ltm/monitor/{mtype}")
+            items = fetch_collection(
+                client, f"tm/ltm/monitor/{mtype}", partitions=partitions
+            )
             for m in items:
                 monitors.append(
                     {
@@ -332,14 +1241,26 @@ def collect_ltm_objects(client: F5Client) -> Dict[str, Any]:
                         "fullPath": m.get("fullPath"),
                     }
                 )
+        except requests.Timeout:
+            raise
         except Exception:
             # type not present on this box, skip
             continue
 
-    # SSL profiles (client-ssl)
+    return {"monitors": monitors}
+
+
+def _collect_ssl_profiles(
+    client: F5Client, partitions: Optional[List[str]]
+) -> Dict[str, Any]:
+    """Client-SSL profiles."""
     ssl_profiles: List[Dict[str, Any]] = []
     try:
-        ssl_profiles_raw = client.get_collection("tm/ltm/profile/client-ssl")
+        ssl_profiles_raw = fetch_collection(
+            client, "tm/ltm/profile/client-ssl", partitions=partitions
+        )
+    except requests.Timeout:
+        raise
     except Exception:
         ssl_profiles_raw = []
 
@@ -354,10 +1275,16 @@ def collect_ltm_objects(client: F5Client) -> Dict[str, Any]:
             }
         )
 
-    # SSL certs
+    return {"ssl_profiles": ssl_profiles}
+
+
+def _collect_certs(client: F5Client, partitions: Optional[List[str]]) -> Dict[str, Any]:
+    """SSL certificates."""
     certs: List[Dict[str, Any]] = []
     try:
-        certs_raw = client.get_collection("tm/sys/crypto/cert")
+        certs_raw = fetch_collection(
+            client, "tm/sys/crypto/cert", partitions=partitions
+        )
         for c in certs_raw:
             certs.append(
                 {
@@ -369,28 +1296,1076 @@ def collect_ltm_objects(client: F5Client) -> Dict[str, Any]:
                     ),
                 }
             )
+    except requests.Timeout:
+        raise
     except Exception:
         pass
 
-    return {
-        "virtuals": virtuals,
-        "pools": pools,
-        "nodes": nodes,
-        "irules": irules,
-        "monitors": monitors,
-        "ssl_profiles": ssl_profiles,
-        "certs": certs,
-    }
+    return {"certs": certs}
 
 
-# =============================================================================
-# Cross-references (where-used maps)
-# =============================================================================
+# LTM sections in collection order: (name, collector, keys it fills in ltm_data)
+LTM_SECTIONS: List[Tuple[str, Any, Tuple[str, ...]]] = [
+    ("virtuals", _collect_virtuals, ("virtuals",)),
+    ("pools", _collect_pools, ("pools",)),
+    ("nodes", _collect_nodes, ("nodes",)),
+    ("irules", _collect_irules, ("irules", "irule_sources")),
+    ("monitors", _collect_monitors, ("monitors",)),
+    ("ssl_profiles", _collect_ssl_profiles, ("ssl_profiles",)),
+    ("certs", _collect_certs, ("certs",)),
+]
 
 
-def build_usage_maps(ltm_data: Dict[str, Any]) -> Dict[str, Any]:
-    # iRules usage
-    irule_usage: Dict[str, List[str]] = {}
+def collect_ltm_objects(
+    client: F5Client,
+    partitions: Optional[List[str]] = None,
+    irule_source: bool = True,
+    done_sections: Optional[Dict[str, Dict[str, Any]]] = None,
+    on_section: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Collect LTM objects. With 'partitions', every collection is fetched per
+    partition (see fetch_collection) and only those partitions are included.
+    With 'irule_source', iRule bodies are included as 'irule_sources'
+    (sha256 -> body), referenced from each iRule's 'sha256'.
+
+    A section that times out (per-request timeout or the device's time
+    budget) is left empty and listed in ltm_data['incomplete'] instead of
+    aborting the whole collection.
+
+    Sections found in 'done_sections' (from a checkpoint) are not fetched
+    again; every section fetched completely is passed to 'on_section'.
+    """
+    ltm_data: Dict[str, Any] = {"incomplete": []}
+    for name, collector, keys in LTM_SECTIONS:
+        if done_sections and name in done_sections:
+            ltm_data.update(done_sections[name])
+            continue
+        kwargs = {"irule_source": irule_source} if name == "irules" else {}
+        start = time.monotonic()
+        try:
+            section = collector(client, partitions, **kwargs)
+            ltm_data.update(section)
+            if on_section:
+                on_section(name, section)
+        except requests.Timeout as e:
+            print(
+                f"[WARN] Section '{name}' incomplete on {client.base_url}: {e}",
+                file=sys.stderr,
+            )
+            ltm_data["incomplete"].append(name)
+            for key in keys:
+                ltm_data[key] = {} if key == "irule_sources" else []
+        emit(
+            "section_collected",
+            device=client.name,
+            section=name,
+            items=len(ltm_data[keys[0]]),
+            seconds=round(time.monotonic() - start, 3),
+            complete=name not in ltm_data["incomplete"],
+        )
+    return ltm_data
+
+
+# =============================================================================
+# Collector registry (net, GTM, APM, ASM, ...)
+# =============================================================================
+
+# name -> collector spec, in registration order (see register_collector)
+COLLECTORS: Dict[str, Dict[str, Any]] = {}
+
+# Record types per GTM wide IP / pool collection
+GTM_RECORD_TYPES = ["a", "aaaa", "cname", "mx", "naptr", "srv"]
+
+
+def register_collector(
+    name: str,
+    module: str,
+    title: str,
+    endpoint: str,
+    fields: Dict[str, str],
+    depends_on: Tuple[str, ...] = (),
+    provision: Optional[str] = None,
+    expand: Optional[Dict[str, List[str]]] = None,
+    partitioned: bool = True,
+    device_local: bool = False,
+) -> None:
+    """
+    Declare a generic table section collected from one REST endpoint.
+
+    module:       selection group for --modules (net, gtm, apm, asm, ...)
+    endpoint:     collection path; '{var}' placeholders are expanded from
+                  'expand' (one request per value)
+    fields:       column title -> item field; '{var}' columns take the
+                  expanded value. Only these fields are requested ($select).
+    depends_on:   collectors that must be collected first
+    provision:    only collected when this BIG-IP module is provisioned
+                  (implies a dependency on sys_provision)
+    partitioned:  endpoint supports the partition filter used for sharding
+    device_local: config that is not shared within a config-sync group
+                  (collected on every member in deduplicated fleet runs)
+
+    Markdown, JSON and Excel output pick up registered sections without
+    further changes.
+    """
+    if provision and "sys_provision" not in depends_on:
+        depends_on = ("sys_provision",) + tuple(depends_on)
+    COLLECTORS[name] = {
+        "name": name,
+        "module": module,
+        "title": title,
+        "endpoint": endpoint,
+        "fields": fields,
+        "depends_on": tuple(depends_on),
+        "provision": provision,
+        "expand": expand or {},
+        "partitioned": partitioned,
+        "device_local": device_local,
+    }
+
+
+register_collector(
+    "sys_provision",
+    "sys",
+    "Provisioned Modules",
+    "tm/sys/provision",
+    {"Module": "name", "Level": "level"},
+    partitioned=False,
+    device_local=True,
+)
+register_collector(
+    "net_vlans",
+    "net",
+    "VLANs",
+    "tm/net/vlan",
+    {"Name": "name", "Partition": "partition", "Tag": "tag", "MTU": "mtu"},
+    device_local=True,
+)
+register_collector(
+    "net_self_ips",
+    "net",
+    "Self IPs",
+    "tm/net/self",
+    {
+        "Name": "name",
+        "Partition": "partition",
+        "Address": "address",
+        "VLAN": "vlan",
+        "Traffic_Group": "trafficGroup",
+        "Port_Lockdown": "allowService",
+    },
+    device_local=True,
+)
+register_collector(
+    "net_routes",
+    "net",
+    "Routes",
+    "tm/net/route",
+    {"Name": "name", "Partition": "partition", "Network": "network", "Gateway": "gw"},
+    device_local=True,
+)
+register_collector(
+    "net_route_domains",
+    "net",
+    "Route Domains",
+    "tm/net/route-domain",
+    {"Name": "name", "Partition": "partition", "ID": "id", "VLANs": "vlans"},
+    device_local=True,
+)
+register_collector(
+    "gtm_servers",
+    "gtm",
+    "GTM Servers",
+    "tm/gtm/server",
+    {"Name": "name", "Datacenter": "datacenter", "Product": "product"},
+    provision="gtm",
+    partitioned=False,
+    device_local=True,
+)
+register_collector(
+    "gtm_pools",
+    "gtm",
+    "GTM Pools",
+    "tm/gtm/pool/{type}",
+    {
+        "Name": "name",
+        "Partition": "partition",
+        "Type": "{type}",
+        "LB_Mode": "loadBalancingMode",
+        "Fallback_Mode": "fallbackMode",
+        "Monitor": "monitor",
+    },
+    provision="gtm",
+    expand={"type": GTM_RECORD_TYPES},
+    device_local=True,
+)
+register_collector(
+    "gtm_wideips",
+    "gtm",
+    "GTM Wide IPs",
+    "tm/gtm/wideip/{type}",
+    {
+        "Name": "name",
+        "Partition": "partition",
+        "Type": "{type}",
+        "Pool_LB_Mode": "poolLbMode",
+        "Pools": "pools",
+    },
+    provision="gtm",
+    expand={"type": GTM_RECORD_TYPES},
+    device_local=True,
+)
+register_collector(
+    "apm_access_profiles",
+    "apm",
+    "APM Access Profiles",
+    "tm/apm/profile/access",
+    {"Name": "name", "Partition": "partition", "Access_Policy": "accessPolicy"},
+    provision="apm",
+)
+register_collector(
+    "apm_policies",
+    "apm",
+    "APM Access Policies",
+    "tm/apm/policy/access-policy",
+    {
+        "Name": "name",
+        "Partition": "partition",
+        "Start_Item": "startItem",
+        "Default_Ending": "defaultEnding",
+    },
+    provision="apm",
+)
+register_collector(
+    "asm_policies",
+    "asm",
+    "ASM Policies",
+    "tm/asm/policies",
+    {
+        "Name": "name",
+        "Full_Path": "fullPath",
+        "Enforcement_Mode": "enforcementMode",
+        "Active": "active",
+        "Virtual_Servers": "virtualServers",
+    },
+    provision="asm",
+    partitioned=False,
+)
+
+
+def collector_modules() -> List[str]:
+    """Selectable module names (for --modules)."""
+    return sorted({c["module"] for c in COLLECTORS.values()} - {"sys"})
+
+
+def resolve_collectors(modules: List[str]) -> List[List[Dict[str, Any]]]:
+    """
+    Collectors of the given modules plus their dependencies, grouped into
+    levels: every collector only depends on collectors of earlier levels.
+    """
+    wanted: Dict[str, Dict[str, Any]] = {}
+
+    def add(name: str) -> None:
+        if name in wanted:
+            return
+        spec = COLLECTORS[name]
+        wanted[name] = spec
+        for dep in spec["depends_on"]:
+            add(dep)
+
+    for spec in COLLECTORS.values():
+        if spec["module"] in modules:
+            add(spec["name"])
+
+    levels: List[List[Dict[str, Any]]] = []
+    done: set = set()
+    while len(done) < len(wanted):
+        level = [
+            s
+            for n, s in wanted.items()
+            if n not in done and all(d in done for d in s["depends_on"])
+        ]
+        if not level:
+            raise ValueError(f"Collector dependency cycle in: {sorted(wanted)}")
+        levels.append(level)
+        done.update(s["name"] for s in level)
+    return levels
+
+
+def _expand_endpoint(spec: Dict[str, Any]) -> List[Tuple[str, Dict[str, str]]]:
+    """(path, placeholder values) for every expansion of the endpoint."""
+    expansions: List[Dict[str, str]] = [{}]
+    for var, values in spec["expand"].items():
+        expansions = [{**e, var: v} for e in expansions for v in values]
+    return [(spec["endpoint"].format(**e), e) for e in expansions]
+
+
+def _cell(value: Any) -> Any:
+    """Flatten a REST field for a table cell (lists/references -> names)."""
+    if isinstance(value, list):
+        return ", ".join(
+            str(v.get("name", "")) if isinstance(v, dict) else str(v) for v in value
+        )
+    if isinstance(value, dict):
+        return value.get("name") or value.get("link")
+    return value
+
+
+def _provisioned(
+    spec: Dict[str, Any], results: Dict[str, Dict[str, Any]], incomplete: List[str]
+) -> bool:
+    """
+    Whether the module 'spec' needs is provisioned. When provisioning could
+    not be read, every module counts as provisioned: its sections are
+    collected (and marked incomplete if that fails) rather than skipped.
+    """
+    if not spec["provision"] or "sys_provision" in incomplete:
+        return True
+    rows = results.get("sys_provision", {}).get("rows", [])
+    return any(
+        r["Module"] == spec["provision"] and r["Level"] not in (None, "none")
+        for r in rows
+    )
+
+
+def parse_modules(value: Any) -> List[str]:
+    """'net,gtm' / ['net', 'gtm'] / 'all' -> module names (ValueError if unknown)."""
+    if not value:
+        return []
+    names = value.split(",") if isinstance(value, str) else list(value)
+    names = [str(n).strip() for n in names if str(n).strip()]
+    if "all" in names:
+        return collector_modules()
+    unknown = [n for n in names if n not in collector_modules()]
+    if unknown:
+        raise ValueError(f"unknown module(s): {', '.join(unknown)}")
+    return names
+
+
+def collect_modules(
+    client: F5Client,
+    modules: List[str],
+    partitions: Optional[List[str]] = None,
+    device_local_only: bool = False,
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Collect the registered sections of 'modules'. Returns
+    ({name: {title, module, columns, rows}}, incomplete section names).
+
+    Per dependency level, all requests of all collectors are expanded
+    (placeholders x partitions), identical endpoints are merged into one
+    request with the union of their fields, and the whole batch runs on
+    one pool of client.concurrency workers, so enabling more modules adds
+    requests to the batch rather than sequential round trips.
+    Endpoints the device does not have (HTTP 404) give empty sections; any
+    other failed request (timeout, HTTP or connection error) marks the
+    section incomplete.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    incomplete: List[str] = []
+    for level in resolve_collectors(modules):
+        specs = [
+            s
+            for s in level
+            if _provisioned(s, results, incomplete)
+            and (not device_local_only or s["device_local"])
+        ]
+
+        # (path, partition) -> fields to $select
+        batch: Dict[Tuple[str, Optional[str]], set] = {}
+        plan: Dict[str, List[Tuple[Tuple[str, Optional[str]], Dict[str, str]]]] = {}
+        for spec in specs:
+            shards = partitions if spec["partitioned"] and partitions else [None]
+            fields = {f for f in spec["fields"].values() if not f.startswith("{")} | {
+                "name"
+            }
+            plan[spec["name"]] = []
+            for path, bound in _expand_endpoint(spec):
+                for partition in shards:
+                    batch.setdefault((path, partition), set()).update(fields)
+                    plan[spec["name"]].append(((path, partition), bound))
+
+        def fetch(key: Tuple[str, Optional[str]]) -> Any:
+            path, partition = key
+            params = {"$select": ",".join(sorted(batch[key]))}
+            if partition is not None:
+                params["$filter"] = f"partition eq {partition}"
+            try:
+                return client.get_collection(path, params=params)
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code == 404:
+                    return []  # endpoint/module not available on this box
+                return e
+            except requests.RequestException as e:
+                return e
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=client.concurrency) as pool:
+            responses = dict(zip(batch, pool.map(fetch, batch)))
+        elapsed = round(time.monotonic() - start, 3)
+
+        for spec in specs:
+            rows: List[Dict[str, Any]] = []
+            failed = None
+            for key, bound in plan[spec["name"]]:
+                items = responses[key]
+                if isinstance(items, Exception):
+                    failed = items
+                    continue
+                for item in items if isinstance(items, list) else []:
+                    rows.append(
+                        {
+                            col: (
+                                bound.get(src.strip("{}"))
+                                if src.startswith("{")
+                                else _cell(item.get(src))
+                            )
+                            for col, src in spec["fields"].items()
+                        }
+                    )
+            if failed is not None:
+                print(
+                    f"[WARN] Section '{spec['name']}' incomplete on "
+                    f"{client.base_url}: {failed}",
+                    file=sys.stderr,
+                )
+                incomplete.append(spec["name"])
+            results[spec["name"]] = {
+                "title": spec["title"],
+                "module": spec["module"],
+                "columns": list(spec["fields"]),
+                "rows": rows,
+            }
+            # The sections of one level are fetched as a batch; 'seconds' is its time
+            emit(
+                "section_collected",
+                device=client.name,
+                section=spec["name"],
+                items=len(rows),
+                seconds=elapsed,
+                complete=failed is None,
+            )
+
+    # Dependencies that were not asked for are not output sections
+    wanted = {s["name"] for s in COLLECTORS.values() if s["module"] in modules}
+    if modules:
+        wanted.add("sys_provision")
+    sections = {n: results[n] for n in COLLECTORS if n in wanted and n in results}
+    return sections, incomplete
+
+
+# =============================================================================
+# tmsh bulk backend (one tm/util/bash call instead of many REST collections)
+# =============================================================================
+
+# Each group runs in one tmsh process; a failing command only loses the rest
+# of its own group.
+TMSH_DEVICE_COMMANDS = [
+    [
+        "list sys global-settings hostname one-line",
+        "show sys version",
+        "list cm device recursive one-line",
+        "list cm device-group recursive one-line",
+        "show cm sync-status",
+        "list auth partition one-line",
+    ],
+]
+TMSH_LTM_COMMANDS = [
+    [
+        "list ltm virtual recursive one-line",
+        "list ltm pool recursive one-line",
+        "list ltm node recursive one-line",
+        *[f"list ltm monitor {mtype} recursive one-line" for mtype in MONITOR_TYPES],
+        "list ltm profile client-ssl recursive one-line",
+    ],
+    ["list sys crypto cert recursive one-line"],
+]
+# LTM sections each TMSH_LTM_COMMANDS group lists; when a group fails, its
+# sections are collected over REST instead
+TMSH_LTM_GROUP_SECTIONS = [
+    ["virtuals", "pools", "nodes", "monitors", "ssl_profiles"],
+    ["certs"],
+]
+
+# Printed after a command group whose tmsh process failed
+TMSH_FAILED_MARKER = "#tmsh-failed"
+
+# Object kinds the parsers understand
+_TMSH_KINDS = {
+    tuple(kind.split())
+    for kind in [
+        "sys global-settings",
+        "cm device",
+        "cm device-group",
+        "auth partition",
+        "ltm virtual",
+        "ltm pool",
+        "ltm node",
+        "ltm profile client-ssl",
+        "sys crypto cert",
+        *[f"ltm monitor {mtype}" for mtype in MONITOR_TYPES],
+    ]
+}
+
+# Properties tmsh prints without a value
+_TMSH_FLAGS = {"disabled", "enabled", "vlans-disabled", "vlans-enabled"}
+
+_TMSH_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}]|[^\s{}"]+')
+
+
+def run_tmsh(client: F5Client, command_groups: List[List[str]]) -> str:
+    """
+    Run groups of tmsh commands in a single tm/util/bash call. A group whose
+    tmsh process fails is followed by a TMSH_FAILED_MARKER line with its
+    position (see tmsh_failed_groups).
+    """
+    script = "; ".join(
+        "tmsh -q -c '"
+        + "; ".join(["cd /", *group])
+        + f"' || echo '{TMSH_FAILED_MARKER} {i}'"
+        for i, group in enumerate(command_groups)
+    )
+    return client.run_bash(script)
+
+
+def tmsh_failed_groups(text: str) -> List[int]:
+    """Positions of the command groups run_tmsh() reported as failed."""
+    return [
+        int(m.group(1))
+        for m in re.finditer(
+            rf"^{re.escape(TMSH_FAILED_MARKER)} (\d+)\s*$", text, re.MULTILINE
+        )
+    ]
+
+
+def parse_tmsh_line(line: str) -> Optional[Tuple[List[str], List[Any]]]:
+    """
+    Parse one 'one-line' tmsh object, e.g.
+    'ltm pool /Common/p1 { members { /Common/n1:80 { address 10.0.0.1 } } }'
+    into (header words, body) where body is a list of words and nested lists.
+    Returns None for lines that are not objects.
+    """
+    tokens = _TMSH_TOKEN_RE.findall(line)
+    try:
+        start = tokens.index("{")
+    except ValueError:
+        return None
+    stack: List[List[Any]] = [[]]
+    for tok in tokens[start + 1 :]:
+        if tok == "{":
+            child: List[Any] = []
+            stack[-1].append(child)
+            stack.append(child)
+        elif tok == "}":
+            if len(stack) == 1:
+                break
+            stack.pop()
+        else:
+            if tok[0] == '"':
+                tok = tok[1:-1].replace('\\"', '"')
+            stack[-1].append(tok)
+    return tokens[:start], stack[0]
+
+
+def _tmsh_props(block: List[Any]) -> Dict[str, Any]:
+    """
+    'key value key { ... }' pairs of a block; valueless flags map to True
+    and 'key a and b' (monitor rules) to 'a and b'.
+    """
+    props: Dict[str, Any] = {}
+    i = 0
+    n = len(block)
+    while i < n:
+        key = block[i]
+        if isinstance(key, list):
+            i += 1
+            continue
+        if key in _TMSH_FLAGS or i + 1 >= n:
+            props[key] = True
+            i += 1
+            continue
+        value = block[i + 1]
+        i += 2
+        while isinstance(value, str) and i + 1 < n and block[i] == "and":
+            value = f"{value} and {block[i + 1]}"
+            i += 2
+        props[key] = value
+    return props
+
+
+def _tmsh_names(block: Any) -> List[str]:
+    """Object names listed in a block like '{ /Common/a { } /Common/b }'."""
+    if not isinstance(block, list):
+        return []
+    return [item for item in block if isinstance(item, str)]
+
+
+def _tmsh_monitor(block: List[Any]) -> Optional[str]:
+    """Pool monitor rule in REST notation ('/Common/a and /Common/b', 'min 1 of {...}')."""
+    try:
+        i = block.index("monitor")
+    except ValueError:
+        return None
+    rest = block[i + 1 :]
+    if rest[:1] == ["none"]:
+        return None
+    if rest[:1] == ["min"] and len(rest) >= 4 and isinstance(rest[3], list):
+        return f"min {rest[1]} of {{ {' '.join(_tmsh_names(rest[3]))} }}"
+    parts = rest[:1]
+    j = 1
+    while j + 1 < len(rest) and rest[j] == "and":
+        parts += ["and", rest[j + 1]]
+        j += 2
+    return " ".join(str(p) for p in parts) or None
+
+
+def _split_path(path: str) -> Tuple[str, str]:
+    """'/Part/folder/name' -> ('Part', 'name'); bare names are in Common."""
+    parts = path.strip("/").split("/")
+    if path.startswith("/") and len(parts) > 1:
+        return parts[0], parts[-1]
+    return "Common", parts[-1]
+
+
+def iter_tmsh_objects(text: str) -> Any:
+    """Yield (kind, fullPath, props, body) for every object line in tmsh output."""
+    for line in text.splitlines():
+        parsed = parse_tmsh_line(line)
+        if parsed is None:
+            continue
+        header, body = parsed
+        # 'ltm pool /Common/p1', 'ltm monitor http /Common/m', 'sys global-settings'
+        for size in (3, 2):
+            if tuple(header[:size]) in _TMSH_KINDS:
+                kind = " ".join(header[:size])
+                path = header[size] if len(header) > size else ""
+                yield kind, path, _tmsh_props(body), body
+                break
+
+
+def parse_tmsh_device_info(text: str) -> Dict[str, Any]:
+    """
+    Build collect_device_info()'s structure from TMSH_DEVICE_COMMANDS output.
+    Fields missing from the output keep their DEVICE_INFO_DEFAULTS value.
+    """
+    info = _device_info_defaults()
+    self_device = None
+    groups: List[Tuple[str, List[str], Dict[str, Any]]] = []
+    for line in text.splitlines():
+        m = re.match(r"\s+Version\s+(\S+)", line)
+        if m and info["version"] == "unknown":
+            info["version"] = m.group(1)
+            continue
+        m = re.match(r"Status\s+(.+?)\s*$", line)
+        if m and info["sync_status"] == "unknown":
+            info["sync_status"] = m.group(1)
+    for kind, path, props, body in iter_tmsh_objects(text):
+        if kind == "sys global-settings":
+            info["hostname"] = props.get("hostname", "unknown")
+        elif kind == "cm device":
+            name = _split_path(path)[1]
+            info["trust_devices"].append(name)
+            if props.get("self-device") == "true":
+                self_device = name
+                info["ha_status"] = props.get("failover-state", "unknown")
+        elif kind == "cm device-group":
+            members = [_split_path(d)[1] for d in _tmsh_names(props.get("devices"))]
+            groups.append((_split_path(path)[1], members, props))
+        elif kind == "auth partition":
+            name = _split_path(path)[1]
+            info["partitions"].append(name)
+            rd = props.get("default-route-domain")
+            info["default_route_domains"][name] = (
+                int(rd) if isinstance(rd, str) and rd.isdigit() else 0
+            )
+    info["trust_devices"].sort()
+    for name, members, props in groups:
+        if props.get("type") == "sync-failover" and self_device in members:
+            info["sync_group"] = name
+            break
+    return info
+
+
+def parse_tmsh_ltm(text: str, partitions: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Build collect_ltm_objects()'s structures (except iRules) from
+    TMSH_LTM_COMMANDS output. tmsh omits default values, so the REST
+    defaults are filled in where the as-built shows them.
+    """
+    ltm: Dict[str, Any] = {
+        "virtuals": [],
+        "pools": [],
+        "nodes": [],
+        "monitors": [],
+        "ssl_profiles": [],
+        "certs": [],
+    }
+    wanted = set(partitions) if partitions is not None else None
+    for kind, path, props, body in iter_tmsh_objects(text):
+        partition, name = _split_path(path)
+        if wanted is not None and partition not in wanted:
+            continue
+        if kind == "ltm virtual":
+            ip, rd, port = parse_destination_rd(props.get("destination"))
+            pool = props.get("pool")
+            if pool == "none":
+                pool = None
+            ltm["virtuals"].append(
+                {
+                    "name": name,
+                    "partition": partition,
+                    "destination_ip": ip,
+                    "destination_port": port,
+                    "route_domain": rd,
+                    "pool": pool.split("/")[-1] if isinstance(pool, str) else None,
+                    "profiles": [
+                        p.split("/")[-1] for p in _tmsh_names(props.get("profiles"))
+                    ],
+                    "persistence": [
+                        p.split("/")[-1] for p in _tmsh_names(props.get("persist"))
+                    ],
+                    "irules": [
+                        r.split("/")[-1] for r in _tmsh_names(props.get("rules"))
+                    ],
+                }
+            )
+        elif kind == "ltm pool":
+            members = []
+            block = props.get("members")
+            if isinstance(block, list):
+                for i, item in enumerate(block):
+                    if not isinstance(item, str):
+                        continue
+                    mprops = (
+                        _tmsh_props(block[i + 1])
+                        if i + 1 < len(block) and isinstance(block[i + 1], list)
+                        else {}
+                    )
+                    members.append(
+                        {
+                            "name": item.split("/")[-1],
+                            "address": mprops.get("address"),
+                            "state": mprops.get("state", "unchecked"),
+                            "session": mprops.get("session", "user-enabled"),
+                        }
+                    )
+            ltm["pools"].append(
+                {
+                    "name": name,
+                    "partition": partition,
+                    "lb_method": props.get("load-balancing-mode", "round-robin"),
+                    "monitor": _tmsh_monitor(body),
+                    "members": members,
+                }
+            )
+        elif kind == "ltm node":
+            ltm["nodes"].append(
+                {
+                    "name": name,
+                    "partition": partition,
+                    "address": props.get("address"),
+                    "state": props.get("state", "unchecked"),
+                    "session": props.get("session", "user-enabled"),
+                }
+            )
+        elif kind.startswith("ltm monitor "):
+            mtype = kind.split(" ", 2)[2]
+            ltm["monitors"].append(
+                {"name": name, "partition": partition, "type": mtype, "fullPath": path}
+            )
+        elif kind == "ltm profile client-ssl":
+            ltm["ssl_profiles"].append(
+                {
+                    "name": name,
+                    "partition": partition,
+                    "fullPath": path,
+                    "cert": props.get("cert"),
+                    "chain": props.get("chain"),
+                }
+            )
+        elif kind == "sys crypto cert":
+            expiration: Any = props.get("expiration-date", "unknown")
+            if isinstance(expiration, str) and expiration.isdigit():
+                expiration = int(expiration)
+            ltm["certs"].append(
+                {
+                    "name": name,
+                    "partition": partition,
+                    "fullPath": path,
+                    "expiration": expiration,
+                }
+            )
+    return ltm
+
+
+# Device info part -> the field that is only set when tmsh printed that part
+TMSH_DEVICE_INFO_FIELDS = {
+    "hostname": "hostname",
+    "version": "version",
+    "ha_status": "trust_devices",
+    "sync_status": "sync_status",
+    "partitions": "partitions",
+}
+
+
+def collect_device_info_tmsh(client: F5Client) -> Dict[str, Any]:
+    """
+    collect_device_info() through a single tmsh call. Parts the call did
+    not return (it failed, timed out or printed something unexpected) are
+    read over REST instead, with collect_device_info()'s error handling.
+    """
+    try:
+        text = run_tmsh(client, TMSH_DEVICE_COMMANDS)
+    except (requests.Timeout, *DEVICE_INFO_ERRORS) as e:
+        print(
+            f"[WARN] tmsh device info failed on {client.base_url}, "
+            f"falling back to REST: {e}",
+            file=sys.stderr,
+        )
+        text = ""
+    info = parse_tmsh_device_info(text)
+    missing = [
+        part
+        for part, field in TMSH_DEVICE_INFO_FIELDS.items()
+        if info[field] == DEVICE_INFO_DEFAULTS[field]
+    ]
+    return read_device_info(client, info, missing)
+
+
+def collect_ltm_objects_tmsh(
+    client: F5Client,
+    partitions: Optional[List[str]] = None,
+    irule_source: bool = True,
+) -> Dict[str, Any]:
+    """
+    collect_ltm_objects() through a single tmsh call. iRules still come
+    from REST: their listing is cheap and the source cache needs each
+    rule's generation, which tmsh does not print.
+
+    If the call fails (e.g. tm/util/bash is not allowed for the user) or a
+    command group fails, the sections affected are collected over REST, with
+    collect_ltm_objects()'s error handling. A timeout marks them incomplete.
+    """
+    start = time.monotonic()
+    text = ""
+    incomplete: List[str] = []
+    fallback: List[str] = []
+    try:
+        text = run_tmsh(client, TMSH_LTM_COMMANDS)
+        for group in tmsh_failed_groups(text):
+            fallback.extend(TMSH_LTM_GROUP_SECTIONS[group])
+        if fallback:
+            print(
+                f"[WARN] tmsh commands failed on {client.base_url}, collecting "
+                f"{', '.join(fallback)} over REST",
+                file=sys.stderr,
+            )
+    except requests.Timeout as e:
+        print(
+            f"[WARN] tmsh collection incomplete on {client.base_url}: {e}",
+            file=sys.stderr,
+        )
+        incomplete = [s for group in TMSH_LTM_GROUP_SECTIONS for s in group]
+    except requests.RequestException as e:
+        print(
+            f"[WARN] tmsh collection failed on {client.base_url}, "
+            f"falling back to REST: {e}",
+            file=sys.stderr,
+        )
+        fallback = [s for group in TMSH_LTM_GROUP_SECTIONS for s in group]
+
+    parsed = parse_tmsh_ltm(text, partitions)
+    done = {
+        name: (
+            {key: [] for key in keys}
+            if name in incomplete
+            else {key: parsed[key] for key in keys}
+        )
+        for name, _, keys in LTM_SECTIONS
+        if name != "irules" and name not in fallback
+    }
+    ltm_data = collect_ltm_objects(client, partitions, irule_source, done)
+    ltm_data["incomplete"].extend(incomplete)
+    # One call for the sections tmsh listed; 'seconds' is the whole call
+    for name, _, keys in LTM_SECTIONS:
+        if name in done:
+            emit(
+                "section_collected",
+                device=client.name,
+                section=name,
+                items=len(ltm_data[keys[0]]),
+                seconds=round(time.monotonic() - start, 3),
+                complete=name not in incomplete,
+            )
+    return ltm_data
+
+
+# Collection backends: name -> (device info collector, config collector)
+BACKENDS = {
+    "rest": (collect_device_info, collect_ltm_objects),
+    "tmsh": (collect_device_info_tmsh, collect_ltm_objects_tmsh),
+}
+
+
+# Collections whose highest object 'generation' (plus item count) changes
+# whenever objects are created, modified or deleted.
+GENERATION_PROBE_PATHS = [
+    "tm/ltm/virtual",
+    "tm/ltm/pool",
+    "tm/ltm/node",
+    "tm/ltm/rule",
+    "tm/ltm/profile/client-ssl",
+    "tm/sys/crypto/cert",
+]
+
+
+def _module_probe_paths(modules: List[str]) -> List[str]:
+    """Collections of the module sections (and their dependencies), expanded."""
+    paths: List[str] = []
+    for level in resolve_collectors(modules):
+        for spec in level:
+            for path, _ in _expand_endpoint(spec):
+                if path not in paths and path not in GENERATION_PROBE_PATHS:
+                    paths.append(path)
+    return paths
+
+
+def probe_config_generation(
+    client: F5Client, modules: Optional[List[str]] = None
+) -> str:
+    """
+    Cheap config fingerprint: every MCP object carries the global generation
+    number of its last change, so fetching only that field is enough to tell
+    whether a full as-built collection is needed. With 'modules', the
+    collections of their sections are probed as well.
+    """
+    parts: List[str] = []
+    for path in GENERATION_PROBE_PATHS + _module_probe_paths(modules or []):
+        try:
+            items = client.get_collection(path, params={"$select": "generation"})
+        except requests.HTTPError:
+            # Collection not available on this box
+            parts.append("-")
+            continue
+        top = max((int(i.get("generation", 0)) for i in items), default=0)
+        parts.append(f"{top}:{len(items)}")
+    return "/".join(parts)
+
+
+def collect_device_state(
+    client: F5Client,
+    partitions: Optional[List[str]] = None,
+    modules: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Per-device runtime state that differs between members of a sync group
+    even though their config is identical: node and pool member
+    state/session, keyed by (partition, name[, member]), and the
+    device-local sections of 'modules' (VLANs, self IPs, routes, ...).
+
+    A state fetch that times out does not fail the member: its section
+    ('nodes' or 'pools') is listed in state['incomplete'], like a module
+    section, and apply_device_state() marks it so in the output.
+    """
+    incomplete: List[str] = []
+
+    def fetch(section: str, path: str, params: Dict[str, str]) -> List[Any]:
+        try:
+            return fetch_collection(client, path, params=params, partitions=partitions)
+        except requests.Timeout as e:
+            print(
+                f"[WARN] Section '{section}' incomplete on {client.base_url}: {e}",
+                file=sys.stderr,
+            )
+            incomplete.append(section)
+            return []
+
+    nodes_raw = fetch(
+        "nodes", "tm/ltm/node", {"$select": "name,partition,state,session"}
+    )
+    pools_raw = fetch(
+        "pools",
+        "tm/ltm/pool",
+        {"expandSubcollections": "true", "$select": "name,partition,membersReference"},
+    )
+    nodes = {
+        (n.get("partition", "Common"), n.get("name")): (
+            n.get("state"),
+            n.get("session"),
+        )
+        for n in nodes_raw
+    }
+    members = {}
+    for p in pools_raw:
+        for m in p.get("membersReference", {}).get("items", []):
+            key = (p.get("partition", "Common"), p.get("name"), m.get("name"))
+            members[key] = (m.get("state"), m.get("session"))
+    state: Dict[str, Any] = {"nodes": nodes, "members": members}
+    if modules:
+        state["extra"], module_incomplete = collect_modules(
+            client, modules, partitions, device_local_only=True
+        )
+        incomplete += module_incomplete
+    state["incomplete"] = incomplete
+    return state
+
+
+# State of an object whose device-local state could not be collected
+UNKNOWN_STATE = ("unknown", "unknown")
+
+
+def apply_device_state(
+    ltm_data: Dict[str, Any], state: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Copy of shared ltm_data with one device's node/member state and
+    device-local sections applied. Where the device's node or member state
+    is incomplete, or lacks an object (e.g. created after its state was
+    read), the shared state is replaced by 'unknown' rather than showing
+    another member's state.
+    """
+    state_incomplete = state.get("incomplete", [])
+    nodes = []
+    for n in ltm_data["nodes"]:
+        if "nodes" in state_incomplete:
+            st = UNKNOWN_STATE
+        else:
+            st = state["nodes"].get(
+                (n.get("partition", "Common"), n["name"]), UNKNOWN_STATE
+            )
+        nodes.append({**n, "state": st[0], "session": st[1]})
+    pools = []
+    for p in ltm_data["pools"]:
+        members = []
+        for m in p["members"]:
+            if "pools" in state_incomplete:
+                st = UNKNOWN_STATE
+            else:
+                st = state["members"].get(
+                    (p.get("partition", "Common"), p["name"], m["name"]),
+                    UNKNOWN_STATE,
+                )
+            members.append({**m, "state": st[0], "session": st[1]})
+        pools.append({**p, "members": members})
+    result = {**ltm_data, "nodes": nodes, "pools": pools}
+    local = set(state.get("extra", {}))
+    if local:
+        result["extra"] = {**ltm_data.get("extra", {}), **state["extra"]}
+    incomplete = [n for n in ltm_data.get("incomplete", []) if n not in local]
+    result["incomplete"] = incomplete + [
+        n for n in state_incomplete if n not in incomplete
+    ]
+    return result
+
+
+# =============================================================================
+# Cross-references (where-used maps)
+# =============================================================================
+
+
+def build_usage_maps(ltm_data: Dict[str, Any]) -> Dict[str, Any]:
+    # iRules usage
+    irule_usage: Dict[str, List[str]] = {}
     for vs in ltm_data["virtuals"]:
         for r in vs["irules"]:
             irule_usage.setdefault(r, []).append(vs["name"])
@@ -420,11 +2395,33 @@ def build_usage_maps(ltm_data: Dict[str, Any]) -> Dict[str, Any]:
         vips = ssl_profile_usage.get(sp["name"], [])
         cert_usage.setdefault(cert_name, []).extend(vips)
 
+    # Objects referenced from iRule bodies (each unique body is scanned once)
+    irule_references: Dict[str, Dict[str, List[str]]] = {}
+    pool_irule_usage: Dict[str, List[str]] = {}
+    datagroup_irule_usage: Dict[str, List[str]] = {}
+    sources = ltm_data.get("irule_sources") or {}
+    scanned: Dict[str, Dict[str, List[str]]] = {}
+    for r in ltm_data["irules"]:
+        sha = r.get("sha256")
+        if not sha or sha not in sources:
+            continue
+        if sha not in scanned:
+            scanned[sha] = scan_irule_references(sources[sha])
+        refs = scanned[sha]
+        irule_references[r["name"]] = refs
+        for pool in refs["pools"]:
+            pool_irule_usage.setdefault(pool, []).append(r["name"])
+        for dg in refs["classes"]:
+            datagroup_irule_usage.setdefault(dg, []).append(r["name"])
+
     return {
         "irule_usage": irule_usage,
         "monitor_usage": monitor_usage,
         "ssl_profile_usage": ssl_profile_usage,
         "cert_usage": cert_usage,
+        "irule_references": irule_references,
+        "pool_irule_usage": pool_irule_usage,
+        "datagroup_irule_usage": datagroup_irule_usage,
     }
 
 
@@ -432,37 +2429,53 @@ def build_usage_maps(ltm_data: Dict[str, Any]) -> Dict[str, Any]:
 # Markdown rendering (standardized sections 0–5)
 # =============================================================================
 
+INCOMPLETE_NOTE = [
+    "> **Incomplete:** this section could not be fully collected "
+    "(timeout or error); the list below is empty or partial.",
+    "",
+]
 
-def render_markdown(
-    device_info: Dict[str, Any], ltm_data: Dict[str, Any], usage_maps: Dict[str, Any]
-) -> str:
-    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-    lines: List[str] = []
-
-    lines.append(f"# F5 As-Built – {device_info['hostname']}")
-    lines.append("")
-    lines.append(f"_Generated on {now}_")
-    lines.append("")
 
-    # 0. Device Report
-    lines.append("## 0. Device Report")
-    lines.append("")
-    lines.append(f"- **Hostname:** {device_info['hostname']}")
-    lines.append(f"- **Software Version:** {device_info['version']}")
-    lines.append(f"- **HA Status:** {device_info['ha_status']}")
-    lines.append(f"- **Sync Group:** {device_info['sync_group']}")
+def _md_device_report(device_info: Dict[str, Any], incomplete: List[str]) -> List[str]:
+    lines = [
+        f"- **Hostname:** {device_info['hostname']}",
+        f"- **Software Version:** {device_info['version']}",
+        f"- **HA Status:** {device_info['ha_status']}",
+        f"- **Sync Group:** {device_info['sync_group']}",
+        f"- **Sync Status:** {device_info.get('sync_status', 'unknown')}",
+    ]
+    if device_info.get("config_source"):
+        lines.append(
+            f"- **Shared Config Collected From:** {device_info['config_source']}"
+        )
     parts = device_info.get("partitions") or []
     lines.append(f"- **Partitions:** {', '.join(parts) if parts else 'None'}")
+    if device_info.get("collected_partitions"):
+        lines.append(
+            f"- **Collected Partitions:** {', '.join(device_info['collected_partitions'])}"
+        )
+    if incomplete:
+        lines.append(f"- **Incomplete Sections:** {', '.join(sorted(incomplete))}")
     lines.append("")
+    return lines
 
-    # 1. Virtual Servers
-    lines.append("## 1. Virtual Servers")
-    lines.append("")
-    for vs in sorted(ltm_data["virtuals"], key=lambda x: x["name"] or ""):
+
+# Section renderers: (objects, usage_maps) -> Markdown lines. They only read
+# the usage_maps entries of the objects they render (see MD_SECTIONS), so a
+# shard can be rendered from a slice of them.
+
+
+def _md_virtuals(
+    virtuals: List[Dict[str, Any]], usage_maps: Dict[str, Any]
+) -> List[str]:
+    lines: List[str] = []
+    for vs in sorted(virtuals, key=lambda x: x["name"] or ""):
         lines.append(f"### {vs['name']}")
         lines.append("")
         lines.append(f"- **Destination IP:** `{vs['destination_ip']}`")
         lines.append(f"- **Destination Port:** `{vs['destination_port']}`")
+        if vs.get("route_domain") is not None:
+            lines.append(f"- **Route Domain:** `{vs['route_domain']}`")
         lines.append(f"- **Default Pool:** `{vs['pool']}`")
         profiles = vs.get("profiles") or []
         persistence = vs.get("persistence") or []
@@ -473,15 +2486,19 @@ def render_markdown(
         )
         lines.append(f"- **iRules:** {', '.join(irules) if irules else 'None'}")
         lines.append("")
+    return lines
 
-    # 2. Pools
-    lines.append("## 2. Pools")
-    lines.append("")
-    for p in sorted(ltm_data["pools"], key=lambda x: x["name"] or ""):
+
+def _md_pools(pools: List[Dict[str, Any]], usage_maps: Dict[str, Any]) -> List[str]:
+    lines: List[str] = []
+    for p in sorted(pools, key=lambda x: x["name"] or ""):
         lines.append(f"### {p['name']}")
         lines.append("")
         lines.append(f"- **Load Balancing Method:** `{p['lb_method']}`")
         lines.append(f"- **Monitor:** `{p['monitor']}`")
+        referenced_by = usage_maps.get("pool_irule_usage", {}).get(p["name"], [])
+        if referenced_by:
+            lines.append(f"- **Referenced by iRules:** {', '.join(referenced_by)}")
         lines.append("")
         lines.append("| Member | Address | State | Session |")
         lines.append("|--------|---------|-------|---------|")
@@ -492,28 +2509,29 @@ def render_markdown(
         if not p["members"]:
             lines.append("| _No members_ |  |  |  |")
         lines.append("")
+    return lines
 
-    # 3. Nodes
-    lines.append("## 3. Nodes")
-    lines.append("")
-    lines.append("| Node | IP Address | State | Session |")
-    lines.append("|------|------------|-------|---------|")
-    for n in sorted(ltm_data["nodes"], key=lambda x: x["name"] or ""):
+
+def _md_nodes(nodes: List[Dict[str, Any]], usage_maps: Dict[str, Any]) -> List[str]:
+    lines = [
+        "| Node | IP Address | State | Session |",
+        "|------|------------|-------|---------|",
+    ]
+    for n in sorted(nodes, key=lambda x: x["name"] or ""):
         lines.append(
             f"| `{n['name']}` | `{n['address']}` | `{n['state']}` | `{n['session']}` |"
         )
-    if not ltm_data["nodes"]:
+    if not nodes:
         lines.append("| _No nodes_ |  |  |  |")
     lines.append("")
+    return lines
 
-    # 4. Monitors & iRules
-    lines.append("## 4. Monitors & iRules")
-    lines.append("")
 
-    # 4.1 Monitors
-    lines.append("### 4.1 Monitors")
-    lines.append("")
-    for m in sorted(ltm_data["monitors"], key=lambda x: x["name"] or ""):
+def _md_monitors(
+    monitors: List[Dict[str, Any]], usage_maps: Dict[str, Any]
+) -> List[str]:
+    lines: List[str] = []
+    for m in sorted(monitors, key=lambda x: x["name"] or ""):
         used_by = usage_maps["monitor_usage"].get(m["name"], [])
         lines.append(f"#### {m['name']}")
         lines.append("")
@@ -523,11 +2541,12 @@ def render_markdown(
             f"- **Used by Pools:** {', '.join(used_by) if used_by else 'Not referenced by any pool'}"
         )
         lines.append("")
+    return lines
 
-    # 4.2 iRules
-    lines.append("### 4.2 iRules")
-    lines.append("")
-    for r in sorted(ltm_data["irules"], key=lambda x: x["name"] or ""):
+
+def _md_irules(irules: List[Dict[str, Any]], usage_maps: Dict[str, Any]) -> List[str]:
+    lines: List[str] = []
+    for r in sorted(irules, key=lambda x: x["name"] or ""):
         used_by = usage_maps["irule_usage"].get(r["name"], [])
         lines.append(f"#### {r['name']}")
         lines.append("")
@@ -535,16 +2554,26 @@ def render_markdown(
         lines.append(
             f"- **Used by Virtual Servers:** {', '.join(used_by) if used_by else 'Not referenced by any virtual server'}"
         )
+        refs = usage_maps.get("irule_references", {}).get(r["name"])
+        if refs:
+            lines.append(f"- **Source SHA-256:** `{r.get('sha256')}`")
+            for key, label in (
+                ("pools", "Pools"),
+                ("nodes", "Nodes"),
+                ("classes", "Data Groups"),
+                ("virtuals", "Virtual Servers"),
+            ):
+                if refs[key]:
+                    lines.append(f"- **References {label}:** {', '.join(refs[key])}")
         lines.append("")
+    return lines
 
-    # 5. SSL Profiles & Certificates
-    lines.append("## 5. SSL Profiles & Certificates")
-    lines.append("")
 
-    # 5.1 SSL profiles (with attached VIPs)
-    lines.append("### 5.1 SSL Profiles")
-    lines.append("")
-    for sp in sorted(ltm_data["ssl_profiles"], key=lambda x: x["name"] or ""):
+def _md_ssl_profiles(
+    ssl_profiles: List[Dict[str, Any]], usage_maps: Dict[str, Any]
+) -> List[str]:
+    lines: List[str] = []
+    for sp in sorted(ssl_profiles, key=lambda x: x["name"] or ""):
         used_by = usage_maps["ssl_profile_usage"].get(sp["name"], [])
         lines.append(f"#### {sp['name']}")
         lines.append("")
@@ -555,11 +2584,12 @@ def render_markdown(
             f"- **Used by Virtual Servers:** {', '.join(used_by) if used_by else 'Not referenced by any virtual server'}"
         )
         lines.append("")
+    return lines
 
-    # 5.2 Certificates (with attached VIPs via profiles)
-    lines.append("### 5.2 Certificates")
-    lines.append("")
-    for c in sorted(ltm_data["certs"], key=lambda x: x["name"] or ""):
+
+def _md_certs(certs: List[Dict[str, Any]], usage_maps: Dict[str, Any]) -> List[str]:
+    lines: List[str] = []
+    for c in sorted(certs, key=lambda x: x["name"] or ""):
         used_by = usage_maps["cert_usage"].get(c["name"], [])
         lines.append(f"#### {c['name']}")
         lines.append("")
@@ -571,8 +2601,414 @@ def render_markdown(
             f"{', '.join(used_by) if used_by else 'Not referenced'}"
         )
         lines.append("")
-
-    return "\n".join(lines)
+    return lines
+
+
+def _md_extra(section: Dict[str, Any], usage_maps: Dict[str, Any]) -> List[str]:
+    """A registered collector section ({'columns', 'rows'}) as one table."""
+    if not section["rows"]:
+        return ["_None configured._", ""]
+    lines = [
+        "| " + " | ".join(section["columns"]) + " |",
+        "|" + "|".join("---" for _ in section["columns"]) + "|",
+    ]
+    for row in section["rows"]:
+        cells = [row.get(col) for col in section["columns"]]
+        lines.append(
+            "| " + " | ".join("" if c is None else f"`{c}`" for c in cells) + " |"
+        )
+    lines.append("")
+    return lines
+
+
+# LTM sections in document order:
+# (ltm_data key, title, '## ' group title or None, renderer, usage_maps keys read)
+MD_SECTIONS: List[
+    Tuple[str, str, Optional[str], Callable[..., List[str]], Tuple[str, ...]]
+] = [
+    ("virtuals", "1. Virtual Servers", None, _md_virtuals, ()),
+    ("pools", "2. Pools", None, _md_pools, ("pool_irule_usage",)),
+    ("nodes", "3. Nodes", None, _md_nodes, ()),
+    (
+        "monitors",
+        "4.1 Monitors",
+        "4. Monitors & iRules",
+        _md_monitors,
+        ("monitor_usage",),
+    ),
+    (
+        "irules",
+        "4.2 iRules",
+        "4. Monitors & iRules",
+        _md_irules,
+        ("irule_usage", "irule_references"),
+    ),
+    (
+        "ssl_profiles",
+        "5.1 SSL Profiles",
+        "5. SSL Profiles & Certificates",
+        _md_ssl_profiles,
+        ("ssl_profile_usage",),
+    ),
+    (
+        "certs",
+        "5.2 Certificates",
+        "5. SSL Profiles & Certificates",
+        _md_certs,
+        ("cert_usage",),
+    ),
+]
+
+
+def render_markdown(
+    device_info: Dict[str, Any],
+    ltm_data: Dict[str, Any],
+    usage_maps: Dict[str, Any],
+    device: Optional[str] = None,
+) -> str:
+    """
+    The Markdown as-built. 'device' (default: the hostname) names the
+    device in the section_rendered progress events.
+    """
+    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    lines: List[str] = []
+
+    incomplete = set(ltm_data.get("incomplete") or [])
+
+    # [title, first line, start time] of the '## ' section being rendered
+    current: List[Any] = []
+
+    def end_section() -> None:
+        if current:
+            title, first, start = current
+            emit(
+                "section_rendered",
+                device=device or device_info["hostname"],
+                section=title,
+                lines=len(lines) - first,
+                seconds=round(time.monotonic() - start, 3),
+            )
+
+    def heading(title: str) -> None:
+        end_section()
+        current[:] = [title, len(lines), time.monotonic()]
+        lines.append(f"## {title}")
+        lines.append("")
+
+    lines.append(f"# F5 As-Built – {device_info['hostname']}")
+    lines.append("")
+    lines.append(f"_Generated on {now}_")
+    lines.append("")
+
+    heading("0. Device Report")
+    if "device_report" in incomplete:
+        lines.extend(INCOMPLETE_NOTE)
+    lines.extend(_md_device_report(device_info, sorted(incomplete)))
+
+    group = None
+    for name, title, parent, render, _ in MD_SECTIONS:
+        if parent is None:
+            heading(title)
+        else:
+            if parent != group:
+                heading(parent)
+            lines.append(f"### {title}")
+            lines.append("")
+        group = parent
+        if name in incomplete:
+            lines.extend(INCOMPLETE_NOTE)
+        lines.extend(render(ltm_data[name], usage_maps))
+
+    # 6+. Registered collector sections (net, GTM, APM, ASM, ...)
+    for number, (name, section) in enumerate(
+        (ltm_data.get("extra") or {}).items(), start=6
+    ):
+        heading(f"{number}. {section['title']}")
+        if name in incomplete:
+            lines.extend(INCOMPLETE_NOTE)
+        lines.extend(_md_extra(section, usage_maps))
+
+    end_section()
+    return "\n".join(lines)
+
+
+# =============================================================================
+# Sharded Markdown output (one file per section and partition)
+# =============================================================================
+
+# Part of every shard's digest: bump it when a section renderer's output
+# changes, so the next run re-renders shards written by the old code.
+MD_SHARD_FORMAT = 1
+MD_SHARD_MANIFEST = ".manifest.json"
+# Fewer objects than this to re-render are done in-process; starting the
+# worker processes would cost more than it saves.
+MD_SHARD_PARALLEL_MIN = 5000
+
+# Render processes shared by every device of the run (fleet runs write
+# several devices at once), created on first use; see _render_pool()
+_RENDER_POOL: Optional[ProcessPoolExecutor] = None
+_RENDER_POOL_LOCK = threading.Lock()
+
+_MD_RENDERERS: Dict[str, Callable[..., List[str]]] = {
+    name: render for name, _, _, render, _ in MD_SECTIONS
+}
+_MD_RENDERERS["extra"] = _md_extra
+
+
+def _shard_file_name(partition: str) -> str:
+    """
+    'Tenant1' -> 'Tenant1.md'. A name with other characters gets them
+    replaced and a hash of the original appended ('a b' -> 'a_b~7dbde935.md'),
+    so it cannot clash with a partition that is really called 'a_b'.
+    """
+    safe = re.sub(r"[^\w.-]", "_", partition)
+    if safe != partition:
+        safe += "~" + hashlib.sha1(partition.encode("utf-8")).hexdigest()[:8]
+    return safe + ".md"
+
+
+def render_markdown_shard(
+    task: Tuple[str, str, str, Any, Dict[str, Any], bool],
+) -> Tuple[str, float]:
+    """
+    Render one shard: task is (renderer, title, hostname, objects, usage_maps
+    slice, incomplete). Returns (Markdown, seconds). Runs in worker processes.
+    """
+    start = time.monotonic()
+    renderer, title, hostname, objects, usage, incomplete = task
+    lines = [
+        f"# {title}",
+        "",
+        f"_F5 As-Built – {hostname}. [Index](../index.md)_",
+        "",
+    ]
+    if incomplete:
+        lines.extend(INCOMPLETE_NOTE)
+    lines.extend(_MD_RENDERERS[renderer](objects, usage))
+    return "\n".join(lines), time.monotonic() - start
+
+
+def _render_pool(jobs: int) -> ProcessPoolExecutor:
+    """
+    The run's render pool. Its size is fixed by the first caller, so 'jobs'
+    caps the render processes of the whole run, not of each device. Workers
+    are started by a fork server (spawned where there is none): forking the
+    collector threads' process could copy locks held by other threads.
+    """
+    global _RENDER_POOL
+    with _RENDER_POOL_LOCK:
+        if _RENDER_POOL is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            _RENDER_POOL = ProcessPoolExecutor(max_workers=jobs, mp_context=context)
+            atexit.register(_RENDER_POOL.shutdown)
+        return _RENDER_POOL
+
+
+def plan_markdown_shards(
+    device_info: Dict[str, Any], ltm_data: Dict[str, Any], usage_maps: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Split the as-built into shards: one per LTM section (or registered
+    collector section) and partition, in document order. Each shard carries
+    its render task and the digest of everything that task renders.
+    """
+    incomplete = set(ltm_data.get("incomplete") or [])
+    hostname = device_info["hostname"]
+    shards: List[Dict[str, Any]] = []
+
+    def add(
+        name: str,
+        title: str,
+        renderer: str,
+        partition: str,
+        objects: Any,
+        usage: Dict[str, Any],
+        count: int,
+    ) -> None:
+        task = (
+            renderer,
+            f"{title} – {partition}",
+            hostname,
+            objects,
+            usage,
+            name in incomplete,
+        )
+        # marshal format 2 has no back-references, so equal data always gives
+        # equal bytes; it is several times faster than json.dumps here
+        digest = hashlib.sha256(marshal.dumps([MD_SHARD_FORMAT, task], 2)).hexdigest()
+        shards.append(
+            {
+                "section": name,
+                "title": title,
+                "partition": partition,
+                "path": f"{name}/{_shard_file_name(partition)}",
+                "objects": count,
+                "task": task,
+                "digest": digest,
+            }
+        )
+
+    for name, title, _, _, usage_keys in MD_SECTIONS:
+        by_partition: Dict[str, List[Dict[str, Any]]] = {}
+        for obj in ltm_data[name]:
+            by_partition.setdefault(obj.get("partition") or "Common", []).append(obj)
+        for partition in sorted(by_partition):
+            objects = by_partition[partition]
+            usage = {}
+            for key in usage_keys:
+                entries = usage_maps.get(key) or {}
+                usage[key] = {
+                    obj["name"]: entries[obj["name"]]
+                    for obj in objects
+                    if obj["name"] in entries
+                }
+            add(name, title, name, partition, objects, usage, len(objects))
+
+    for number, (name, section) in enumerate(
+        (ltm_data.get("extra") or {}).items(), start=6
+    ):
+        by_partition = {}
+        for row in section["rows"]:
+            by_partition.setdefault(row.get("Partition") or "Common", []).append(row)
+        for partition in sorted(by_partition):
+            rows = by_partition[partition]
+            add(
+                name,
+                f"{number}. {section['title']}",
+                "extra",
+                partition,
+                {"columns": section["columns"], "rows": rows},
+                {},
+                len(rows),
+            )
+    return shards
+
+
+def _render_markdown_index(
+    device_info: Dict[str, Any],
+    ltm_data: Dict[str, Any],
+    shards: List[Dict[str, Any]],
+) -> str:
+    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    incomplete = set(ltm_data.get("incomplete") or [])
+    lines = [
+        f"# F5 As-Built – {device_info['hostname']}",
+        "",
+        f"_Generated on {now}_",
+        "",
+        "## 0. Device Report",
+        "",
+    ]
+    if "device_report" in incomplete:
+        lines.extend(INCOMPLETE_NOTE)
+    lines.extend(_md_device_report(device_info, sorted(incomplete)))
+
+    by_section: Dict[str, List[Dict[str, Any]]] = {}
+    for shard in shards:
+        by_section.setdefault(shard["section"], []).append(shard)
+    sections = [(name, title) for name, title, _, _, _ in MD_SECTIONS] + [
+        (name, f"{number}. {section['title']}")
+        for number, (name, section) in enumerate(
+            (ltm_data.get("extra") or {}).items(), start=6
+        )
+    ]
+    lines.append("## Sections")
+    lines.append("")
+    lines.append("| Section | Partition | Objects |")
+    lines.append("|---------|-----------|---------|")
+    for name, title in sections:
+        if name in incomplete:
+            title += " _(incomplete)_"
+        for shard in by_section.get(name) or []:
+            lines.append(
+                f"| {title} | [{shard['partition']}]({shard['path']}) | {shard['objects']} |"
+            )
+        if name not in by_section:
+            lines.append(f"| {title} | _None_ | 0 |")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def write_markdown_shards(
+    output_dir: str,
+    device_info: Dict[str, Any],
+    ltm_data: Dict[str, Any],
+    usage_maps: Dict[str, Any],
+    jobs: int = 1,
+    device: Optional[str] = None,
+) -> Tuple[str, int, int]:
+    """
+    Write the as-built to output_dir as one Markdown file per section and
+    partition plus an index.md linking them. Shards whose digest matches the
+    previous run's manifest (and whose file still exists) are not rendered
+    again; the others are rendered in the run's shared pool of 'jobs'
+    processes (see _render_pool). Shards of sections or partitions that are
+    gone are removed. Returns (index path, shards written, shards skipped).
+    """
+    device = device or device_info["hostname"]
+    manifest_path = os.path.join(output_dir, MD_SHARD_MANIFEST)
+    # The marshal bytes behind the digests differ between Python versions
+    key = {"format": MD_SHARD_FORMAT, "python": list(sys.version_info[:2])}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        same = all(manifest.get(k) == v for k, v in key.items())
+        previous = manifest["shards"] if same else {}
+    except (OSError, ValueError, KeyError, AttributeError):
+        previous = {}
+
+    shards = plan_markdown_shards(device_info, ltm_data, usage_maps)
+    pending = [
+        s
+        for s in shards
+        if previous.get(s["path"]) != s["digest"]
+        or not os.path.exists(os.path.join(output_dir, s["path"]))
+    ]
+
+    tasks = [s["task"] for s in pending]
+    parallel = sum(s["objects"] for s in pending) >= MD_SHARD_PARALLEL_MIN
+    if jobs > 1 and len(tasks) > 1 and parallel:
+        pool = _render_pool(jobs)
+        results = list(pool.map(render_markdown_shard, tasks, chunksize=4))
+    else:
+        results = [render_markdown_shard(task) for task in tasks]
+
+    for shard, (content, seconds) in zip(pending, results):
+        _write_atomic(os.path.join(output_dir, shard["path"]), content)
+        emit(
+            "section_rendered",
+            device=device,
+            section=shard["title"],
+            partition=shard["partition"],
+            lines=content.count("\n") + 1,
+            seconds=round(seconds, 3),
+        )
+
+    current = {s["path"] for s in shards}
+    for path in previous:
+        if path not in current:
+            try:
+                os.remove(os.path.join(output_dir, path))
+            except OSError:
+                pass
+    for name in os.listdir(output_dir):
+        full = os.path.join(output_dir, name)
+        if os.path.isdir(full) and not os.listdir(full):
+            os.rmdir(full)
+
+    index_path = os.path.join(output_dir, "index.md")
+    _write_atomic(index_path, _render_markdown_index(device_info, ltm_data, shards))
+    _write_atomic(
+        manifest_path,
+        json.dumps(
+            {**key, "shards": {s["path"]: s["digest"] for s in shards}},
+            indent=2,
+        ),
+    )
+    return index_path, len(pending), len(shards) - len(pending)
 
 
 # =============================================================================
@@ -594,11 +3030,18 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="List devices in inventory and exit",
     )
-    parser.add_argument(
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument(
         "-d",
         "--device",
         help="Device name from inventory to run as-built against",
     )
+    target.add_argument(
+        "-s",
+        "--select",
+        help="Run against all inventory devices matching a selector, e.g. "
+        "'site=FLL2,env=prod', 'name=FLL2*', 'name=~^fll2.*v$', 'tags!=lab'",
+    )
     parser.add_argument(
         "-f",
         "--file",
@@ -606,13 +3049,170 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--format",
-        choices=["md", "json"],
+        choices=["md", "json", "html"],
         default="md",
-        help="Output format: md (Markdown) or json (structured). Default: md",
+        help="Output format: md (Markdown), json (structured) or html "
+        "(interactive report, see f5_asbuilt_html.py). Default: md",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=sorted(f5_asbuilt_io.COMPRESSIONS),
+        help="Write md/json output compressed (adds .gz or .zst); -f names "
+        "ending in .gz or .zst are compressed without this flag",
+    )
+    parser.add_argument(
+        "--split-markdown",
+        action="store_true",
+        help="With --format md, write one file per section and partition plus "
+        "an index.md into a directory named after the output file; sections "
+        "whose objects did not change since the last run are not re-rendered",
+    )
+    parser.add_argument(
+        "--render-jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes rendering --split-markdown section files "
+        "(default: number of CPUs)",
+    )
+    parser.add_argument(
+        "-p",
+        "--partition",
+        help="Comma-separated partitions to collect (tenant-scoped as-built); "
+        "each collection is fetched per partition",
+    )
+    parser.add_argument(
+        "--shard-partitions",
+        action="store_true",
+        help="Fetch every collection per partition (concurrently, up to the "
+        "device's 'concurrency') instead of in one large request",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["rest", "tmsh"],
+        help="Collection backend: rest (granular iControl REST collections) or "
+        "tmsh (one bulk 'tmsh list' through tm/util/bash). Default: the "
+        "device's 'backend' in the inventory, else rest",
+    )
+    parser.add_argument(
+        "--modules",
+        help="Extra collector modules, comma-separated: net (VLANs, self IPs, "
+        "routes, route domains), gtm, apm, asm, or 'all'. Default: the "
+        "device's 'modules' in the inventory, else none",
+    )
+    parser.add_argument(
+        "--no-irule-source",
+        action="store_true",
+        help="Do not collect iRule bodies (and skip iRule reference extraction)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_REQUEST_TIMEOUT,
+        help="Timeout for each REST request, in seconds "
+        f"(default: {DEFAULT_REQUEST_TIMEOUT:.0f})",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="Time budget per device, in seconds. Sections not collected in "
+        "time are marked incomplete in the output (default: no limit)",
+    )
+    parser.add_argument(
+        "--no-sync-dedup",
+        action="store_true",
+        help="With --select, collect the full config from every member of a "
+        "config-sync group instead of once per group",
+    )
+    parser.add_argument(
+        "--index",
+        nargs="?",
+        const=f5_asbuilt_query.DEFAULT_INDEX_PATH,
+        metavar="DB",
+        help="Also add every written as-built to the SQLite query index "
+        f"(default: {f5_asbuilt_query.DEFAULT_INDEX_PATH}); query it with "
+        "f5_asbuilt_query.py",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="With --select, continue an interrupted fleet run: skip devices "
+        "already written by it (checkpoint in .f5_asbuilt_state/)",
+    )
+    parser.add_argument(
+        "--checkpoint-sections",
+        action="store_true",
+        help="With --select, also checkpoint each completed LTM section, so "
+        "--resume does not re-fetch them for a half-collected device",
+    )
+    parser.add_argument(
+        "--fixed-concurrency",
+        action="store_true",
+        help="Use each device's 'concurrency' as a fixed in-flight request "
+        "limit instead of adapting it to the device's response times and errors",
+    )
+    parser.add_argument(
+        "--events",
+        metavar="TARGET",
+        help="Stream NDJSON progress events (device started, endpoint fetched, "
+        "section collected/rendered, file written, error) to TARGET: '-' for "
+        "stdout (other output then goes to stderr), tcp:HOST:PORT or unix:PATH",
+    )
+    parser.add_argument(
+        "--no-inventory-cache",
+        action="store_true",
+        help=f"Always re-parse the inventory YAML instead of using {CACHE_DIR}/",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Keep polling the devices (all inventory devices unless -d is given) "
+        "and re-collect only those whose config generation changed",
+    )
+    parser.add_argument(
+        "--poll-min",
+        type=float,
+        default=300.0,
+        help="Shortest poll interval per device, in seconds (default: 300)",
+    )
+    parser.add_argument(
+        "--poll-max",
+        type=float,
+        default=86400.0,
+        help="Longest poll interval per device, in seconds (default: 86400)",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.1,
+        help="Random +/- fraction applied to every poll interval (default: 0.1)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of devices collected or polled at the same time "
+        "(default: 4)",
     )
     return parser.parse_args()
 
 
+def collect_options_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    """Keyword arguments for collect_asbuilt() derived from the CLI."""
+    opts: Dict[str, Any] = {
+        "shard_partitions": args.shard_partitions,
+        "irule_source": not args.no_irule_source,
+        "backend": args.backend,
+    }
+    try:
+        opts["modules"] = parse_modules(args.modules)
+    except ValueError as e:
+        print(f"[ERROR] --modules: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.partition:
+        opts["partitions"] = [p.strip() for p in args.partition.split(",") if p.strip()]
+    return opts
+
+
 def ensure_credentials_from_env() -> Tuple[str, str, bool]:
     load_dotenv()
     user = os.getenv("F5_USER")
@@ -627,8 +3227,162 @@ def ensure_credentials_from_env() -> Tuple[str, str, bool]:
     return user, password, verify_ssl
 
 
+def make_client(
+    device: Dict[str, Any],
+    username: str,
+    password: str,
+    verify_ssl: bool,
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    budget: Optional[float] = None,
+    adaptive: bool = True,
+) -> F5Client:
+    """
+    Build the REST client for an inventory device, applying its overrides
+    ('concurrency', 'max_concurrency', 'timeout', 'budget'). The time
+    budget starts now. With adaptive, the in-flight limit starts from the
+    one learned for this device in earlier runs, if any.
+    """
+    host = device.get("host")
+    if not host:
+        raise ValueError(f"device '{device.get('name')}' is missing 'host'")
+    username, password, verify_ssl = device_credentials(
+        device, username, password, verify_ssl
+    )
+    client = F5Client(
+        host=host,
+        username=username,
+        password=password,
+        verify_ssl=verify_ssl,
+        concurrency=int(device.get("concurrency", DEFAULT_DEVICE_CONCURRENCY)),
+        timeout=float(device.get("timeout", request_timeout)),
+        budget=float(device["budget"]) if device.get("budget") else budget,
+        adaptive=adaptive,
+        max_concurrency=(
+            int(device["max_concurrency"]) if device.get("max_concurrency") else None
+        ),
+        name=device.get("name"),
+    )
+    learned = load_concurrency_limits().get(client.base_url) if adaptive else None
+    if learned:
+        limiter = client.limiter
+        limiter.limit = min(float(limiter.maximum), max(1.0, float(learned["limit"])))
+    return client
+
+
+def device_collect_opts(
+    device: Dict[str, Any], collect_opts: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    collect_opts with the device's inventory 'backend' and 'modules'
+    applied (CLI wins).
+    """
+    opts = dict(collect_opts or {})
+    if not opts.get("backend"):
+        opts["backend"] = device.get("backend", "rest")
+    if opts["backend"] not in BACKENDS:
+        raise ValueError(
+            f"device '{device.get('name')}' has unknown backend '{opts['backend']}'"
+        )
+    try:
+        opts["modules"] = parse_modules(
+            opts.get("modules") if opts.get("modules") else device.get("modules")
+        )
+    except ValueError as e:
+        raise ValueError(f"device '{device.get('name')}': {e}") from None
+    return opts
+
+
+def scope_partitions(
+    device_info: Dict[str, Any],
+    partitions: Optional[List[str]],
+    shard_partitions: bool,
+) -> Optional[List[str]]:
+    """Partitions to pass to collect_ltm_objects (None = no sharding/scoping)."""
+    if partitions is not None:
+        missing = [p for p in partitions if p not in device_info["partitions"]]
+        if device_info["partitions"] and missing:
+            print(
+                f"[WARN] Partitions not found on {device_info['hostname']}: "
+                f"{', '.join(missing)}",
+                file=sys.stderr,
+            )
+        device_info["collected_partitions"] = partitions
+        return partitions
+    if shard_partitions and device_info["partitions"]:
+        return device_info["partitions"]
+    return None
+
+
+def collect_config(
+    client: F5Client,
+    device_info: Dict[str, Any],
+    partitions: Optional[List[str]] = None,
+    shard_partitions: bool = False,
+    irule_source: bool = True,
+    backend: str = "rest",
+    modules: Optional[List[str]] = None,
+    done_sections: Optional[Dict[str, Dict[str, Any]]] = None,
+    on_section: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Collect the device configuration (ltm_data) once device_info is known.
+
+    partitions:       only collect these partitions (tenant-scoped as-built)
+    shard_partitions: fetch each collection per partition, for all partitions
+    irule_source:     include iRule bodies and the references found in them
+    backend:          'rest' (granular collections) or 'tmsh' (one bulk call)
+    modules:          registered collector modules to add (net, gtm, apm, asm);
+                      their sections go to ltm_data['extra']
+    done_sections / on_section:
+                      section checkpoints (see collect_ltm_objects); the
+                      module sections count as one section, 'extra'. The
+                      tmsh backend collects in one call and does not use them.
+    """
+    partitions = scope_partitions(device_info, partitions, shard_partitions)
+    if backend == "rest":
+        ltm_data = collect_ltm_objects(
+            client,
+            partitions=partitions,
+            irule_source=irule_source,
+            done_sections=done_sections,
+            on_section=on_section,
+        )
+    else:
+        collect_ltm = BACKENDS[backend][1]
+        ltm_data = collect_ltm(client, partitions=partitions, irule_source=irule_source)
+    if modules:
+        if done_sections and "extra" in done_sections:
+            ltm_data["extra"] = done_sections["extra"]["extra"]
+        else:
+            extra, incomplete = collect_modules(client, modules, partitions)
+            ltm_data["extra"] = extra
+            ltm_data["incomplete"] = ltm_data.get("incomplete", []) + incomplete
+            if on_section and not incomplete:
+                on_section("extra", {"extra": extra})
+    return ltm_data
+
+
+def collect_asbuilt(
+    client: F5Client, **collect_opts: Any
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Collect everything for one device (see collect_config for the options).
+    Errors propagate to the caller.
+    """
+    device_info = BACKENDS[collect_opts.get("backend", "rest")][0](client)
+    ltm_data = collect_config(client, device_info, **collect_opts)
+    ltm_data = mark_device_info_incomplete(device_info, ltm_data)
+    usage_maps = build_usage_maps(ltm_data)
+    return device_info, ltm_data, usage_maps
+
+
 def gather_asbuilt(
-    device: Dict[str, Any], username: str, password: str, verify_ssl: bool
+    device: Dict[str, Any],
+    username: str,
+    password: str,
+    verify_ssl: bool,
+    collect_opts: Optional[Dict[str, Any]] = None,
+    client_opts: Optional[Dict[str, Any]] = None,
 ) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
     host = device.get("host")
     if not host:
@@ -638,24 +3392,60 @@ def gather_asbuilt(
         )
         sys.exit(1)
 
-    client = F5Client(
-        host=host, username=username, password=password, verify_ssl=verify_ssl
-    )
+    try:
+        client = make_client(
+            device, username, password, verify_ssl, **(client_opts or {})
+        )
+    except ValueError as e:
+        emit("error", device=device.get("name"), message=str(e))
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
 
+    emit("device_started", device=device.get("name"), host=host)
     try:
-        device_info = collect_device_info(client)
-        ltm_data = collect_ltm_objects(client)
-        usage_maps = build_usage_maps(ltm_data)
+        device_info, ltm_data, usage_maps = collect_asbuilt(
+            client, **device_collect_opts(device, collect_opts)
+        )
     except requests.HTTPError as e:
+        emit("error", device=device.get("name"), message=f"HTTP error: {e}")
         print(f"[ERROR] HTTP error from F5 {host}: {e}", file=sys.stderr)
         sys.exit(1)
     except Exception as e:
+        emit("error", device=device.get("name"), message=str(e))
         print(f"[ERROR] Unexpected error from F5 {host}: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        remember_concurrency_limit(client)
 
     return device_info, ltm_data, usage_maps
 
 
+# ltm_data section name -> top-level JSON key, where they differ
+JSON_SECTION_KEYS = {"virtuals": "virtual_servers", "certs": "certificates"}
+
+
+def build_json_payload(
+    device_info: Dict[str, Any], ltm_data: Dict[str, Any], usage_maps: Dict[str, Any]
+) -> Dict[str, Any]:
+    """The JSON export document (consumed by f5_asbuilt_xls.py)."""
+    return {
+        "device_report": device_info,  # 0
+        "virtual_servers": ltm_data["virtuals"],  # 1
+        "pools": ltm_data["pools"],  # 2
+        "nodes": ltm_data["nodes"],  # 3
+        "monitors": ltm_data["monitors"],  # 4 (part 1)
+        "irules": ltm_data["irules"],  # 4 (part 2)
+        "irule_sources": ltm_data.get("irule_sources", {}),  # sha256 -> body
+        "ssl_profiles": ltm_data["ssl_profiles"],  # 5 (profiles)
+        "certificates": ltm_data["certs"],  # 5 (certs)
+        "usage": usage_maps,  # cross-refs
+        "extra_sections": ltm_data.get("extra", {}),  # registered collectors
+        "incomplete_sections": [
+            JSON_SECTION_KEYS.get(name, name) for name in ltm_data.get("incomplete", [])
+        ],
+    }
+
+
 def write_output(
     device: Dict[str, Any],
     device_info: Dict[str, Any],
@@ -664,10 +3454,23 @@ def write_output(
     output_file: str,
     output_format: str,
     custom_path: bool,
-) -> None:
+    index_path: Optional[str] = None,
+    split_markdown: bool = False,
+    render_jobs: int = 1,
+    compression: Optional[str] = None,
+) -> str:
     """
-    Writes output to Markdown or JSON and stores files in format-specific folders,
+    Writes output to Markdown, JSON or HTML (the page plus its <name>_data/
+    section scripts) and stores files in format-specific folders,
     unless a custom -f path was explicitly provided by the user.
+    With split_markdown, the Markdown goes to a directory named after the
+    output file, one file per section and partition (see
+    write_markdown_shards); the path returned is then its index.md.
+    Markdown and JSON files are streamed through gzip or zstd when the
+    file name ends in .gz or .zst, or when 'compression' is given (which
+    appends that suffix); see f5_asbuilt_io.py.
+    With index_path, the device is also (re)indexed in that query index
+    (see f5_asbuilt_query.py). Returns the path written.
     """
     # Ensure default folder if user did NOT supply -f
     # (We know this because custom_path will be False when the filename is auto-generated)
@@ -676,46 +3479,730 @@ def write_output(
             out_dir = "markdown"
         elif output_format == "json":
             out_dir = "json"
+        elif output_format == "html":
+            out_dir = "html"
         else:
             out_dir = "."  # fallback just in case
 
         os.makedirs(out_dir, exist_ok=True)
         output_file = os.path.join(out_dir, output_file)
+    if output_format in ("md", "json") and not split_markdown:
+        output_file = f5_asbuilt_io.with_compression(output_file, compression)
+    payload: Optional[Dict[str, Any]] = None
 
-    if output_format == "md":
-        content = render_markdown(device_info, ltm_data, usage_maps)
-        with open(output_file, "w", encoding="utf-8") as f:
+    if output_format == "md" and split_markdown:
+        output_file, written, skipped = write_markdown_shards(
+            os.path.splitext(output_file)[0],
+            device_info,
+            ltm_data,
+            usage_maps,
+            render_jobs,
+            device.get("name"),
+        )
+        print(
+            f"Wrote Markdown as-built for {device.get('name')} to: {output_file} "
+            f"({written} section files rendered, {skipped} unchanged)"
+        )
+
+    elif output_format == "md":
+        content = render_markdown(device_info, ltm_data, usage_maps, device.get("name"))
+        with f5_asbuilt_io.open_snapshot(output_file, "w") as f:
             f.write(content)
         print(f"Wrote Markdown as-built for {device.get('name')} to: {output_file}")
 
+    elif output_format == "html":
+        f5_asbuilt_html.write_html(output_file, device_info, ltm_data, usage_maps)
+        print(f"Wrote HTML as-built for {device.get('name')} to: {output_file}")
+
     else:  # json
-        payload = {
-            "device_report": device_info,  # 0
-            "virtual_servers": ltm_data["virtuals"],  # 1
-            "pools": ltm_data["pools"],  # 2
-            "nodes": ltm_data["nodes"],  # 3
-            "monitors": ltm_data["monitors"],  # 4 (part 1)
-            "irules": ltm_data["irules"],  # 4 (part 2)
-            "ssl_profiles": ltm_data["ssl_profiles"],  # 5 (profiles)
-            "certificates": ltm_data["certs"],  # 5 (certs)
-            "usage": usage_maps,  # cross-refs
-        }
-        with open(output_file, "w", encoding="utf-8") as f:
+        payload = build_json_payload(device_info, ltm_data, usage_maps)
+        with f5_asbuilt_io.open_snapshot(output_file, "w") as f:
             json.dump(payload, f, indent=2)
         print(f"Wrote JSON as-built for {device.get('name')} to: {output_file}")
 
+    if index_path:
+        if payload is None:
+            payload = build_json_payload(device_info, ltm_data, usage_maps)
+        update_index(index_path, device, payload)
+    emit(
+        "file_written",
+        device=device.get("name"),
+        format=output_format,
+        path=output_file,
+        bytes=os.path.getsize(output_file),
+        complete=not ltm_data.get("incomplete"),
+    )
+    return output_file
+
+
+# One writer at a time; fleet runs write outputs from several threads
+_INDEX_LOCK = threading.Lock()
+
+
+def update_index(
+    index_path: str, device: Dict[str, Any], payload: Dict[str, Any]
+) -> None:
+    """
+    Replace the device's rows in the SQLite query index with its JSON
+    payload (see build_json_payload).
+    """
+    try:
+        with _INDEX_LOCK:
+            conn = f5_asbuilt_query.open_index(index_path)
+            try:
+                f5_asbuilt_query.index_payload(conn, device.get("name") or "", payload)
+            finally:
+                conn.close()
+    except Exception as e:
+        print(
+            f"[WARN] Could not index {device.get('name')} in {index_path}: {e}",
+            file=sys.stderr,
+        )
+
+
+# =============================================================================
+# Fleet polling scheduler
+# =============================================================================
+
+
+class RefreshScheduler:
+    """
+    Adaptive poll scheduler for a fleet of devices.
+
+    Each device gets its own poll interval between min_interval and
+    max_interval: it halves when the device's config generation changed since
+    the last poll and grows by 50% when it did not, so busy boxes are polled
+    often and idle ones rarely. Failed polls back off exponentially. Every
+    interval is jittered to avoid synchronized polls, due devices are started
+    stalest-first and at most `concurrency` polls run at the same time.
+    """
+
+    def __init__(
+        self,
+        devices: List[Dict[str, Any]],
+        poll_fn: Any,
+        min_interval: float = 300.0,
+        max_interval: float = 86400.0,
+        concurrency: int = 4,
+        jitter: float = 0.1,
+    ):
+        self.devices = {d["name"]: d for d in devices}
+        self.poll_fn = poll_fn
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.concurrency = max(1, concurrency)
+        self.jitter = jitter
+
+        now = time.monotonic()
+        self.state: Dict[str, Dict[str, Any]] = {}
+        for name in self.devices:
+            self.state[name] = {
+                "generation": None,
+                "interval": min_interval,
+                # Spread the first round over a fraction of the interval
+                "next_due": now + random.uniform(0, min_interval * jitter),
+                "last_success": None,
+                "changes": 0,
+                "polls": 0,
+                "failures": 0,
+            }
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def due_devices(self, now: float) -> List[str]:
+        """Devices whose poll is due, stalest (or never polled) first."""
+        due = [n for n, st in self.state.items() if st["next_due"] <= now]
+        return sorted(
+            due,
+            key=lambda n: (
+                self.state[n]["last_success"] is not None,
+                self.state[n]["last_success"] or 0.0,
+            ),
+        )
+
+    def record_success(self, name: str, generation: str, changed: bool) -> bool:
+        """
+        Record a successful poll. The first one only sets the baseline
+        generation and does not count as a change. Returns whether it did.
+        """
+        st = self.state[name]
+        now = time.monotonic()
+        changed = changed and st["generation"] is not None
+        st["polls"] += 1
+        st["failures"] = 0
+        st["last_success"] = now
+        st["generation"] = generation
+        if changed:
+            st["changes"] += 1
+            st["interval"] = max(self.min_interval, st["interval"] / 2)
+        else:
+            st["interval"] = min(self.max_interval, st["interval"] * 1.5)
+        st["next_due"] = now + self._jittered(st["interval"])
+        return changed
+
+    def record_failure(self, name: str) -> None:
+        st = self.state[name]
+        st["failures"] += 1
+        backoff = min(self.max_interval, self.min_interval * 2 ** st["failures"])
+        st["next_due"] = time.monotonic() + self._jittered(backoff)
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        """
+        Poll until interrupted (or until max_polls polls have completed).
+        On KeyboardInterrupt, polls not started yet are cancelled and the
+        interrupt is re-raised without waiting for the running ones.
+        """
+        completed = 0
+        in_flight: Dict[Any, str] = {}
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            while max_polls is None or completed < max_polls:
+                now = time.monotonic()
+                busy = set(in_flight.values())
+                for name in self.due_devices(now):
+                    if len(in_flight) >= self.concurrency:
+                        break
+                    if name in busy:
+                        continue
+                    fut = pool.submit(
+                        self.poll_fn, self.devices[name], self.state[name]["generation"]
+                    )
+                    in_flight[fut] = name
+
+                if len(in_flight) >= self.concurrency:
+                    # No free slot: nothing can start before a poll finishes
+                    timeout = None
+                else:
+                    # Due devices were all started; wait for the next one to be
+                    busy = set(in_flight.values())
+                    upcoming = [
+                        st["next_due"]
+                        for n, st in self.state.items()
+                        if n not in busy and st["next_due"] > now
+                    ]
+                    timeout = min(upcoming, default=now + 1.0) - now
+                if not in_flight:
+                    time.sleep(timeout)
+                    continue
+
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = in_flight.pop(fut)
+                    completed += 1
+                    try:
+                        generation, changed = fut.result()
+                    except Exception as e:
+                        self.record_failure(name)
+                        emit("error", device=name, message=str(e))
+                        print(f"[ERROR] Poll of {name} failed: {e}", file=sys.stderr)
+                        continue
+                    baseline = self.state[name]["generation"] is None
+                    changed = self.record_success(name, generation, changed)
+                    st = self.state[name]
+                    status = (
+                        "baseline"
+                        if baseline
+                        else "changed" if changed else "unchanged"
+                    )
+                    print(
+                        f"[POLL] {name}: {status}, "
+                        f"next poll in {st['next_due'] - time.monotonic():.0f}s"
+                    )
+        except KeyboardInterrupt:
+            for fut in in_flight:
+                fut.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+
+def default_output_file(device: Dict[str, Any], output_format: str) -> str:
+    safe_name = device.get("name", "f5").replace(" ", "_")
+    ext = output_format if output_format in ("json", "html") else "md"
+    return f"f5_{safe_name}_asbuilt.{ext}"
+
+
+def poll_device(
+    device: Dict[str, Any],
+    known_generation: Optional[str],
+    username: str,
+    password: str,
+    verify_ssl: bool,
+    output_format: str,
+    collect_opts: Optional[Dict[str, Any]] = None,
+    client_opts: Optional[Dict[str, Any]] = None,
+    index_path: Optional[str] = None,
+    write_opts: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, bool]:
+    """
+    Probe a device's config generation and re-run the as-built only when it
+    differs from known_generation. Returns (generation, changed).
+    write_opts are extra keyword arguments for write_output().
+    """
+    opts = device_collect_opts(device, collect_opts)
+    client = make_client(device, username, password, verify_ssl, **(client_opts or {}))
+    try:
+        generation = probe_config_generation(client, opts["modules"])
+        if generation == known_generation:
+            return generation, False
+
+        emit("device_started", device=device.get("name"), host=device.get("host"))
+        device_info, ltm_data, usage_maps = collect_asbuilt(client, **opts)
+    finally:
+        remember_concurrency_limit(client)
+    write_output(
+        device,
+        device_info,
+        ltm_data,
+        usage_maps,
+        default_output_file(device, output_format),
+        output_format,
+        False,
+        index_path,
+        **(write_opts or {}),
+    )
+    if ltm_data["incomplete"]:
+        # Never matches a real generation, so the next poll collects again
+        generation += "/incomplete"
+    return generation, True
+
+
+# =============================================================================
+# Fleet checkpoints (resume interrupted fleet runs)
+# =============================================================================
+
+
+class FleetCheckpoint:
+    """
+    On-disk progress of a fleet run, so an interrupted run can be resumed.
+
+    Stored in .f5_asbuilt_state/fleet-<fingerprint>/: 'done.json' lists the
+    devices whose as-built was written, and with section checkpoints
+    'sections/<device>.json' holds the LTM sections already collected from
+    a device. The fingerprint covers the selected devices' inventory entries
+    and the collection options, so changing either starts a new checkpoint.
+    """
+
+    def __init__(
+        self,
+        devices: List[Dict[str, Any]],
+        options: Dict[str, Any],
+        resume: bool = False,
+        sections: bool = False,
+    ):
+        entries = [
+            {k: v for k, v in dev.items() if not k.startswith("_")} for dev in devices
+        ]
+        blob = json.dumps(
+            {"devices": entries, "options": options}, sort_keys=True, default=str
+        )
+        self.fingerprint = hashlib.sha1(blob.encode()).hexdigest()[:16]
+        self.path = os.path.join(STATE_DIR, f"fleet-{self.fingerprint}")
+        self.sections = sections
+        self._lock = threading.Lock()
+        self.done: Dict[str, Dict[str, Any]] = {}
+
+        if not resume:
+            shutil.rmtree(self.path, ignore_errors=True)
+            return
+        if not os.path.isdir(self.path):
+            print(
+                "[INFO] No checkpoint for this device selection and options "
+                "(none yet, or the inventory/options changed); starting fresh.",
+                file=sys.stderr,
+            )
+            return
+        try:
+            with open(os.path.join(self.path, "done.json"), encoding="utf-8") as f:
+                done = json.load(f)
+        except FileNotFoundError:
+            return  # only section checkpoints so far
+        except ValueError as e:
+            print(f"[WARN] Ignoring unreadable checkpoint: {e}", file=sys.stderr)
+            return
+        if not isinstance(done, dict):
+            print("[WARN] Ignoring malformed checkpoint", file=sys.stderr)
+            return
+        # Entries without an output path (hand-edited, older format) are redone
+        self.done = {
+            name: entry
+            for name, entry in done.items()
+            if isinstance(entry, dict) and isinstance(entry.get("output"), str)
+        }
+
+    def _section_path(self, name: str) -> str:
+        safe = re.sub(r"[^\w.-]", "_", name)
+        return os.path.join(self.path, "sections", f"{safe}.json")
+
+    def is_done(self, name: str) -> bool:
+        """Finished in an earlier run, and its output is still there."""
+        entry = self.done.get(name)
+        return bool(entry) and os.path.exists(entry["output"])
+
+    def mark_done(self, name: str, output: str) -> None:
+        with self._lock:
+            self.done[name] = {"output": output, "finished": time.time()}
+            _write_atomic(
+                os.path.join(self.path, "done.json"), json.dumps(self.done, indent=2)
+            )
+        # The device's section checkpoint is no longer needed
+        try:
+            os.remove(self._section_path(name))
+        except OSError:
+            pass
+
+    def load_sections(self, name: str) -> Dict[str, Dict[str, Any]]:
+        if not self.sections:
+            return {}
+        try:
+            with open(self._section_path(name), encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(saved, dict):
+            return {}
+        return {k: v for k, v in saved.items() if isinstance(v, dict)}
+
+    def section_saver(
+        self, name: str
+    ) -> Optional[Callable[[str, Dict[str, Any]], None]]:
+        """on_section callback recording a device's completed sections."""
+        if not self.sections:
+            return None
+        saved = self.load_sections(name)
+
+        def save(section: str, data: Dict[str, Any]) -> None:
+            saved[section] = data
+            _write_atomic(self._section_path(name), json.dumps(saved))
+
+        return save
+
+    def finish(self, devices: List[Dict[str, Any]]) -> None:
+        """Drop the checkpoint once every device is done."""
+        if all(self.is_done(d.get("name") or "") for d in devices):
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+def sync_group_key(device_info: Dict[str, Any]) -> Optional[Tuple[str, ...]]:
+    """
+    Devices with the same key share identical config. None when the device
+    is not part of an in-sync config-sync group.
+    """
+    group = device_info.get("sync_group")
+    if not group or group == "unknown" or device_info.get("sync_status") != "In Sync":
+        return None
+    # The trust domain disambiguates identically named groups of different clusters
+    return (group, *device_info.get("trust_devices", []))
+
+
+def run_fleet(
+    devices: List[Dict[str, Any]],
+    username: str,
+    password: str,
+    verify_ssl: bool,
+    output_format: str,
+    concurrency: int,
+    collect_opts: Optional[Dict[str, Any]] = None,
+    sync_dedup: bool = True,
+    client_opts: Optional[Dict[str, Any]] = None,
+    checkpoint: Optional[FleetCheckpoint] = None,
+    index_path: Optional[str] = None,
+    write_opts: Optional[Dict[str, Any]] = None,
+) -> int:
+    """
+    Collect and write the as-built of every device. Returns the failure count.
+
+    With sync_dedup, members of the same in-sync config-sync group share one
+    config collection taken from a single healthy member; the others only
+    contribute their own device info and node/pool member state.
+
+    With a checkpoint, devices finished by an earlier run are skipped and
+    every device is recorded as soon as its complete as-built is written.
+    write_opts are extra keyword arguments for write_output().
+    """
+    failures = 0
+    if checkpoint is not None:
+        pending = [d for d in devices if not checkpoint.is_done(d.get("name") or "")]
+        if len(pending) < len(devices):
+            print(
+                f"[INFO] Resuming: {len(devices) - len(pending)} of {len(devices)} "
+                "devices already done.",
+                file=sys.stderr,
+            )
+        all_devices, devices = devices, pending
+
+    def report(device: Dict[str, Any], e: Exception) -> None:
+        emit("error", device=device.get("name"), message=str(e))
+        print(f"[ERROR] As-built for {device.get('name')} failed: {e}", file=sys.stderr)
+
+    def probe(device: Dict[str, Any]) -> Tuple[F5Client, Dict[str, Any]]:
+        client = make_client(
+            device, username, password, verify_ssl, **(client_opts or {})
+        )
+        emit("device_started", device=device.get("name"), host=device.get("host"))
+        opts = device_collect_opts(device, collect_opts)
+        return client, BACKENDS[opts["backend"]][0](client)
+
+    def write(
+        device: Dict[str, Any], device_info: Dict[str, Any], ltm_data: Dict[str, Any]
+    ) -> None:
+        ltm_data = mark_device_info_incomplete(device_info, ltm_data)
+        output = write_output(
+            device,
+            device_info,
+            ltm_data,
+            build_usage_maps(ltm_data),
+            default_output_file(device, output_format),
+            output_format,
+            False,
+            index_path,
+            **(write_opts or {}),
+        )
+        # Partial as-builts are collected again on resume
+        if checkpoint is not None and not ltm_data.get("incomplete"):
+            checkpoint.mark_done(device.get("name") or "", output)
+
+    def run_group(
+        members: List[Tuple[Dict[str, Any], F5Client, Dict[str, Any]]],
+    ) -> int:
+        try:
+            return collect_group(members)
+        finally:
+            for _, client, _ in members:
+                remember_concurrency_limit(client)
+
+    def collect_group(
+        members: List[Tuple[Dict[str, Any], F5Client, Dict[str, Any]]],
+    ) -> int:
+        """Collect and write one sync group; returns its failure count."""
+        # Take the shared config from a standby member when there is one, to
+        # keep the extra management-plane load off the active unit.
+        # Each member's time budget starts when its own collection does, not
+        # while it is queued or waiting for the shared config.
+        shared: Optional[Dict[str, Any]] = None
+        leader: Optional[Dict[str, Any]] = None
+        for device, client, info in sorted(
+            members, key=lambda m: m[2].get("ha_status") == "active"
+        ):
+            try:
+                resume_opts: Dict[str, Any] = {}
+                if checkpoint is not None:
+                    name = device.get("name") or ""
+                    resume_opts = {
+                        "done_sections": checkpoint.load_sections(name),
+                        "on_section": checkpoint.section_saver(name),
+                    }
+                client.start_budget()
+                shared = collect_config(
+                    client,
+                    info,
+                    **device_collect_opts(device, collect_opts),
+                    **resume_opts,
+                )
+                leader = device
+                break
+            except Exception as e:
+                if len(members) == 1:
+                    report(device, e)
+                    return 1
+                print(
+                    f"[WARN] Config collection from {device.get('name')} failed, "
+                    f"trying another sync group member: {e}",
+                    file=sys.stderr,
+                )
+        if shared is None or leader is None:
+            for device, _, _ in members:
+                report(device, RuntimeError("no sync group member could be collected"))
+            return len(members)
+
+        failed = 0
+        for device, client, info in members:
+            try:
+                if device is leader:
+                    write(device, info, shared)
+                    continue
+                opts = collect_opts or {}
+                partitions = scope_partitions(
+                    info, opts.get("partitions"), opts.get("shard_partitions", False)
+                )
+                client.start_budget()
+                state = collect_device_state(
+                    client,
+                    partitions,
+                    device_collect_opts(device, collect_opts)["modules"],
+                )
+                info["config_source"] = leader.get("name")
+                write(device, info, apply_device_state(shared, state))
+            except Exception as e:
+                failed += 1
+                report(device, e)
+        return failed
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        probed: List[Tuple[Dict[str, Any], F5Client, Dict[str, Any]]] = []
+        futures = {pool.submit(probe, dev): dev for dev in devices}
+        for fut in futures:
+            try:
+                client, info = fut.result()
+            except Exception as e:
+                failures += 1
+                report(futures[fut], e)
+                continue
+            probed.append((futures[fut], client, info))
+
+        groups: Dict[Any, List[Tuple[Dict[str, Any], F5Client, Dict[str, Any]]]] = {}
+        for pos, member in enumerate(probed):
+            key = sync_group_key(member[2]) if sync_dedup else None
+            groups.setdefault(key if key is not None else pos, []).append(member)
+        # Counted here from the results, not from the worker threads
+        failures += sum(pool.map(run_group, groups.values()))
+
+    if checkpoint is not None:
+        checkpoint.finish(all_devices)
+    return failures
+
 
 def main() -> None:
     args = parse_args()
-    inventory = load_inventory(args.inventory)
+    if args.events:
+        try:
+            open_event_stream(args.events)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] --events {args.events}: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.events == "-":
+            # stdout carries the events only; reports and [POLL] lines move
+            sys.stdout = sys.stderr
+    inventory = load_inventory(args.inventory, use_cache=not args.no_inventory_cache)
+
+    selected: Optional[List[Dict[str, Any]]] = None
+    if args.select:
+        try:
+            selected = select_devices(inventory, args.select)
+        except (ValueError, re.error) as e:
+            print(f"[ERROR] Invalid --select expression: {e}", file=sys.stderr)
+            sys.exit(1)
+        if not selected:
+            print(f"[ERROR] No devices match '{args.select}'.", file=sys.stderr)
+            sys.exit(1)
 
     if args.list:
-        list_devices(inventory)
+        list_devices(inventory, selected)
+        return
+
+    collect_opts = collect_options_from_args(args)
+    client_opts = {
+        "request_timeout": args.timeout,
+        "budget": args.budget,
+        "adaptive": not args.fixed_concurrency,
+    }
+    if args.split_markdown and args.format != "md":
+        print("[ERROR] --split-markdown needs --format md.", file=sys.stderr)
+        sys.exit(1)
+    compression = args.compress or (
+        f5_asbuilt_io.compression_for(args.file) if args.file else None
+    )
+    if compression and (args.format == "html" or args.split_markdown):
+        print(
+            "[ERROR] Compressed output is only supported for single-file "
+            "md/json output.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    try:
+        f5_asbuilt_io.check_compression(compression)
+    except RuntimeError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    write_opts = {
+        "split_markdown": args.split_markdown,
+        "render_jobs": max(1, args.render_jobs),
+        "compression": compression,
+    }
+
+    if args.poll:
+        if args.file:
+            print("[ERROR] -f cannot be combined with --poll.", file=sys.stderr)
+            sys.exit(1)
+        if args.device:
+            devices = [get_device_by_name(inventory, args.device)]
+        else:
+            devices = selected if selected is not None else inventory["devices"]
+        username, password, verify_ssl = ensure_credentials_from_env()
+
+        def poll_fn(device: Dict[str, Any], known: Optional[str]) -> Tuple[str, bool]:
+            return poll_device(
+                device,
+                known,
+                username,
+                password,
+                verify_ssl,
+                args.format,
+                collect_opts,
+                client_opts,
+                args.index,
+                write_opts,
+            )
+
+        scheduler = RefreshScheduler(
+            devices,
+            poll_fn,
+            min_interval=args.poll_min,
+            max_interval=args.poll_max,
+            concurrency=args.concurrency,
+            jitter=args.jitter,
+        )
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            print("Polling stopped.")
+        return
+
+    if (args.resume or args.checkpoint_sections) and selected is None:
+        print("[ERROR] --resume/--checkpoint-sections need --select.", file=sys.stderr)
+        sys.exit(1)
+
+    if selected is not None:
+        if args.file:
+            print("[ERROR] -f cannot be combined with --select.", file=sys.stderr)
+            sys.exit(1)
+        username, password, verify_ssl = ensure_credentials_from_env()
+        checkpoint = FleetCheckpoint(
+            selected,
+            {
+                "collect": collect_opts,
+                "format": args.format,
+                "split_markdown": args.split_markdown,
+                "compression": compression,
+                "sync_dedup": not args.no_sync_dedup,
+            },
+            resume=args.resume,
+            sections=args.checkpoint_sections,
+        )
+        failures = run_fleet(
+            selected,
+            username,
+            password,
+            verify_ssl,
+            args.format,
+            args.concurrency,
+            collect_opts,
+            sync_dedup=not args.no_sync_dedup,
+            client_opts=client_opts,
+            checkpoint=checkpoint,
+            index_path=args.index,
+            write_opts=write_opts,
+        )
+        emit("run_finished", devices=len(selected), failures=failures)
+        if failures:
+            sys.exit(1)
         return
 
     if not args.device:
         print(
-            "[ERROR] You must specify a device with -d <name> or use -l to list devices.",
+            "[ERROR] You must specify a device with -d <name> (or devices with "
+            "--select) or use -l to list devices.",
             file=sys.stderr,
         )
         sys.exit(1)
@@ -727,12 +4214,10 @@ def main() -> None:
     if args.file:
         output_file = args.file
     else:
-        safe_name = device.get("name", "f5").replace(" ", "_")
-        ext = "json" if args.format == "json" else "md"
-        output_file = f"f5_{safe_name}_asbuilt.{ext}"
+        output_file = default_output_file(device, args.format)
 
     device_info, ltm_data, usage_maps = gather_asbuilt(
-        device, username, password, verify_ssl
+        device, username, password, verify_ssl, collect_opts, client_opts
     )
     write_output(
         device,
@@ -742,7 +4227,10 @@ def main() -> None:
         output_file,
         args.format,
         args.file is not None,  # True if user provided -f
+        args.index,
+        **write_opts,
     )
+    emit("run_finished", devices=1, failures=0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Address index over F5 As-Built JSON: find VIPs, pool members and nodes by
+subnet or address range, per device or across the whole fleet.
+
+Input is one or more JSON files from f5_asbuilt.py --format json (or a
+directory such as json/); gzip/zstd-compressed exports (.json.gz,
+.json.zst) are read as well. Every address is parsed once into a compact
+key
+
+    (route_domain, ip_version, integer_address)
+
+and the keys are kept in one sorted list, so a prefix or range query is two
+binary searches instead of a scan over every object of every device.
+Route domains are kept: '10.1.1.10%3' is a different address than
+'10.1.1.10'. Objects without a '%<id>' are in the default route domain of
+their partition (device_report.default_route_domains in the JSON), or in
+route domain 0 for JSON written before it was recorded.
+
+Examples:
+
+    python f5_asbuilt_addr.py json/ --prefix 10.20.0.0/16 --rd 3
+    python f5_asbuilt_addr.py json/ --prefix 10.20.30.0/24 --kind member
+    python f5_asbuilt_addr.py json/f5_FLL2BLBI07V_asbuilt.json \\
+        --range 10.1.1.1-10.1.1.50 --format json -o matches.json
+
+The parsed fleet index is cached under ~/.cache/f5_asbuilt/addr/
+($XDG_CACHE_HOME), keyed on the input files' mtime and size, so repeated
+queries skip JSON parsing.
+"""
+
+import argparse
+import hashlib
+import ipaddress
+import json
+import os
+import pickle
+import sys
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import f5_asbuilt_io
+
+CACHE_DIR = f5_asbuilt_io.cache_dir("addr")
+
+# Bump when the index keys or records change, so cached indexes built by an
+# older version are rebuilt instead of used
+INDEX_CACHE_FORMAT = 1
+
+KINDS = ("vip", "member", "node")
+
+# (route_domain, ip_version, integer_address)
+AddrKey = Tuple[int, int, int]
+
+
+# ----------------------------------------------------------------------
+# Address parsing
+# ----------------------------------------------------------------------
+
+
+def parse_address(
+    address: Optional[str], route_domain: Optional[int] = None
+) -> Optional[AddrKey]:
+    """
+    '10.1.1.10%3' / '2001:db8::10%3' -> (3, version, int). 'route_domain'
+    (the object's own, or its partition's default route domain) is used
+    when the address itself carries none, and 0 when neither is known.
+    Returns None for anything that is not an IP address (e.g. FQDN nodes).
+    """
+    if not address:
+        return None
+    ip, sep, rd = address.partition("%")
+    if sep and rd.isdigit():
+        route_domain = int(rd)
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    return (route_domain or 0, addr.version, int(addr))
+
+
+def parse_query(
+    prefix: Optional[str], addr_range: Optional[str]
+) -> Tuple[int, int, int]:
+    """--prefix CIDR or --range A-B -> (ip_version, low, high), inclusive."""
+    if prefix:
+        net = ipaddress.ip_network(prefix, strict=False)
+        return (
+            net.version,
+            int(net.network_address),
+            int(net.broadcast_address),
+        )
+    first, sep, last = (addr_range or "").partition("-")
+    lo = ipaddress.ip_address(first.strip())
+    hi = ipaddress.ip_address(last.strip()) if sep else lo
+    if lo.version != hi.version:
+        raise ValueError(f"Mixed IPv4/IPv6 range: {addr_range}")
+    if int(lo) > int(hi):
+        lo, hi = hi, lo
+    return lo.version, int(lo), int(hi)
+
+
+def format_key(key: AddrKey) -> str:
+    rd, _, value = key
+    ip = str(ipaddress.ip_address(value))
+    return f"{ip}%{rd}" if rd else ip
+
+
+# ----------------------------------------------------------------------
+# Index
+# ----------------------------------------------------------------------
+
+
+def iter_addresses(
+    device: str, data: Dict[str, Any]
+) -> Iterator[Tuple[AddrKey, Dict[str, Any]]]:
+    """
+    (key, record) for every VIP, pool member and node of one device.
+    Addresses without a '%<id>' get their partition's default route domain.
+    """
+    defaults = (data.get("device_report") or {}).get("default_route_domains") or {}
+    for vs in data.get("virtual_servers", []):
+        rd = vs.get("route_domain")
+        if rd is None:
+            rd = defaults.get(vs.get("partition"))
+        key = parse_address(vs.get("destination_ip"), rd)
+        if key:
+            yield key, {
+                "device": device,
+                "kind": "vip",
+                "name": vs.get("name"),
+                "partition": vs.get("partition"),
+                "pool": vs.get("pool"),
+                "port": vs.get("destination_port"),
+            }
+    for pool in data.get("pools", []):
+        for m in pool.get("members", []):
+            key = parse_address(m.get("address"), defaults.get(pool.get("partition")))
+            if key:
+                name = m.get("name") or ""
+                # 'node:80', '10.1.1.10%3:80' or IPv6 '2001:db8::10.80'
+                port = name.rpartition("." if name.count(":") > 1 else ":")[2]
+                yield key, {
+                    "device": device,
+                    "kind": "member",
+                    "name": name,
+                    "partition": pool.get("partition"),
+                    "pool": pool.get("name"),
+                    "port": port or None,
+                }
+    for node in data.get("nodes", []):
+        key = parse_address(node.get("address"), defaults.get(node.get("partition")))
+        if key:
+            yield key, {
+                "device": device,
+                "kind": "node",
+                "name": node.get("name"),
+                "partition": node.get("partition"),
+                "pool": None,
+                "port": None,
+            }
+
+
+class AddressIndex:
+    """
+    Sorted address keys with a parallel list of records. Point lookups,
+    prefixes and ranges are all [low, high] intervals over the keys.
+    """
+
+    def __init__(self) -> None:
+        self.keys: List[AddrKey] = []
+        self.records: List[Dict[str, Any]] = []
+        self.devices: List[str] = []
+        self.route_domains: List[int] = []
+
+    @classmethod
+    def build(cls, documents: List[Tuple[str, Dict[str, Any]]]) -> "AddressIndex":
+        """documents: (device, as-built JSON) pairs."""
+        pairs: List[Tuple[AddrKey, Dict[str, Any]]] = []
+        index = cls()
+        for device, data in documents:
+            index.devices.append(device)
+            pairs.extend(iter_addresses(device, data))
+        pairs.sort(key=lambda p: p[0])
+        index.keys = [k for k, _ in pairs]
+        index.records = [r for _, r in pairs]
+        index.route_domains = sorted({k[0] for k in index.keys})
+        return index
+
+    def query(
+        self,
+        version: int,
+        low: int,
+        high: int,
+        route_domain: Optional[int] = None,
+        kinds: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Records whose address is in [low, high]; all route domains if None."""
+        rds = self.route_domains if route_domain is None else [route_domain]
+        matches: List[Dict[str, Any]] = []
+        for rd in rds:
+            start = bisect_left(self.keys, (rd, version, low))
+            end = bisect_right(self.keys, (rd, version, high))
+            for pos in range(start, end):
+                rec = self.records[pos]
+                if kinds and rec["kind"] not in kinds:
+                    continue
+                matches.append(
+                    {
+                        **rec,
+                        "address": format_key(self.keys[pos]),
+                        "route_domain": rd,
+                    }
+                )
+        return matches
+
+
+def _cache_path(files: List[str]) -> str:
+    joined = "\n".join(os.path.abspath(f) for f in files)
+    key = hashlib.sha1(joined.encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{key}.pickle")
+
+
+def load_index(files: List[str], use_cache: bool = True) -> AddressIndex:
+    """
+    Build the index for the given JSON files. The index is pickled and
+    reused while none of the files' mtime/size (and INDEX_CACHE_FORMAT)
+    changed.
+    """
+    stamp = (
+        INDEX_CACHE_FORMAT,
+        [(f, os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in files],
+    )
+    cache_path = _cache_path(files)
+    if use_cache and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as cf:
+                cached = pickle.load(cf)
+            if cached.get("stamp") == stamp:
+                return cached["index"]
+        except Exception:
+            pass  # stale or unreadable cache, just rebuild
+
+    documents: List[Tuple[str, Dict[str, Any]]] = []
+    for path in files:
+        try:
+            data = f5_asbuilt_io.load_json(path)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"[WARN] Skipping {path}: {e}", file=sys.stderr)
+            continue
+        documents.append((f5_asbuilt_io.device_label(path, data), data))
+    index = AddressIndex.build(documents)
+
+    if use_cache:
+        try:
+            os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+            with open(cache_path, "wb") as cf:
+                pickle.dump({"stamp": stamp, "index": index}, cf)
+        except OSError as e:
+            print(f"[WARN] Could not write address cache: {e}", file=sys.stderr)
+    return index
+
+
+# ----------------------------------------------------------------------
+# Output
+# ----------------------------------------------------------------------
+
+
+def pool_summary(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pools with at least one matching member, with the member count."""
+    counts: Dict[Tuple[str, str], int] = {}
+    for m in matches:
+        if m["kind"] == "member":
+            key = (m["device"], m["pool"])
+            counts[key] = counts.get(key, 0) + 1
+    return [
+        {"device": d, "pool": p, "members": n} for (d, p), n in sorted(counts.items())
+    ]
+
+
+def render_markdown(
+    query: Dict[str, Any], matches: List[Dict[str, Any]], devices: int
+) -> str:
+    lines: List[str] = []
+    lines.append(f"# Address Query: `{query['query']}`")
+    lines.append("")
+    rd = query["route_domain"]
+    lines.append(f"- **Route Domain:** {'all' if rd is None else rd}")
+    lines.append(f"- **Object Types:** {', '.join(query['kinds'])}")
+    lines.append(f"- **Devices Searched:** {devices}")
+    lines.append(f"- **Matches:** {len(matches)}")
+    lines.append("")
+
+    lines.append("## Matches")
+    lines.append("")
+    if not matches:
+        lines.append("_No matching addresses._")
+        lines.append("")
+    else:
+        lines.append("| Device | Type | Name | Partition | Address | Port | Pool |")
+        lines.append("|--------|------|------|-----------|---------|------|------|")
+        for m in matches:
+            lines.append(
+                f"| `{m['device']}` | {m['kind']} | `{m['name']}` | "
+                f"`{m['partition'] or ''}` | `{m['address']}` | "
+                f"`{m['port'] or ''}` | `{m['pool'] or ''}` |"
+            )
+        lines.append("")
+
+    pools = pool_summary(matches)
+    if pools:
+        lines.append("## Pools With Matching Members")
+        lines.append("")
+        lines.append("| Device | Pool | Matching Members |")
+        lines.append("|--------|------|------------------|")
+        for p in pools:
+            lines.append(f"| `{p['device']}` | `{p['pool']}` | {p['members']} |")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Query VIPs, pool members and nodes by subnet or address range"
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="As-built JSON files and/or directories of them (e.g. json/)",
+    )
+    what = parser.add_mutually_exclusive_group(required=True)
+    what.add_argument("--prefix", help="Subnet, e.g. 10.20.0.0/16 or 2001:db8::/48")
+    what.add_argument(
+        "--range", help="Inclusive address range, e.g. 10.0.0.1-10.0.0.50"
+    )
+    what.add_argument("--address", help="Single address")
+    parser.add_argument(
+        "--rd",
+        type=int,
+        help="Route domain to search (default: all route domains)",
+    )
+    parser.add_argument(
+        "--kind",
+        default=",".join(KINDS),
+        help="Comma-separated object types: vip,member,node (default: all)",
+    )
+    parser.add_argument("--format", choices=["md", "json"], default="md")
+    parser.add_argument("-o", "--output", help="Write results to a file")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the parsed index cache",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    kinds = [k.strip() for k in args.kind.split(",") if k.strip()]
+    unknown = [k for k in kinds if k not in KINDS]
+    if unknown:
+        print(f"[ERROR] Unknown --kind: {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    text = args.prefix or args.range or args.address
+    try:
+        version, low, high = parse_query(args.prefix, args.range or args.address)
+    except ValueError as e:
+        print(f"[ERROR] Invalid query {text!r}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        files = f5_asbuilt_io.list_json_files(args.inputs)
+    except FileNotFoundError as e:
+        print(f"[ERROR] Not found: {e}", file=sys.stderr)
+        sys.exit(1)
+    index = load_index(files, use_cache=not args.no_cache)
+    matches = index.query(version, low, high, args.rd, kinds)
+
+    query = {"query": text, "route_domain": args.rd, "kinds": kinds}
+    if args.format == "json":
+        output = json.dumps(
+            {
+                **query,
+                "devices": index.devices,
+                "matches": matches,
+                "pools": pool_summary(matches),
+            },
+            indent=2,
+        )
+    else:
+        output = render_markdown(query, matches, len(index.devices))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Wrote {len(matches)} matches to: {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
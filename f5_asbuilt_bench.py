@@ -0,0 +1,682 @@
+#!/usr/bin/env python3
+"""
+Synthetic as-built data and renderer benchmarks.
+
+Generates realistic device_info / ltm_data structures (the same shape
+f5_asbuilt.py collects) at a given size and times every offline stage on
+them:
+
+- usage_maps : f5_asbuilt.build_usage_maps
+- tmsh_parse : f5_asbuilt.parse_tmsh_ltm on the same objects as
+  'list ltm ... recursive one-line' output (the tmsh backend's parser)
+- markdown   : f5_asbuilt.render_markdown
+- html       : f5_asbuilt_html.render_html (page and section scripts)
+- json       : f5_asbuilt.build_json_payload + json.dumps(indent=2)
+- xls        : f5_asbuilt_xls.build_workbook (all build_*_sheet functions)
+- json_write, json_write_gz, json_write_zst : json.dump(indent=2) of the
+  payload into a plain, gzip or zstd file (as write_output does)
+- json_read, json_read_gz, json_read_zst   : reading those files back
+  (f5_asbuilt_io.load_json, as the XLS/address/query readers do)
+
+The write stages also report the file size (file_mb), and a summary
+shows how much smaller the compressed snapshots are than plain JSON.
+
+No F5 is needed. Object names and references are skewed the way real
+configs are: a few iRules, monitors and SSL profiles are used by most
+virtual servers, pool sizes follow a long-tailed distribution, and many
+iRules share the same body.
+
+Examples:
+
+    python f5_asbuilt_bench.py --sizes 1k,10k,100k
+    python f5_asbuilt_bench.py --sizes 10k --save-baseline bench_baseline.json
+    python f5_asbuilt_bench.py --sizes 10k --baseline bench_baseline.json
+    python f5_asbuilt_bench.py --sizes 50k --write-json json/   # synthetic export
+    python f5_asbuilt_bench.py --sizes 100k --repeat 1 \\
+        --stages json_write,json_write_gz,json_write_zst,json_read,json_read_gz,json_read_zst
+
+With --baseline the run exits 1 when a stage got slower (or needs more
+memory) than the baseline by more than --tolerance.
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import f5_asbuilt as asb
+import f5_asbuilt_html
+import f5_asbuilt_io
+
+try:
+    import f5_asbuilt_xls as xls
+except ImportError:  # openpyxl not installed
+    xls = None
+
+# ----------------------------------------------------------------------
+# Synthetic data
+# ----------------------------------------------------------------------
+
+# Share of the object count per object type (pool members come on top)
+OBJECT_MIX = {
+    "virtuals": 0.25,
+    "pools": 0.15,
+    "nodes": 0.30,
+    "irules": 0.07,
+    "monitors": 0.03,
+    "ssl_profiles": 0.10,
+    "certs": 0.10,
+}
+
+APPS = (
+    "portal api auth billing search cdn mail vpn crm erp hr intranet pay sso ws "
+    "mobile partner static"
+).split()
+ENVS = ["prod", "prod", "prod", "stage", "qa", "dev"]
+PORTS = [443, 443, 443, 80, 80, 8443, 8080, 25, 53, 3389]
+LB_METHODS = ["round-robin", "round-robin", "least-connections-member", "ratio-member"]
+STATES = ["up", "up", "up", "up", "down", "unchecked"]
+
+
+def parse_size(text: str) -> int:
+    """'1000', '10k', '0.5m' -> object count."""
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def _skewed(rng: random.Random, items: Sequence[Any], skew: float = 3.0) -> Any:
+    """Pick from items with a long tail: low indexes are picked far more often."""
+    return items[min(len(items) - 1, int(len(items) * rng.random() ** skew))]
+
+
+def _irule_body(rng: random.Random, pools: List[str], classes: List[str]) -> str:
+    lines = ["when HTTP_REQUEST {"]
+    for _ in range(rng.randint(1, 6)):
+        lines.append(
+            f"  if {{ [class match [HTTP::host] equals {_skewed(rng, classes)}] }} {{"
+        )
+        lines.append(f"    pool {_skewed(rng, pools)}")
+        lines.append("  }")
+    lines.append("  # default")
+    lines.append(f"  pool {_skewed(rng, pools)}")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_asbuilt(
+    objects: int, seed: int = 0
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(device_info, ltm_data) with roughly 'objects' LTM objects."""
+    rng = random.Random(seed)
+    count = {k: max(3, int(objects * share)) for k, share in OBJECT_MIX.items()}
+
+    # Multi-tenant: Common holds the shared objects, tenants hold apps
+    tenants = [f"Tenant_{i:03d}" for i in range(max(1, objects // 5000))]
+    partitions = ["Common"] + tenants
+
+    def name(kind: str, i: int) -> Tuple[str, str]:
+        app = _skewed(rng, APPS, 1.5)
+        partition = "Common" if rng.random() < 0.4 else _skewed(rng, tenants, 1.5)
+        return f"{app}-{rng.choice(ENVS)}-{kind}{i}", partition
+
+    monitors = []
+    for i in range(count["monitors"]):
+        mtype = asb.MONITOR_TYPES[i % len(asb.MONITOR_TYPES)]
+        n, part = name(f"{mtype}_mon", i)
+        monitors.append(
+            {"name": n, "partition": part, "type": mtype, "fullPath": f"/{part}/{n}"}
+        )
+
+    nodes = []
+    for i in range(count["nodes"]):
+        n, part = name("node", i)
+        nodes.append(
+            {
+                "name": n,
+                "partition": part,
+                "address": f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}",
+                "state": rng.choice(STATES),
+                "session": "user-enabled",
+            }
+        )
+
+    pools = []
+    for i in range(count["pools"]):
+        n, part = name("pool", i)
+        members = []
+        for _ in range(min(64, int(rng.paretovariate(1.2)))):
+            node = rng.choice(nodes)
+            port = rng.choice(PORTS)
+            members.append(
+                {
+                    "name": f"{node['name']}:{port}",
+                    "address": node["address"],
+                    "state": rng.choice(STATES),
+                    "session": "monitor-enabled",
+                }
+            )
+        mon = _skewed(rng, monitors)
+        pools.append(
+            {
+                "name": n,
+                "partition": part,
+                "lb_method": rng.choice(LB_METHODS),
+                "monitor": mon["fullPath"] if rng.random() < 0.9 else None,
+                "members": members,
+            }
+        )
+    pool_names = [p["name"] for p in pools]
+
+    # Many iRules are copies of a few templates: ~1 distinct body per 3 rules
+    classes = [f"{app}_hosts_dg" for app in APPS]
+    bodies = [
+        _irule_body(rng, pool_names, classes)
+        for _ in range(max(1, count["irules"] // 3))
+    ]
+    irule_sources: Dict[str, str] = {}
+    irules = []
+    for i in range(count["irules"]):
+        n, part = name("irule", i)
+        body = _skewed(rng, bodies, 2.0)
+        sha = hashlib.sha256(body.encode()).hexdigest()
+        irule_sources[sha] = body
+        irules.append(
+            {"name": n, "partition": part, "fullPath": f"/{part}/{n}", "sha256": sha}
+        )
+
+    certs = []
+    for i in range(count["certs"]):
+        n, part = name("cert", i)
+        certs.append(
+            {
+                "name": f"{n}.crt",
+                "partition": part,
+                "fullPath": f"/{part}/{n}.crt",
+                "expiration": f"Jan {1 + i % 28:2d} 00:00:00 {2025 + i % 4} GMT",
+            }
+        )
+
+    ssl_profiles = []
+    for i in range(count["ssl_profiles"]):
+        n, part = name("clientssl", i)
+        cert = rng.choice(certs)
+        ssl_profiles.append(
+            {
+                "name": n,
+                "partition": part,
+                "fullPath": f"/{part}/{n}",
+                "cert": cert["fullPath"],
+                "chain": None,
+            }
+        )
+
+    virtuals = []
+    for i in range(count["virtuals"]):
+        n, part = name("vs", i)
+        profiles = ["tcp", "http"]
+        if rng.random() < 0.6:
+            profiles.append(_skewed(rng, ssl_profiles)["name"])
+        virtuals.append(
+            {
+                "name": n,
+                "partition": part,
+                "destination_ip": f"172.{16 + (i >> 16) % 16}.{(i >> 8) & 255}.{i & 255}",
+                "destination_port": str(rng.choice(PORTS)),
+                "route_domain": None,
+                "pool": rng.choice(pool_names) if rng.random() < 0.85 else None,
+                "profiles": profiles,
+                "persistence": ["cookie"] if rng.random() < 0.3 else [],
+                "irules": sorted(
+                    {_skewed(rng, irules)["name"] for _ in range(rng.randint(0, 3))}
+                ),
+            }
+        )
+
+    device_info = {
+        "hostname": f"synthetic-{objects}.example.net",
+        "version": "17.1.1.3",
+        "ha_status": "active",
+        "sync_group": "synthetic-sync",
+        "sync_status": "In Sync",
+        "trust_devices": ["synthetic-a", "synthetic-b"],
+        "partitions": partitions,
+    }
+    ltm_data = {
+        "incomplete": [],
+        "virtuals": virtuals,
+        "pools": pools,
+        "nodes": nodes,
+        "irules": irules,
+        "irule_sources": irule_sources,
+        "monitors": monitors,
+        "ssl_profiles": ssl_profiles,
+        "certs": certs,
+    }
+    return device_info, ltm_data
+
+
+def tmsh_output(ltm_data: Dict[str, Any]) -> str:
+    """
+    The objects of 'ltm_data' as the tmsh backend's TMSH_LTM_COMMANDS print
+    them: one 'one-line' object per line, with nested blocks, quoted
+    descriptions, 'none' values and monitor 'and' lists.
+    """
+    lines: List[str] = []
+    for vs in ltm_data["virtuals"]:
+        part = vs["partition"]
+        profiles = " ".join(f"/Common/{p} {{ context all }}" for p in vs["profiles"])
+        persist = " ".join(f"/Common/{p} {{ default yes }}" for p in vs["persistence"])
+        persist = f"{{ {persist} }}" if persist else "none"
+        pool = f"/{part}/{vs['pool']}" if vs["pool"] else "none"
+        rules = " ".join(f"/{part}/{r}" for r in vs["irules"])
+        lines.append(
+            f"ltm virtual /{part}/{vs['name']} {{ "
+            f'description "{vs["name"]} {{ {part} }}" '
+            f"destination /{part}/{vs['destination_ip']}:{vs['destination_port']} "
+            f"ip-protocol tcp mask 255.255.255.255 "
+            f"persist {persist} pool {pool} profiles {{ {profiles} }} "
+            f"rules {{ {rules} }} source 0.0.0.0/0 translate-address enabled "
+            f"vlans-disabled }}"
+        )
+    for p in ltm_data["pools"]:
+        members = " ".join(
+            f"/{p['partition']}/{m['name']} {{ address {m['address']} "
+            f"session {m['session']} state {m['state']} }}"
+            for m in p["members"]
+        )
+        monitor = p["monitor"] or "none"
+        if p["monitor"] and len(p["members"]) > 4:
+            monitor += " and /Common/gateway_icmp"
+        lines.append(
+            f"ltm pool /{p['partition']}/{p['name']} {{ "
+            f"load-balancing-mode {p['lb_method']} "
+            f"members {{ {members} }} monitor {monitor} }}"
+        )
+    for n in ltm_data["nodes"]:
+        lines.append(
+            f"ltm node /{n['partition']}/{n['name']} {{ address {n['address']} "
+            f"session {n['session']} state {n['state']} }}"
+        )
+    for m in ltm_data["monitors"]:
+        lines.append(
+            f"ltm monitor {m['type']} {m['fullPath']} {{ interval 5 timeout 16 "
+            f'send "GET / HTTP/1.1\\r\\nHost: {m["name"]}\\r\\n\\r\\n" }}'
+        )
+    for sp in ltm_data["ssl_profiles"]:
+        lines.append(
+            f"ltm profile client-ssl {sp['fullPath']} {{ cert {sp['cert']} "
+            f"chain {sp['chain'] or 'none'} }}"
+        )
+    for c in ltm_data["certs"]:
+        lines.append(
+            f"sys crypto cert {c['fullPath']} {{ expiration-date 1893456000 "
+            f'expiration-string "{c["expiration"]}" }}'
+        )
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# Stages
+# ----------------------------------------------------------------------
+
+
+def _stage_usage_maps(ctx: Dict[str, Any]) -> Any:
+    return asb.build_usage_maps(ctx["ltm_data"])
+
+
+def _stage_tmsh_parse(ctx: Dict[str, Any]) -> Any:
+    return asb.parse_tmsh_ltm(ctx["tmsh"])
+
+
+def _stage_markdown(ctx: Dict[str, Any]) -> Any:
+    return asb.render_markdown(ctx["device_info"], ctx["ltm_data"], ctx["usage"])
+
+
+def _stage_html(ctx: Dict[str, Any]) -> Any:
+    return f5_asbuilt_html.render_html(
+        ctx["device_info"], ctx["ltm_data"], ctx["usage"]
+    )
+
+
+def _stage_json(ctx: Dict[str, Any]) -> Any:
+    payload = asb.build_json_payload(ctx["device_info"], ctx["ltm_data"], ctx["usage"])
+    return json.dumps(payload, indent=2)
+
+
+def _stage_xls(ctx: Dict[str, Any]) -> Any:
+    return xls.build_workbook(ctx["payload"])
+
+
+def _snapshot_path(ctx: Dict[str, Any], compression: Optional[str]) -> str:
+    path = os.path.join(ctx["tmp_dir"], "f5_synthetic_asbuilt.json")
+    return f5_asbuilt_io.with_compression(path, compression)
+
+
+def _write_snapshot(ctx: Dict[str, Any], compression: Optional[str]) -> int:
+    path = _snapshot_path(ctx, compression)
+    with f5_asbuilt_io.open_snapshot(path, "w") as f:
+        json.dump(ctx["payload"], f, indent=2)
+    return os.path.getsize(path)
+
+
+def _stage_json_write(compression: Optional[str]) -> Callable[[Dict[str, Any]], Any]:
+    return lambda ctx: _write_snapshot(ctx, compression)
+
+
+def _stage_json_read(compression: Optional[str]) -> Callable[[Dict[str, Any]], Any]:
+    return lambda ctx: f5_asbuilt_io.load_json(_snapshot_path(ctx, compression))
+
+
+# (name, function); every function gets the prepared context. Stages that
+# write a file return its size in bytes, reported as file_mb.
+STAGES: List[Tuple[str, Callable[[Dict[str, Any]], Any]]] = [
+    ("usage_maps", _stage_usage_maps),
+    ("tmsh_parse", _stage_tmsh_parse),
+    ("markdown", _stage_markdown),
+    ("html", _stage_html),
+    ("json", _stage_json),
+    ("xls", _stage_xls),
+    ("json_write", _stage_json_write(None)),
+    ("json_write_gz", _stage_json_write("gzip")),
+    ("json_write_zst", _stage_json_write("zstd")),
+    ("json_read", _stage_json_read(None)),
+    ("json_read_gz", _stage_json_read("gzip")),
+    ("json_read_zst", _stage_json_read("zstd")),
+]
+
+# Compression of the snapshot each json_read* stage reads
+SNAPSHOT_READS = {"json_read": None, "json_read_gz": "gzip", "json_read_zst": "zstd"}
+
+
+def prepare_context(objects: int, seed: int) -> Dict[str, Any]:
+    device_info, ltm_data = generate_asbuilt(objects, seed)
+    usage = asb.build_usage_maps(ltm_data)
+    return {
+        "device_info": device_info,
+        "ltm_data": ltm_data,
+        "usage": usage,
+        "payload": asb.build_json_payload(device_info, ltm_data, usage),
+    }
+
+
+def measure(fn: Callable[[Dict[str, Any]], Any], ctx: Dict[str, Any], repeat: int):
+    """
+    Best wall time over 'repeat' runs, then one traced run for memory:
+    peak_mb is the most memory the stage held at once, retained_mb what its
+    result still holds, retained_blocks the number of memory blocks it
+    still holds (allocated minus freed during the run, so it can be
+    negative when the stage frees more than it keeps).
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn(ctx)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    base, _ = tracemalloc.get_traced_memory()
+    result = fn(ctx)
+    current, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained_blocks = sum(s.count_diff for s in after.compare_to(before, "filename"))
+
+    metrics = {
+        "seconds": round(best, 4),
+        "peak_mb": round((peak - base) / 2**20, 2),
+        "retained_mb": round((current - base) / 2**20, 2),
+        "retained_blocks": retained_blocks,
+    }
+    if type(result) is int:
+        metrics["file_mb"] = round(result / 2**20, 2)
+    return metrics
+
+
+def run_benchmarks(
+    sizes: List[int], stages: List[str], repeat: int, seed: int
+) -> Dict[str, Dict[str, Any]]:
+    """{'<size>/<stage>': metrics}."""
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="f5_asbuilt_bench_") as tmp_dir:
+        for size in sizes:
+            start = time.perf_counter()
+            ctx = prepare_context(size, seed)
+            ctx["tmp_dir"] = tmp_dir
+            print(
+                f"[INFO] Generated {size} objects in {time.perf_counter() - start:.2f}s",
+                file=sys.stderr,
+            )
+            if "tmsh_parse" in stages:
+                ctx["tmsh"] = tmsh_output(ctx["ltm_data"])
+            # The read stages need their snapshot even without its write stage
+            for name, compression in SNAPSHOT_READS.items():
+                if name in stages:
+                    _write_snapshot(ctx, compression)
+            for name, fn in STAGES:
+                if name not in stages:
+                    continue
+                results[f"{size}/{name}"] = measure(fn, ctx, repeat)
+    return results
+
+
+# ----------------------------------------------------------------------
+# Baselines and output
+# ----------------------------------------------------------------------
+
+
+def compare_baseline(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+) -> List[str]:
+    """Regression messages for stages slower or bigger than baseline*(1+tolerance)."""
+    regressions: List[str] = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            old, new = base.get(metric) or 0, res[metric]
+            # Ignore noise on tiny numbers
+            floor = 0.01 if metric == "seconds" else 1.0
+            if new > max(old, floor) * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {old} -> {new}")
+    return regressions
+
+
+def render_table(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> str:
+    lines = [
+        f"{'stage':<22} {'seconds':>9} {'peak_mb':>9} {'retained_mb':>12} "
+        f"{'retained_blocks':>15} {'file_mb':>9} {'vs_base':>8}"
+    ]
+    for key, r in results.items():
+        delta = ""
+        base = (baseline or {}).get(key)
+        if base and base.get("seconds"):
+            delta = f"{r['seconds'] / base['seconds']:.2f}x"
+        file_mb = f"{r['file_mb']:.2f}" if "file_mb" in r else ""
+        lines.append(
+            f"{key:<22} {r['seconds']:>9.4f} {r['peak_mb']:>9.2f} "
+            f"{r['retained_mb']:>12.2f} {r['retained_blocks']:>15} "
+            f"{file_mb:>9} {delta:>8}"
+        )
+    return "\n".join(lines)
+
+
+def render_compression_summary(results: Dict[str, Dict[str, Any]]) -> str:
+    """Compressed snapshots vs plain json.dump(indent=2): size, write, read."""
+    lines: List[str] = []
+    for key, plain in results.items():
+        size, _, stage = key.partition("/")
+        if stage != "json_write" or not plain.get("file_mb"):
+            continue
+        plain_read = results.get(f"{size}/json_read")
+        for suffix in ("gz", "zst"):
+            packed = results.get(f"{size}/json_write_{suffix}")
+            if not packed:
+                continue
+            line = (
+                f"{size} objects, .json.{suffix}: "
+                f"{plain['file_mb']:.2f} MB -> {packed['file_mb']:.2f} MB "
+                f"({1 - packed['file_mb'] / plain['file_mb']:.0%} smaller), "
+                f"write {packed['seconds'] / plain['seconds']:.2f}x"
+            )
+            packed_read = results.get(f"{size}/json_read_{suffix}")
+            if plain_read and packed_read:
+                line += f", read {packed_read['seconds'] / plain_read['seconds']:.2f}x"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def write_synthetic_json(
+    out_dir: str, sizes: List[int], seed: int, compression: Optional[str] = None
+) -> None:
+    """Synthetic exports usable as input for f5_asbuilt_xls.py and friends."""
+    os.makedirs(out_dir, exist_ok=True)
+    for size in sizes:
+        ctx = prepare_context(size, seed)
+        path = f5_asbuilt_io.with_compression(
+            os.path.join(out_dir, f"f5_synthetic-{size}_asbuilt.json"), compression
+        )
+        with f5_asbuilt_io.open_snapshot(path, "w") as f:
+            json.dump(ctx["payload"], f, indent=2)
+        print(f"Wrote synthetic JSON ({size} objects) to: {path}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark F5 as-built renderers on synthetic data"
+    )
+    parser.add_argument(
+        "--sizes",
+        default="1k,10k",
+        help="Comma-separated object counts, e.g. 1k,10k,100k,500k (default: 1k,10k)",
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(name for name, _ in STAGES),
+        help="Comma-separated stages to run (default: all)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Timed runs per stage (default: 3)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed")
+    parser.add_argument(
+        "--save-baseline", metavar="FILE", help="Write the results as a baseline"
+    )
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="Compare against a saved baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown vs baseline before failing (default: 0.25 = 25%%)",
+    )
+    parser.add_argument("--format", choices=["table", "json"], default="table")
+    parser.add_argument(
+        "--write-json",
+        metavar="DIR",
+        help="Only write synthetic as-built JSON files for each size to DIR",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=sorted(f5_asbuilt_io.COMPRESSIONS),
+        help="With --write-json, write .json.gz / .json.zst files",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    try:
+        sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        print(f"[ERROR] Invalid --sizes: {args.sizes}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.write_json:
+        try:
+            f5_asbuilt_io.check_compression(args.compress)
+        except RuntimeError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(1)
+        write_synthetic_json(args.write_json, sizes, args.seed, args.compress)
+        return
+
+    known = [name for name, _ in STAGES]
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in known]
+    if unknown:
+        print(f"[ERROR] Unknown stage(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+    if "xls" in stages and xls is None:
+        print("[WARN] openpyxl not installed, skipping the xls stage", file=sys.stderr)
+        stages.remove("xls")
+    if f5_asbuilt_io.zstandard is None:
+        for name in ("json_write_zst", "json_read_zst"):
+            if name in stages:
+                print(
+                    f"[WARN] zstandard not installed, skipping the {name} stage",
+                    file=sys.stderr,
+                )
+                stages.remove(name)
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[ERROR] Cannot read baseline {args.baseline}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    results = run_benchmarks(sizes, stages, max(1, args.repeat), args.seed)
+
+    if args.format == "json":
+        print(json.dumps(results, indent=2))
+    else:
+        print(render_table(results, baseline))
+        summary = render_compression_summary(results)
+        if summary:
+            print()
+            print(summary)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": sys.version.split()[0],
+                    "seed": args.seed,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"Wrote baseline to: {args.save_baseline}", file=sys.stderr)
+
+    if baseline is not None:
+        regressions = compare_baseline(results, baseline, args.tolerance)
+        for msg in regressions:
+            print(f"[REGRESSION] {msg}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+"""
+Interactive HTML as-built (f5_asbuilt.py --format html).
+
+The page itself is a small static shell. Every section's table lives in
+its own script next to it (<page>_data/<section>.js) as compact
+per-column arrays, and is only loaded when its tab is first opened. Tables
+are virtualized (only the rows on screen are in the DOM), so a device
+with 100k objects opens instantly; a filter box and clickable column
+headers search and sort them in the browser. The cross-references from
+build_usage_maps (pool <-> virtual server, monitor, iRule, SSL profile,
+certificate, node) are links to the referenced row.
+
+Data files are scripts rather than .json so the report also works when
+opened straight from disk (file://). Only the standard library is needed.
+"""
+
+import html
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# ----------------------------------------------------------------------
+# Section tables
+# ----------------------------------------------------------------------
+
+
+# One table column: (header, values in row order, section its values link to)
+Column = Tuple[str, List[Any], Optional[str]]
+
+
+def _encode(values: List[Any]) -> Any:
+    """
+    A column as sent to the page. Columns of few distinct scalar values
+    (partition, state, pool of a member, ...) are dictionary-encoded as
+    {"values": [...], "codes": [...]}, which is smaller and faster to
+    serialize; anything else (lists, mostly unique names) is sent as is.
+    """
+    # Keyed by type as well: True, 1 and 1.0 are equal but must stay apart
+    keys = [(type(v), v) for v in values]
+    try:
+        # A sample rules out mostly unique columns cheaply
+        if len(set(keys[:64])) * 2 > min(len(keys), 64):
+            return values
+        lookup: Dict[Tuple[type, Any], int] = {}
+        for key in keys:
+            lookup.setdefault(key, len(lookup))
+    except TypeError:  # list cells
+        return values
+    if len(lookup) * 2 > len(values):
+        return values
+    return {
+        "values": [v for _, v in lookup],
+        "codes": [lookup[key] for key in keys],
+    }
+
+
+def _table(
+    section_id: str,
+    title: str,
+    columns: List[Column],
+    incomplete: bool = False,
+    known: Optional[Dict[str, List[str]]] = None,
+    member_links: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """
+    One section, stored by column: a cell is a value, a list of values or
+    None. The first column is the key other sections link to. known maps a
+    link target to the names that exist there, for columns that mix linked
+    and plain names (all profiles of a virtual, only SSL ones are linked).
+    member_links are columns of pool member names ('node:port', IPv6
+    'node.port') that link to their node; the page strips the port.
+    """
+    return {
+        "id": section_id,
+        "title": title,
+        "columns": [name for name, _, _ in columns],
+        "rows": len(columns[0][1]) if columns else 0,
+        "links": [target for _, _, target in columns],
+        "data": [_encode(values) for _, values, _ in columns],
+        "known": known or {},
+        "member_links": member_links or [],
+        "incomplete": incomplete,
+    }
+
+
+def build_sections(
+    device_info: Dict[str, Any], ltm_data: Dict[str, Any], usage_maps: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    All report sections, in tab order (the Markdown section order).
+
+    Columns reuse the collected lists where they can, derived values are
+    computed once per distinct input (monitor strings), and what only
+    matters for the rows on screen (the node of a pool member) is left to
+    the page. That keeps this about as cheap as render_markdown.
+    """
+    incomplete = set(ltm_data.get("incomplete") or [])
+    virtuals = ltm_data["virtuals"]
+    pools = ltm_data["pools"]
+    nodes = ltm_data["nodes"]
+    irules = ltm_data["irules"]
+    ssl_profiles = ltm_data["ssl_profiles"]
+    certs = ltm_data["certs"]
+
+    none: List[str] = []
+
+    pool_virtuals: Dict[str, List[str]] = {}
+    for vs in virtuals:
+        if vs["pool"]:
+            pool_virtuals.setdefault(vs["pool"], []).append(vs["name"])
+
+    pool_monitors: Dict[Optional[str], List[str]] = {}
+    for monitor in {p["monitor"] for p in pools}:
+        pool_monitors[monitor] = [
+            m.split("/")[-1] for m in (monitor or "").split(" and ") if m
+        ]
+
+    member_pool: List[str] = []
+    members: List[Dict[str, Any]] = []
+    for p in pools:
+        member_pool.extend([p["name"]] * len(p["members"]))
+        members.extend(p["members"])
+
+    irule_usage = usage_maps["irule_usage"]
+    pool_irule_usage = usage_maps.get("pool_irule_usage", {})
+    references = usage_maps.get("irule_references", {})
+    irule_refs = [references.get(r["name"]) or {} for r in irules]
+    ssl_profile_usage = usage_maps["ssl_profile_usage"]
+    cert_usage = usage_maps["cert_usage"]
+    monitor_usage = usage_maps["monitor_usage"]
+
+    device_rows = [
+        ("Hostname", device_info["hostname"]),
+        ("Software Version", device_info["version"]),
+        ("HA Status", device_info["ha_status"]),
+        ("Sync Group", device_info["sync_group"]),
+        ("Sync Status", device_info.get("sync_status", "unknown")),
+        ("Partitions", device_info.get("partitions") or []),
+    ]
+    if device_info.get("config_source"):
+        device_rows.append(
+            ("Shared Config Collected From", device_info["config_source"])
+        )
+    if device_info.get("collected_partitions"):
+        device_rows.append(
+            ("Collected Partitions", device_info["collected_partitions"])
+        )
+    if incomplete:
+        device_rows.append(("Incomplete Sections", sorted(incomplete)))
+
+    sections = [
+        _table(
+            "device",
+            "Device Report",
+            [
+                ("Property", [k for k, _ in device_rows], None),
+                ("Value", [v for _, v in device_rows], None),
+            ],
+        ),
+        _table(
+            "virtuals",
+            "Virtual Servers",
+            [
+                ("Name", [vs["name"] for vs in virtuals], None),
+                ("Partition", [vs["partition"] for vs in virtuals], None),
+                ("Destination", [vs["destination_ip"] for vs in virtuals], None),
+                ("Port", [vs["destination_port"] for vs in virtuals], None),
+                ("Route Domain", [vs.get("route_domain") for vs in virtuals], None),
+                ("Pool", [vs["pool"] for vs in virtuals], "pools"),
+                ("Profiles", [vs["profiles"] for vs in virtuals], "ssl_profiles"),
+                ("Persistence", [vs["persistence"] for vs in virtuals], None),
+                ("iRules", [vs["irules"] for vs in virtuals], "irules"),
+            ],
+            "virtuals" in incomplete,
+            {"ssl_profiles": [sp["name"] for sp in ssl_profiles]},
+        ),
+        _table(
+            "pools",
+            "Pools",
+            [
+                ("Name", [p["name"] for p in pools], "pool_members"),
+                ("Partition", [p["partition"] for p in pools], None),
+                ("Load Balancing Method", [p["lb_method"] for p in pools], None),
+                ("Monitors", [pool_monitors[p["monitor"]] for p in pools], "monitors"),
+                ("Members", [len(p["members"]) for p in pools], None),
+                (
+                    "Used by Virtual Servers",
+                    [pool_virtuals.get(p["name"], none) for p in pools],
+                    "virtuals",
+                ),
+                (
+                    "Referenced by iRules",
+                    [pool_irule_usage.get(p["name"], none) for p in pools],
+                    "irules",
+                ),
+            ],
+            "pools" in incomplete,
+        ),
+        _table(
+            "pool_members",
+            "Pool Members",
+            [
+                ("Pool", member_pool, "pools"),
+                ("Member", [m["name"] for m in members], "nodes"),
+                ("Address", [m["address"] for m in members], None),
+                ("State", [m["state"] for m in members], None),
+                ("Session", [m["session"] for m in members], None),
+            ],
+            "pools" in incomplete,
+            member_links=[1],
+        ),
+        _table(
+            "nodes",
+            "Nodes",
+            [
+                # Links to the node's pool members (a filter on the name)
+                ("Name", [n["name"] for n in nodes], "pool_members"),
+                ("Partition", [n["partition"] for n in nodes], None),
+                ("Address", [n["address"] for n in nodes], None),
+                ("State", [n["state"] for n in nodes], None),
+                ("Session", [n["session"] for n in nodes], None),
+            ],
+            "nodes" in incomplete,
+        ),
+        _table(
+            "monitors",
+            "Monitors",
+            [
+                ("Name", [m["name"] for m in ltm_data["monitors"]], None),
+                ("Partition", [m["partition"] for m in ltm_data["monitors"]], None),
+                ("Type", [m["type"] for m in ltm_data["monitors"]], None),
+                (
+                    "Used by Pools",
+                    [monitor_usage.get(m["name"], none) for m in ltm_data["monitors"]],
+                    "pools",
+                ),
+            ],
+            "monitors" in incomplete,
+        ),
+        _table(
+            "irules",
+            "iRules",
+            [
+                ("Name", [r["name"] for r in irules], None),
+                ("Partition", [r["partition"] for r in irules], None),
+                (
+                    "Used by Virtual Servers",
+                    [irule_usage.get(r["name"], none) for r in irules],
+                    "virtuals",
+                ),
+                ("References Pools", [x.get("pools") for x in irule_refs], "pools"),
+                ("References Nodes", [x.get("nodes") for x in irule_refs], "nodes"),
+                (
+                    "References Data Groups",
+                    [x.get("classes") for x in irule_refs],
+                    None,
+                ),
+                (
+                    "References Virtual Servers",
+                    [x.get("virtuals") for x in irule_refs],
+                    "virtuals",
+                ),
+                ("Source SHA-256", [r.get("sha256") for r in irules], None),
+            ],
+            "irules" in incomplete,
+        ),
+        _table(
+            "ssl_profiles",
+            "SSL Profiles",
+            [
+                ("Name", [sp["name"] for sp in ssl_profiles], None),
+                ("Partition", [sp["partition"] for sp in ssl_profiles], None),
+                (
+                    "Certificate",
+                    [sp["cert"] and sp["cert"].split("/")[-1] for sp in ssl_profiles],
+                    "certs",
+                ),
+                ("Chain", [sp["chain"] for sp in ssl_profiles], None),
+                (
+                    "Used by Virtual Servers",
+                    [ssl_profile_usage.get(sp["name"], none) for sp in ssl_profiles],
+                    "virtuals",
+                ),
+            ],
+            "ssl_profiles" in incomplete,
+        ),
+        _table(
+            "certs",
+            "Certificates",
+            [
+                ("Name", [c["name"] for c in certs], None),
+                ("Partition", [c["partition"] for c in certs], None),
+                ("Full Path", [c["fullPath"] for c in certs], None),
+                ("Expiration", [c["expiration"] for c in certs], None),
+                (
+                    "Used by Virtual Servers (via SSL profiles)",
+                    [cert_usage.get(c["name"], none) for c in certs],
+                    "virtuals",
+                ),
+            ],
+            "certs" in incomplete,
+        ),
+    ]
+
+    # Registered collector sections (net, GTM, APM, ASM, ...)
+    for name, section in (ltm_data.get("extra") or {}).items():
+        sections.append(
+            _table(
+                name,
+                section["title"],
+                [
+                    (col, [row.get(col) for row in section["rows"]], None)
+                    for col in section["columns"]
+                ],
+                name in incomplete,
+            )
+        )
+    return sections
+
+
+# ----------------------------------------------------------------------
+# Page
+# ----------------------------------------------------------------------
+
+PAGE_STYLE = """
+* { box-sizing: border-box; }
+body { margin: 0; font: 13px/1.4 system-ui, sans-serif; color: #1d232a;
+  display: flex; flex-direction: column; height: 100vh; }
+header { padding: 8px 16px; background: #1d232a; color: #fff; }
+header h1 { margin: 0; font-size: 18px; }
+header p { margin: 2px 0 0; color: #aab4bf; }
+#tabs { display: flex; flex-wrap: wrap; gap: 2px; padding: 6px 16px 0;
+  background: #eef1f4; border-bottom: 1px solid #cfd6dd; }
+#tabs a { padding: 5px 10px; border-radius: 4px 4px 0 0; color: #1d232a;
+  text-decoration: none; }
+#tabs a.active { background: #fff; border: 1px solid #cfd6dd;
+  border-bottom-color: #fff; margin-bottom: -1px; }
+#tabs a span { color: #6b7682; margin-left: 4px; }
+#tabs a.incomplete::after { content: " \\26A0"; color: #c0392b; }
+#toolbar { display: flex; gap: 12px; align-items: center; padding: 8px 16px; }
+#search { width: 320px; padding: 4px 8px; }
+#count { color: #6b7682; }
+#note { color: #c0392b; }
+#scroller { flex: 1; overflow: auto; margin: 0 16px 16px;
+  border: 1px solid #cfd6dd; position: relative; }
+#head, .row { display: grid; grid-template-columns: var(--cols);
+  min-width: var(--width); }
+#head { position: sticky; top: 0; z-index: 1; background: #eef1f4;
+  font-weight: 600; cursor: pointer; user-select: none; }
+#spacer { position: relative; min-width: var(--width); }
+.row { position: absolute; left: 0; right: 0; height: 26px; }
+.row:nth-child(even) { background: #f7f9fa; }
+.row.mark { background: #fff3bf; }
+.cell { padding: 4px 8px; height: 26px; overflow: hidden; white-space: nowrap;
+  text-overflow: ellipsis; border-right: 1px solid #eef1f4; }
+a { color: #1565c0; }
+"""
+
+# Loads section scripts on demand and draws only the visible rows
+PAGE_SCRIPT = """
+(function () {
+  "use strict";
+  var A = window.ASBUILT, ROW = 26, OVERSCAN = 20;
+  var tables = {}, waiting = {}, cur = null, frame = 0, timer = 0;
+  var $ = function (id) { return document.getElementById(id); };
+  var tabs = $("tabs"), search = $("search"), count = $("count"), note = $("note");
+  var scroller = $("scroller"), head = $("head"), spacer = $("spacer");
+
+  A.loaded = function (id, t) {
+    t.data = t.data.map(function (col) {
+      return Array.isArray(col) ? col : col.codes.map(function (i) { return col.values[i]; });
+    });
+    Object.keys(t.known).forEach(function (k) { t.known[k] = new Set(t.known[k]); });
+    var keys = t.data.length ? t.data[0] : [];
+    t.id = id;
+    t.n = keys.length;
+    t.index = new Map();
+    for (var i = 0; i < t.n; i++) if (!t.index.has(keys[i])) t.index.set(keys[i], i);
+    t.query = ""; t.sortCol = -1; t.sortDir = 1; t.mark = -1; t.top = 0;
+    t.text = null; t.order = null;
+    tables[id] = t;
+    (waiting[id] || []).forEach(function (cb) { cb(t); });
+    delete waiting[id];
+  };
+
+  function load(id, cb) {
+    if (tables[id]) return cb(tables[id]);
+    if (waiting[id]) return waiting[id].push(cb);
+    waiting[id] = [cb];
+    if (A.inline[id]) return A.loaded(id, A.inline[id]);
+    var s = document.createElement("script");
+    s.src = A.data + "/" + id + ".js";
+    s.onerror = function () { note.textContent = "Could not load " + s.src; };
+    document.head.appendChild(s);
+  }
+
+  // Node of a pool member: 'node:port', or 'node.port' for IPv6 nodes
+  function memberNode(name) {
+    var k = name.lastIndexOf(name.split(":").length > 2 ? "." : ":");
+    return k > 0 ? name.slice(0, k) : name;
+  }
+
+  function text(v) {
+    return v == null ? "" : Array.isArray(v) ? v.join(", ") : String(v);
+  }
+
+  function refresh(t) {
+    var q = t.query.toLowerCase(), order = [], i;
+    if (q && !t.text) {
+      t.text = [];
+      for (i = 0; i < t.n; i++) {
+        t.text.push(t.data.map(function (col) { return text(col[i]); }).join("\\u0001").toLowerCase());
+      }
+    }
+    for (i = 0; i < t.n; i++) if (!q || t.text[i].indexOf(q) >= 0) order.push(i);
+    if (t.sortCol >= 0) {
+      var col = t.data[t.sortCol], d = t.sortDir;
+      var key = function (r) {
+        var v = col[r];
+        return Array.isArray(v) ? (v.length ? v.join(", ") : null) : v === "" ? null : v;
+      };
+      order.sort(function (a, b) {
+        var x = key(a), y = key(b);
+        if (x == null || y == null) return x == null ? (y == null ? a - b : 1) : -1;
+        return x < y ? -d : x > y ? d : a - b;
+      });
+    }
+    t.order = order;
+  }
+
+  function drawHead(t) {
+    head.textContent = "";
+    t.columns.forEach(function (name, c) {
+      var h = document.createElement("div");
+      h.className = "cell";
+      h.textContent = name + (t.sortCol === c ? (t.sortDir > 0 ? " \\u25B2" : " \\u25BC") : "");
+      h.title = "Sort by " + name;
+      h.onclick = function () {
+        if (t.sortCol === c) t.sortDir = -t.sortDir; else { t.sortCol = c; t.sortDir = 1; }
+        refresh(t); drawHead(t); scroller.scrollTop = 0; paint();
+      };
+      head.appendChild(h);
+    });
+  }
+
+  function drawRow(t, r, pos) {
+    var el = document.createElement("div");
+    el.className = r === t.mark ? "row mark" : "row";
+    el.style.top = pos * ROW + "px";
+    for (var c = 0; c < t.data.length; c++) {
+      var d = document.createElement("div"), v = t.data[c][r], target = t.links[c];
+      d.className = "cell";
+      d.title = text(v);
+      if (target && v != null && v !== "") {
+        var known = t.known[target];
+        (Array.isArray(v) ? v : [v]).forEach(function (name, k) {
+          if (k) d.appendChild(document.createTextNode(", "));
+          if (known && !known.has(name)) return d.appendChild(document.createTextNode(name));
+          var a = document.createElement("a");
+          var key = t.member_links.indexOf(c) >= 0 ? memberNode(name) : name;
+          a.href = "#" + target + "/" + encodeURIComponent(key);
+          a.textContent = name;
+          d.appendChild(a);
+        });
+      } else {
+        d.textContent = d.title;
+      }
+      el.appendChild(d);
+    }
+    return el;
+  }
+
+  function paint() {
+    var t = cur, order = t.order, top = scroller.scrollTop;
+    spacer.style.height = order.length * ROW + "px";
+    var first = Math.max(0, Math.floor(top / ROW) - OVERSCAN);
+    var last = Math.min(order.length, Math.ceil((top + scroller.clientHeight) / ROW) + OVERSCAN);
+    var frag = document.createDocumentFragment();
+    for (var i = first; i < last; i++) frag.appendChild(drawRow(t, order[i], i));
+    spacer.replaceChildren(frag);
+    count.textContent = (order.length === t.n ? "" : order.length + " of ") + t.n + " rows";
+  }
+
+  function open(t) {
+    if (cur !== t) {
+      if (cur) cur.top = scroller.scrollTop;
+      cur = t;
+      if (!t.order) refresh(t);
+      var n = t.columns.length;
+      scroller.style.setProperty("--cols", "repeat(" + n + ", minmax(9em, 1fr))");
+      scroller.style.setProperty("--width", n * 9 + "em");
+      search.value = t.query;
+      note.textContent = t.incomplete ?
+        "Incomplete: this section could not be fully collected (timeout or error)." : "";
+      drawHead(t);
+      spacer.style.height = t.order.length * ROW + "px";
+      scroller.scrollTop = t.top;
+      Array.prototype.forEach.call(tabs.children, function (a) {
+        a.className = (a.dataset.id === t.id ? "active " : "") +
+          (a.dataset.incomplete ? "incomplete" : "");
+      });
+    }
+    paint();
+  }
+
+  function route() {
+    var hash = location.hash.slice(1), k = hash.indexOf("/");
+    var id = k < 0 ? hash : hash.slice(0, k);
+    var name = k < 0 ? null : decodeURIComponent(hash.slice(k + 1));
+    if (!A.sections.some(function (s) { return s.id === id; })) id = A.sections[0].id;
+    load(id, function (t) {
+      if (name === null) return open(t);
+      var r = t.index.get(name);
+      if (r === undefined) {
+        t.query = name; t.mark = -1; refresh(t); t.top = 0;
+        if (cur === t) { search.value = name; scroller.scrollTop = 0; }
+        return open(t);
+      }
+      if (t.query) { t.query = ""; refresh(t); search.value = ""; }
+      if (!t.order) refresh(t);
+      t.mark = r;
+      t.top = Math.max(0, t.order.indexOf(r) * ROW - scroller.clientHeight / 3);
+      if (cur === t) scroller.scrollTop = t.top;
+      open(t);
+    });
+  }
+
+  A.sections.forEach(function (s) {
+    var a = document.createElement("a");
+    a.href = "#" + s.id;
+    a.dataset.id = s.id;
+    if (s.incomplete) { a.dataset.incomplete = "1"; a.title = "Incomplete section"; }
+    a.textContent = s.title;
+    var n = document.createElement("span");
+    n.textContent = s.rows;
+    a.appendChild(n);
+    tabs.appendChild(a);
+  });
+  search.oninput = function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      cur.query = search.value; cur.mark = -1; refresh(cur);
+      scroller.scrollTop = 0; paint();
+    }, 150);
+  };
+  scroller.onscroll = function () {
+    if (!frame) frame = requestAnimationFrame(function () { frame = 0; paint(); });
+  };
+  window.onresize = function () { if (cur) paint(); };
+  window.onhashchange = route;
+  route();
+})();
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>F5 As-Built – {host}</title>
+<style>{style}</style>
+</head>
+<body>
+<header><h1>F5 As-Built – {host}</h1><p>Generated on {now}</p></header>
+<nav id="tabs"></nav>
+<div id="toolbar">
+<input id="search" type="search" placeholder="Filter rows…" autocomplete="off">
+<span id="count"></span><span id="note"></span>
+</div>
+<div id="scroller"><div id="head"></div><div id="spacer"></div></div>
+<script>window.ASBUILT = {config};</script>
+<script>{script}</script>
+</body>
+</html>
+"""
+
+
+def _script_json(value: Any) -> str:
+    """Compact JSON that is safe inside a <script> element."""
+    # Cells share lists (usage maps), never cycles: skip the cycle check
+    return json.dumps(value, separators=(",", ":"), check_circular=False).replace(
+        "</", "<\\/"
+    )
+
+
+def data_dir_for(output_file: str) -> str:
+    """Directory holding the section scripts of a report page."""
+    return os.path.splitext(output_file)[0] + "_data"
+
+
+def render_html(
+    device_info: Dict[str, Any],
+    ltm_data: Dict[str, Any],
+    usage_maps: Dict[str, Any],
+    data_dir: str = "data",
+) -> Tuple[str, Dict[str, str]]:
+    """
+    The report page and its section scripts ({filename: content}). data_dir
+    is where the page looks for the scripts, relative to the page.
+    """
+    sections = build_sections(device_info, ltm_data, usage_maps)
+    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    # The device report is tiny; it is embedded so the first tab needs no load
+    inline = {s["id"]: s for s in sections if s["id"] == "device"}
+    config = {
+        "data": data_dir,
+        "sections": [
+            {
+                "id": s["id"],
+                "title": s["title"],
+                "rows": s["rows"],
+                "incomplete": s["incomplete"],
+            }
+            for s in sections
+        ],
+        "inline": inline,
+    }
+    page = PAGE_TEMPLATE.format(
+        host=html.escape(str(device_info["hostname"])),
+        now=now,
+        style=PAGE_STYLE,
+        config=_script_json(config),
+        script=PAGE_SCRIPT,
+    )
+    scripts = {
+        f"{s['id']}.js": f"ASBUILT.loaded({_script_json(s['id'])},{_script_json(s)});\n"
+        for s in sections
+        if s["id"] not in inline
+    }
+    return page, scripts
+
+
+def write_html(
+    output_file: str,
+    device_info: Dict[str, Any],
+    ltm_data: Dict[str, Any],
+    usage_maps: Dict[str, Any],
+) -> None:
+    """Write the page and its <page>_data/ directory (stale scripts removed)."""
+    data_dir = data_dir_for(output_file)
+    page, scripts = render_html(
+        device_info, ltm_data, usage_maps, os.path.basename(data_dir)
+    )
+    os.makedirs(data_dir, exist_ok=True)
+    for name, content in scripts.items():
+        with open(os.path.join(data_dir, name), "w", encoding="utf-8") as f:
+            f.write(content)
+    for name in os.listdir(data_dir):
+        if name.endswith(".js") and name not in scripts:
+            os.remove(os.path.join(data_dir, name))
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(page)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Compressed as-built snapshots.
+
+JSON and Markdown as-builts are highly repetitive text, so they can be
+written gzip- or zstd-compressed. The compression always follows the file
+extension:
+
+- f5_<name>_asbuilt.json      : plain
+- f5_<name>_asbuilt.json.gz   : gzip (standard library)
+- f5_<name>_asbuilt.json.zst  : zstd (needs 'pip install zstandard')
+
+open_snapshot() returns a text stream for any of them, compressing or
+decompressing on the fly, and load_json() reads a JSON snapshot through
+it, so writers and readers (f5_asbuilt.py,
+f5_asbuilt_xls.py, f5_asbuilt_addr.py, f5_asbuilt_query.py) handle
+compressed snapshots without temporary files.
+
+list_json_files() and device_label() find the snapshots to read and name
+their devices the same way in every reader; cache_dir() is the local cache
+location shared by these tools.
+"""
+
+import gzip
+import json
+import os
+import re
+import zlib
+from typing import IO, Any, Dict, Iterable, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd snapshots are optional
+    zstandard = None
+
+_ZSTD_ERRORS = (zstandard.ZstdError,) if zstandard is not None else ()
+
+# Raised while decompressing a corrupt (BadGzipFile, zlib.error, ZstdError)
+# or truncated (EOFError) snapshot
+_CORRUPT_ERRORS = (gzip.BadGzipFile, zlib.error, EOFError, *_ZSTD_ERRORS)
+
+# Compression name -> file suffix
+COMPRESSIONS: Dict[str, str] = {"gzip": ".gz", "zstd": ".zst"}
+
+# zlib's default level; 9 is far slower for a few percent
+GZIP_LEVEL = 6
+# zstd's default level: faster than gzip -6 and smaller output
+ZSTD_LEVEL = 3
+
+
+def cache_dir(*parts: str) -> str:
+    """
+    Local cache directory of the as-built tools (joined with 'parts'):
+    $XDG_CACHE_HOME/f5_asbuilt, or ~/.cache/f5_asbuilt. Caches hold pickles,
+    so they live in a directory owned by the user rather than next to the
+    files being processed.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "f5_asbuilt", *parts)
+
+
+def compression_for(path: str) -> Optional[str]:
+    """'gzip', 'zstd' or None, from the file extension."""
+    for name, suffix in COMPRESSIONS.items():
+        if path.endswith(suffix):
+            return name
+    return None
+
+
+def strip_compression(path: str) -> str:
+    """The path without its compression suffix ('x.json.gz' -> 'x.json')."""
+    compression = compression_for(path)
+    if compression:
+        return path[: -len(COMPRESSIONS[compression])]
+    return path
+
+
+def with_compression(path: str, compression: Optional[str]) -> str:
+    """Append the suffix of 'compression' unless the path already has one."""
+    if not compression or compression_for(path):
+        return path
+    return path + COMPRESSIONS[compression]
+
+
+def is_snapshot(name: str, ext: str = ".json") -> bool:
+    """True for 'x<ext>' and its compressed variants."""
+    return strip_compression(name).endswith(ext)
+
+
+def check_compression(compression: Optional[str]) -> None:
+    """Raise RuntimeError if 'compression' cannot be used here."""
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError(
+            "zstd snapshots need the 'zstandard' package (pip install zstandard)"
+        )
+
+
+def open_snapshot(path: str, mode: str = "r") -> IO[str]:
+    """
+    Open a snapshot as UTF-8 text for reading ('r') or writing ('w'),
+    compressed according to its extension. Data is (de)compressed in
+    chunks as it is read or written.
+    """
+    compression = compression_for(path)
+    check_compression(compression)
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", compresslevel=GZIP_LEVEL, encoding="utf-8")
+    if compression == "zstd":
+        return zstandard.open(
+            path,
+            mode + "t",
+            cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL) if mode == "w" else None,
+            encoding="utf-8",
+        )
+    return open(path, mode, encoding="utf-8")
+
+
+def load_json(path: str) -> Any:
+    """
+    json.load() a plain or compressed snapshot. Corrupt or truncated
+    compressed data raises ValueError, like corrupt JSON does; OSError is
+    left for errors reading the file, and a missing zstd package raises
+    RuntimeError.
+    """
+    try:
+        with open_snapshot(path) as f:
+            return json.load(f)
+    except _CORRUPT_ERRORS as e:
+        raise ValueError(str(e)) from e
+
+
+def list_json_files(paths: Iterable[str]) -> List[str]:
+    """
+    JSON snapshots among 'paths': a directory contributes its .json
+    (.json.gz, .json.zst) files in name order, a file is taken as given.
+    When the same snapshot exists both plain and compressed (x.json and
+    x.json.gz, e.g. after switching --compress), only the most recently
+    modified file is kept. Raises FileNotFoundError for a path that does
+    not exist.
+    """
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if is_snapshot(name)
+            )
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            raise FileNotFoundError(path)
+
+    newest: Dict[str, str] = {}
+    for path in files:
+        key = strip_compression(path)
+        if key not in newest or os.path.getmtime(path) > os.path.getmtime(newest[key]):
+            newest[key] = path
+    return [path for path in files if newest[strip_compression(path)] == path]
+
+
+def device_label(path: str, data: Dict[str, Any]) -> str:
+    """Inventory name from 'f5_<name>_asbuilt.json', else the device hostname."""
+    m = re.match(r"f5_(.+)_asbuilt\.json$", os.path.basename(strip_compression(path)))
+    if m:
+        return m.group(1)
+    return (data.get("device_report") or {}).get("hostname") or path
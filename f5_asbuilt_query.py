@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Query F5 as-builts across the fleet from a local SQLite index.
+
+The index is filled by f5_asbuilt.py --index (every device as soon as its
+output is written) or from existing JSON exports with the 'build' command.
+Re-indexing a device replaces only that device's rows, and 'build' skips
+files that did not change since they were indexed.
+
+Examples:
+
+    python f5_asbuilt_query.py build json/
+    python f5_asbuilt_query.py vips --pool app-pool-443
+    python f5_asbuilt_query.py certs --expires-within 30
+    python f5_asbuilt_query.py find 'portal-*' --kind virtual,pool
+    python f5_asbuilt_query.py --device 'FLL2*' irules 'HTTP::redirect'
+
+Name, pool and --device arguments are shell-style patterns (SQLite GLOB,
+case-sensitive); a plain name matches exactly.
+
+iRule bodies are searched with SQLite FTS5 full-text search when the
+SQLite library has it (plain substring search otherwise). Only the
+standard library is needed.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import f5_asbuilt_io
+
+DEFAULT_INDEX_PATH = os.path.join(".f5_asbuilt_state", "asbuilt.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    device TEXT PRIMARY KEY,
+    hostname TEXT,
+    version TEXT,
+    source TEXT,
+    stamp TEXT,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS objects (
+    device TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT,
+    partition TEXT,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS objects_name ON objects (name);
+CREATE INDEX IF NOT EXISTS objects_device ON objects (device);
+CREATE TABLE IF NOT EXISTS virtuals (
+    device TEXT NOT NULL,
+    name TEXT,
+    partition TEXT,
+    ip TEXT,
+    port TEXT,
+    pool TEXT
+);
+CREATE INDEX IF NOT EXISTS virtuals_pool ON virtuals (pool);
+CREATE INDEX IF NOT EXISTS virtuals_device ON virtuals (device);
+CREATE TABLE IF NOT EXISTS certs (
+    device TEXT NOT NULL,
+    name TEXT,
+    partition TEXT,
+    expiration TEXT,
+    expires_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS certs_expiry ON certs (expires_at);
+CREATE INDEX IF NOT EXISTS certs_device ON certs (device);
+CREATE TABLE IF NOT EXISTS irules (
+    device TEXT NOT NULL,
+    name TEXT,
+    partition TEXT,
+    sha256 TEXT
+);
+CREATE INDEX IF NOT EXISTS irules_sha ON irules (sha256);
+CREATE INDEX IF NOT EXISTS irules_device ON irules (device);
+"""
+
+# iRule bodies are stored once per sha256, like the iRule source cache
+FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS irule_bodies "
+    "USING fts5(sha256 UNINDEXED, body)"
+)
+PLAIN_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS irule_bodies (sha256 TEXT PRIMARY KEY, body TEXT)"
+)
+
+# Values per 'IN (...)' query; older SQLite builds allow 999 parameters
+SQL_PARAMS_CHUNK = 500
+
+# JSON section -> object kind
+OBJECT_KINDS = {
+    "virtual_servers": "virtual",
+    "pools": "pool",
+    "nodes": "node",
+    "monitors": "monitor",
+    "irules": "irule",
+    "ssl_profiles": "ssl_profile",
+    "certificates": "cert",
+}
+
+
+# ----------------------------------------------------------------------
+# Index
+# ----------------------------------------------------------------------
+
+
+def open_index(path: str = DEFAULT_INDEX_PATH) -> sqlite3.Connection:
+    """Open (and create) the index database."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.executescript(SCHEMA)
+    try:
+        conn.execute(FTS_SCHEMA)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5
+        conn.execute(PLAIN_SCHEMA)
+    return conn
+
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'irule_bodies'"
+    ).fetchone()
+    return bool(row) and "fts5" in row[0].lower()
+
+
+def parse_expiration(value: Any) -> Optional[int]:
+    """
+    Certificate expiration as epoch seconds. REST reports an epoch number,
+    other sources a string like 'Jan  1 00:00:00 2027 GMT'.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return int(value)
+    text = " ".join(str(value).split())
+    for fmt in ("%b %d %H:%M:%S %Y %Z", "%Y-%m-%dT%H:%M:%SZ"):
+        try:
+            dt = datetime.strptime(text, fmt).replace(tzinfo=timezone.utc)
+            return int(dt.timestamp())
+        except ValueError:
+            continue
+    return None
+
+
+def _object_rows(
+    device: str, payload: Dict[str, Any]
+) -> Iterator[Tuple[str, str, Any, Any, str]]:
+    for section, kind in OBJECT_KINDS.items():
+        for obj in payload.get(section) or []:
+            yield (
+                device,
+                kind,
+                obj.get("name"),
+                obj.get("partition"),
+                json.dumps(obj, default=str),
+            )
+    # Registered collector sections (net, GTM, APM, ASM)
+    for section_name, section in (payload.get("extra_sections") or {}).items():
+        for row in section.get("rows", []):
+            yield (
+                device,
+                section_name,
+                row.get("Name"),
+                row.get("Partition"),
+                json.dumps(row, default=str),
+            )
+
+
+def index_payload(
+    conn: sqlite3.Connection,
+    device: str,
+    payload: Dict[str, Any],
+    source: Optional[str] = None,
+    stamp: Optional[str] = None,
+) -> None:
+    """Replace one device's rows with the contents of its as-built JSON document."""
+    report = payload.get("device_report") or {}
+    with conn:
+        for table in ("objects", "virtuals", "certs", "irules"):
+            conn.execute(f"DELETE FROM {table} WHERE device = ?", (device,))
+        conn.execute(
+            "INSERT OR REPLACE INTO devices VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                device,
+                report.get("hostname"),
+                report.get("version"),
+                source,
+                stamp,
+                time.time(),
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO objects VALUES (?, ?, ?, ?, ?)", _object_rows(device, payload)
+        )
+        conn.executemany(
+            "INSERT INTO virtuals VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    device,
+                    vs.get("name"),
+                    vs.get("partition"),
+                    vs.get("destination_ip"),
+                    vs.get("destination_port"),
+                    vs.get("pool"),
+                )
+                for vs in payload.get("virtual_servers") or []
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO certs VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    device,
+                    c.get("name"),
+                    c.get("partition"),
+                    str(c.get("expiration")),
+                    parse_expiration(c.get("expiration")),
+                )
+                for c in payload.get("certificates") or []
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO irules VALUES (?, ?, ?, ?)",
+            (
+                (device, r.get("name"), r.get("partition"), r.get("sha256"))
+                for r in payload.get("irules") or []
+            ),
+        )
+        # Bodies are shared by sha256: store only this device's new ones
+        sources = payload.get("irule_sources") or {}
+        shas = list(sources)
+        known = set()
+        for i in range(0, len(shas), SQL_PARAMS_CHUNK):
+            chunk = shas[i : i + SQL_PARAMS_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            known.update(
+                row[0]
+                for row in conn.execute(
+                    f"SELECT sha256 FROM irule_bodies WHERE sha256 IN ({marks})",
+                    chunk,
+                )
+            )
+        conn.executemany(
+            "INSERT INTO irule_bodies (sha256, body) VALUES (?, ?)",
+            ((sha, body) for sha, body in sources.items() if sha not in known),
+        )
+        # Bodies no device uses any more
+        conn.execute(
+            "DELETE FROM irule_bodies WHERE sha256 NOT IN "
+            "(SELECT sha256 FROM irules WHERE sha256 IS NOT NULL)"
+        )
+
+
+def index_files(conn: sqlite3.Connection, paths: List[str], force: bool = False) -> int:
+    """
+    Index JSON exports (plain, .gz or .zst), skipping unchanged ones.
+    Returns files (re)indexed.
+    """
+    files = f5_asbuilt_io.list_json_files(paths)
+    stamps = {
+        source: stamp
+        for source, stamp in conn.execute("SELECT source, stamp FROM devices")
+    }
+    indexed = 0
+    for path in files:
+        st = os.stat(path)
+        stamp = f"{st.st_mtime_ns}:{st.st_size}"
+        source = os.path.abspath(path)
+        if not force and stamps.get(source) == stamp:
+            continue
+        try:
+            payload = f5_asbuilt_io.load_json(path)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"[WARN] Skipping {path}: {e}", file=sys.stderr)
+            continue
+        index_payload(
+            conn, f5_asbuilt_io.device_label(path, payload), payload, source, stamp
+        )
+        indexed += 1
+    return indexed
+
+
+# ----------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------
+
+
+def query_virtuals_by_pool(
+    conn: sqlite3.Connection, pool: str, device: str = "*"
+) -> List[Dict[str, Any]]:
+    rows = conn.execute(
+        "SELECT device, name, partition, ip, port, pool FROM virtuals "
+        "WHERE pool GLOB ? AND device GLOB ? ORDER BY device, name",
+        (pool, device),
+    )
+    cols = ["device", "name", "partition", "ip", "port", "pool"]
+    return [dict(zip(cols, r)) for r in rows]
+
+
+def query_certs_expiring(
+    conn: sqlite3.Connection,
+    days: float,
+    device: str = "*",
+    include_expired: bool = False,
+    now: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    now = time.time() if now is None else now
+    low = 0 if include_expired else int(now)
+    rows = conn.execute(
+        "SELECT device, name, partition, expiration, expires_at FROM certs "
+        "WHERE expires_at BETWEEN ? AND ? AND device GLOB ? "
+        "ORDER BY expires_at, device, name",
+        (low, int(now + days * 86400), device),
+    )
+    result = []
+    for dev, name, partition, expiration, expires_at in rows:
+        result.append(
+            {
+                "device": dev,
+                "name": name,
+                "partition": partition,
+                "expiration": expiration,
+                "days_left": round((expires_at - now) / 86400, 1),
+            }
+        )
+    return result
+
+
+def query_objects_by_name(
+    conn: sqlite3.Connection,
+    pattern: str,
+    kinds: Optional[List[str]] = None,
+    device: str = "*",
+) -> List[Dict[str, Any]]:
+    sql = (
+        "SELECT device, kind, name, partition FROM objects "
+        "WHERE name GLOB ? AND device GLOB ?"
+    )
+    params: List[Any] = [pattern, device]
+    if kinds:
+        sql += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+        params.extend(kinds)
+    sql += " ORDER BY device, kind, name"
+    cols = ["device", "kind", "name", "partition"]
+    return [dict(zip(cols, r)) for r in conn.execute(sql, params)]
+
+
+def query_irules_by_text(
+    conn: sqlite3.Connection, text: str, device: str = "*", raw: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    iRules whose body contains 'text'. With FTS5 the text is matched as a
+    phrase (raw=True passes FTS5 query syntax through); otherwise substring.
+    """
+    if has_fts(conn):
+        match = text if raw else '"' + text.replace('"', '""') + '"'
+        shas = "SELECT sha256 FROM irule_bodies WHERE irule_bodies MATCH ?"
+    else:
+        match = f"%{text}%"
+        shas = "SELECT sha256 FROM irule_bodies WHERE body LIKE ?"
+    rows = conn.execute(
+        f"SELECT device, name, partition, sha256 FROM irules "
+        f"WHERE sha256 IN ({shas}) AND device GLOB ? ORDER BY device, name",
+        (match, device),
+    )
+    cols = ["device", "name", "partition", "sha256"]
+    return [dict(zip(cols, r)) for r in rows]
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+
+
+def render_table(rows: List[Dict[str, Any]]) -> str:
+    if not rows:
+        return "No matches."
+    cols = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c] or "")) for r in rows)) for c in cols}
+    lines = ["  ".join(c.ljust(widths[c]) for c in cols)]
+    lines.append("  ".join("-" * widths[c] for c in cols))
+    for r in rows:
+        lines.append("  ".join(str(r[c] or "").ljust(widths[c]) for c in cols))
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Query the F5 as-built index")
+    parser.add_argument(
+        "--db",
+        default=DEFAULT_INDEX_PATH,
+        help=f"Index database (default: {DEFAULT_INDEX_PATH})",
+    )
+    parser.add_argument("--format", choices=["table", "json"], default="table")
+    parser.add_argument(
+        "--device", default="*", help="Only devices matching this pattern"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="Index JSON exports (files or directories)")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--force", action="store_true", help="Re-index unchanged files")
+
+    p = sub.add_parser("vips", help="Virtual servers by default pool")
+    p.add_argument("--pool", required=True, help="Pool name or pattern")
+
+    p = sub.add_parser("certs", help="Certificates by expiry window")
+    p.add_argument(
+        "--expires-within", type=float, default=30, help="Days (default: 30)"
+    )
+    p.add_argument(
+        "--include-expired", action="store_true", help="Also list expired certs"
+    )
+
+    p = sub.add_parser("find", help="Objects by name pattern")
+    p.add_argument("pattern", help="Name or shell pattern, e.g. 'portal-*'")
+    p.add_argument(
+        "--kind",
+        help="Comma-separated kinds: virtual,pool,node,monitor,irule,"
+        "ssl_profile,cert or an extra section such as net_self_ips",
+    )
+
+    p = sub.add_parser("irules", help="iRules by body text")
+    p.add_argument("text")
+    p.add_argument(
+        "--raw", action="store_true", help="Pass FTS5 query syntax through as-is"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command != "build" and not os.path.exists(args.db):
+        print(
+            f"[ERROR] Index not found: {args.db} (run 'build' or "
+            "f5_asbuilt.py --index first)",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    conn = open_index(args.db)
+
+    start = time.perf_counter()
+    if args.command == "build":
+        try:
+            count = index_files(conn, args.paths, force=args.force)
+        except FileNotFoundError as e:
+            print(f"[ERROR] Not found: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Indexed {count} file(s) into: {args.db}")
+        return
+    try:
+        if args.command == "vips":
+            rows = query_virtuals_by_pool(conn, args.pool, args.device)
+        elif args.command == "certs":
+            rows = query_certs_expiring(
+                conn, args.expires_within, args.device, args.include_expired
+            )
+        elif args.command == "find":
+            kinds = [k.strip() for k in (args.kind or "").split(",") if k.strip()]
+            rows = query_objects_by_name(conn, args.pattern, kinds, args.device)
+        else:
+            rows = query_irules_by_text(conn, args.text, args.device, args.raw)
+    except sqlite3.OperationalError as e:
+        print(f"[ERROR] Query failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if args.format == "json":
+        print(json.dumps(rows, indent=2))
+    else:
+        print(render_table(rows))
+    print(f"{len(rows)} row(s) in {elapsed:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,9 +10,13 @@ Input JSON is expected to be the output from f5_asbuilt.py --format json, with k
 - nodes
 - monitors
 - irules
+- irule_sources (sha256 -> iRule body)
 - ssl_profiles
 - certificates
-- usage (irule_usage, monitor_usage, ssl_profile_usage, cert_usage)
+- extra_sections (registered collector sections: net, GTM, APM, ASM; optional)
+- incomplete_sections (sections that timed out or failed, optional)
+- usage (irule_usage, monitor_usage, ssl_profile_usage, cert_usage,
+  irule_references, pool_irule_usage, datagroup_irule_usage)
 
 The Excel workbook will contain sheets:
 
@@ -22,94 +26,115 @@ The Excel workbook will contain sheets:
 4. Monitors
 5. IRules
 6. SSL_Profiles
+7. One sheet per extra section (e.g. Self_IPs, GTM_Wide_IPs), when present
+8. Collection_Status (only when some sections are incomplete)
 
 By default, the Excel filename will be the JSON filename with extension changed to .xlsx.
+
+Compressed exports (f5_asbuilt.py --compress gzip|zstd, *.json.gz /
+*.json.zst) are read transparently, decompressing while parsing.
+
+Batch mode (--batch json/) converts a whole directory on a process pool,
+skipping workbooks that are already newer than their JSON; with
+--fleet-workbook it instead streams every device into one workbook whose
+sheets carry a leading Device column.
+
+Follow mode (--follow) reads the NDJSON progress events of
+f5_asbuilt.py --events - from stdin and converts each JSON as-built as
+soon as it is written, while the rest of the fleet is still collecting.
 """
 
 import argparse
 import json
 import os
+import re
 import sys
-from typing import Any, Dict, List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from openpyxl import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
+import f5_asbuilt_io
 
 # ----------------------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------------------
 
 
+def read_json(path: str) -> Dict[str, Any]:
+    """Plain, .gz or .zst JSON (see f5_asbuilt_io.py)."""
+    return f5_asbuilt_io.load_json(path)
+
+
 def load_json(path: str) -> Dict[str, Any]:
     if not os.path.exists(path):
         print(f"[ERROR] JSON file not found: {path}", file=sys.stderr)
         sys.exit(1)
-    with open(path, "r", encoding="utf-8") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"[ERROR] Failed to parse JSON: {e}", file=sys.stderr)
-            sys.exit(1)
+    try:
+        return read_json(path)
+    except json.JSONDecodeError as e:
+        print(f"[ERROR] Failed to parse JSON: {e}", file=sys.stderr)
+        sys.exit(1)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"[ERROR] Failed to read {path}: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 def default_excel_name(json_path: str) -> str:
-    base, _ = os.path.splitext(json_path)
+    base, _ = os.path.splitext(f5_asbuilt_io.strip_compression(json_path))
     # Modern Excel format; rename to .xls if you really need legacy extension
     return base + ".xlsx"
 
 
 # ----------------------------------------------------------------------
-# Sheet builders
+# Sheet rows
 # ----------------------------------------------------------------------
+#
+# Each sheet has a header list and a row generator taking the JSON data.
+# The per-device builders and the fleet workbook share them.
 
 
-def build_virtual_servers_sheet(
-    ws: Worksheet, virtual_servers: List[Dict[str, Any]]
-) -> None:
-    ws.title = "Virtual_Servers"
-    headers = [
-        "Name",
-        "IP",
-        "Port",
-        "Pool",
-        "Profiles",
-        "Persistence",
-        "iRules",
-    ]
-    ws.append(headers)
+VIRTUAL_SERVERS_HEADERS = [
+    "Name",
+    "IP",
+    "Port",
+    "Pool",
+    "Profiles",
+    "Persistence",
+    "iRules",
+]
+
 
-    for vs in virtual_servers:
+def virtual_servers_rows(data: Dict[str, Any]) -> Iterator[List[Any]]:
+    for vs in data.get("virtual_servers", []):
         profiles = ", ".join(vs.get("profiles") or [])
         persistence = ", ".join(vs.get("persistence") or [])
         irules = ", ".join(vs.get("irules") or [])
-        ws.append(
-            [
-                vs.get("name"),
-                vs.get("destination_ip"),
-                vs.get("destination_port"),
-                vs.get("pool"),
-                profiles,
-                persistence,
-                irules,
-            ]
-        )
-
-
-def build_pools_sheet(ws: Worksheet, pools: List[Dict[str, Any]]) -> None:
-    ws.title = "Pools"
-    headers = [
-        "Pool_Name",
-        "LB_Method",
-        "Monitor",
-        "Member_Name",
-        "Member_Address",
-        "Member_State",
-        "Member_Session",
-    ]
-    ws.append(headers)
-
-    for p in pools:
+        yield [
+            vs.get("name"),
+            vs.get("destination_ip"),
+            vs.get("destination_port"),
+            vs.get("pool"),
+            profiles,
+            persistence,
+            irules,
+        ]
+
+
+POOLS_HEADERS = [
+    "Pool_Name",
+    "LB_Method",
+    "Monitor",
+    "Member_Name",
+    "Member_Address",
+    "Member_State",
+    "Member_Session",
+]
+
+
+def pools_rows(data: Dict[str, Any]) -> Iterator[List[Any]]:
+    for p in data.get("pools", []):
         pool_name = p.get("name")
         lb_method = p.get("lb_method")
         monitor = p.get("monitor")
@@ -117,37 +142,232 @@ def build_pools_sheet(ws: Worksheet, pools: List[Dict[str, Any]]) -> None:
 
         if not members:
             # Pool with no members still gets one row
-            ws.append([pool_name, lb_method, monitor, None, None, None, None])
+            yield [pool_name, lb_method, monitor, None, None, None, None]
             continue
 
         for m in members:
-            ws.append(
-                [
-                    pool_name,
-                    lb_method,
-                    monitor,
-                    m.get("name"),
-                    m.get("address"),
-                    m.get("state"),
-                    m.get("session"),
-                ]
-            )
+            yield [
+                pool_name,
+                lb_method,
+                monitor,
+                m.get("name"),
+                m.get("address"),
+                m.get("state"),
+                m.get("session"),
+            ]
+
+
+NODES_HEADERS = ["Node_Name", "IP_Address", "State", "Session"]
+
+
+def nodes_rows(data: Dict[str, Any]) -> Iterator[List[Any]]:
+    for n in data.get("nodes", []):
+        yield [
+            n.get("name"),
+            n.get("address"),
+            n.get("state"),
+            n.get("session"),
+        ]
+
+
+MONITORS_HEADERS = ["Monitor_Name", "Type", "Partition", "Used_By_Pools"]
+
+
+def monitors_rows(data: Dict[str, Any]) -> Iterator[List[Any]]:
+    usage = data.get("usage", {}) or {}
+    monitor_usage: Dict[str, List[str]] = usage.get("monitor_usage", {}) or {}
+
+    for m in sorted(data.get("monitors", []), key=lambda x: x.get("name") or ""):
+        name = m.get("name")
+        used_by = ", ".join(monitor_usage.get(name, []))
+        yield [
+            name,
+            m.get("type"),
+            m.get("partition"),
+            used_by,
+        ]
+
+
+IRULES_HEADERS = [
+    "IRule_Name",
+    "Partition",
+    "Used_By_Virtual_Servers",
+    "Referenced_Pools",
+    "Referenced_Nodes",
+    "Referenced_Data_Groups",
+    "Referenced_Virtual_Servers",
+]
+
+
+def irules_rows(data: Dict[str, Any]) -> Iterator[List[Any]]:
+    usage = data.get("usage", {}) or {}
+    irule_usage: Dict[str, List[str]] = usage.get("irule_usage", {}) or {}
+    irule_refs: Dict[str, Dict[str, List[str]]] = (
+        usage.get("irule_references", {}) or {}
+    )
+
+    for r in sorted(data.get("irules", []), key=lambda x: x.get("name") or ""):
+        name = r.get("name")
+        used_by = ", ".join(irule_usage.get(name, []))
+        refs = irule_refs.get(name, {})
+        yield [
+            name,
+            r.get("partition"),
+            used_by,
+            ", ".join(refs.get("pools", [])),
+            ", ".join(refs.get("nodes", [])),
+            ", ".join(refs.get("classes", [])),
+            ", ".join(refs.get("virtuals", [])),
+        ]
+
+
+SSL_PROFILES_HEADERS = [
+    "Profile_Name",
+    "Partition",
+    "Certificate",
+    "Certificate_Expiration",
+    "Attached_Virtual_Servers",
+]
+
+
+def ssl_profiles_rows(data: Dict[str, Any]) -> Iterator[List[Any]]:
+    usage = data.get("usage", {}) or {}
+    ssl_usage: Dict[str, List[str]] = usage.get("ssl_profile_usage", {}) or {}
+
+    # Build map: cert_name -> expiration
+    cert_exp_map: Dict[str, str] = {}
+    for c in data.get("certificates", []):
+        # c["name"] is typically the object name; we match on last path part of profile["cert"]
+        cert_name = c.get("name")
+        cert_exp = c.get("expiration")
+        if cert_name:
+            cert_exp_map[cert_name] = cert_exp
+
+    for sp in sorted(data.get("ssl_profiles", []), key=lambda x: x.get("name") or ""):
+        name = sp.get("name")
+        cert_path = sp.get("cert")
+        cert_name = None
+        if cert_path:
+            cert_name = cert_path.split("/")[-1]
+
+        expiration = cert_exp_map.get(cert_name, None) if cert_name else None
+        attached_vips = ", ".join(ssl_usage.get(name, []))
+
+        yield [
+            name,
+            sp.get("partition"),
+            cert_path,
+            expiration,
+            attached_vips,
+        ]
+
+
+# JSON section -> sheet it is shown on
+SECTION_SHEETS = [
+    ("device_report", ""),
+    ("virtual_servers", "Virtual_Servers"),
+    ("pools", "Pools"),
+    ("nodes", "Nodes"),
+    ("monitors", "Monitors"),
+    ("irules", "IRules"),
+    ("ssl_profiles", "SSL_Profiles"),
+    ("certificates", "SSL_Profiles"),
+]
+
+COLLECTION_STATUS_HEADERS = ["Section", "Sheet", "Status"]
+
+
+def collection_status_rows(
+    data: Dict[str, Any], titles: Optional[Dict[str, str]] = None
+) -> Iterator[List[Any]]:
+    """titles: extra section -> sheet title, as assigned by extra_sheet_titles."""
+    incomplete = data.get("incomplete_sections") or []
+    if titles is None:
+        titles = extra_sheet_titles(data, {}, set())
+    sheets = SECTION_SHEETS + [
+        (name, titles[name]) for name in (data.get("extra_sections") or {})
+    ]
+    for section, sheet in sheets:
+        status = "INCOMPLETE" if section in incomplete else "complete"
+        yield [section, sheet, status]
+
+
+def extra_sheet_title(section: Dict[str, Any]) -> str:
+    """'GTM Wide IPs' -> 'GTM_Wide_IPs' (Excel allows 31 characters)."""
+    return re.sub(r"\W+", "_", section["title"]).strip("_")[:31]
+
+
+def extra_sheet_titles(
+    data: Dict[str, Any], titles: Dict[str, str], taken: Set[str]
+) -> Dict[str, str]:
+    """
+    Give each extra section of data not yet in titles its own sheet title.
+    Titles that clash with one in taken (lower-cased, as Excel compares
+    them) or with each other get a _2, _3, ... suffix. Updates and returns
+    titles.
+    """
+    for name, section in (data.get("extra_sections") or {}).items():
+        if name in titles:
+            continue
+        base = title = extra_sheet_title(section)
+        n = 1
+        while title.lower() in taken or title.lower() in RESERVED_SHEET_TITLES:
+            n += 1
+            suffix = f"_{n}"
+            title = base[: 31 - len(suffix)] + suffix
+        taken.add(title.lower())
+        titles[name] = title
+    return titles
+
+
+def extra_section_rows(section: Dict[str, Any]) -> Iterator[List[Any]]:
+    """Rows of a registered collector section (extra_sections in the JSON)."""
+    for row in section["rows"]:
+        yield [row.get(col) for col in section["columns"]]
+
+
+# Workbook layout: (sheet title, headers, row generator)
+SHEETS = [
+    ("Virtual_Servers", VIRTUAL_SERVERS_HEADERS, virtual_servers_rows),
+    ("Pools", POOLS_HEADERS, pools_rows),
+    ("Nodes", NODES_HEADERS, nodes_rows),
+    ("Monitors", MONITORS_HEADERS, monitors_rows),
+    ("IRules", IRULES_HEADERS, irules_rows),
+    ("SSL_Profiles", SSL_PROFILES_HEADERS, ssl_profiles_rows),
+]
+
+# Sheets an extra section must not take the title of (lower-cased)
+RESERVED_SHEET_TITLES = {title.lower() for title, _, _ in SHEETS} | {
+    "collection_status"
+}
+
+
+# ----------------------------------------------------------------------
+# Sheet builders
+# ----------------------------------------------------------------------
+
+
+def build_virtual_servers_sheet(
+    ws: Worksheet, virtual_servers: List[Dict[str, Any]]
+) -> None:
+    ws.title = "Virtual_Servers"
+    ws.append(VIRTUAL_SERVERS_HEADERS)
+    for row in virtual_servers_rows({"virtual_servers": virtual_servers}):
+        ws.append(row)
+
+
+def build_pools_sheet(ws: Worksheet, pools: List[Dict[str, Any]]) -> None:
+    ws.title = "Pools"
+    ws.append(POOLS_HEADERS)
+    for row in pools_rows({"pools": pools}):
+        ws.append(row)
 
 
 def build_nodes_sheet(ws: Worksheet, nodes: List[Dict[str, Any]]) -> None:
     ws.title = "Nodes"
-    headers = ["Node_Name", "IP_Address", "State", "Session"]
-    ws.append(headers)
-
-    for n in nodes:
-        ws.append(
-            [
-                n.get("name"),
-                n.get("address"),
-                n.get("state"),
-                n.get("session"),
-            ]
-        )
+    ws.append(NODES_HEADERS)
+    for row in nodes_rows({"nodes": nodes}):
+        ws.append(row)
 
 
 def build_monitors_sheet(
@@ -156,21 +376,9 @@ def build_monitors_sheet(
     usage: Dict[str, Any],
 ) -> None:
     ws.title = "Monitors"
-    monitor_usage: Dict[str, List[str]] = usage.get("monitor_usage", {}) or {}
-    headers = ["Monitor_Name", "Type", "Partition", "Used_By_Pools"]
-    ws.append(headers)
-
-    for m in sorted(monitors, key=lambda x: x.get("name") or ""):
-        name = m.get("name")
-        used_by = ", ".join(monitor_usage.get(name, []))
-        ws.append(
-            [
-                name,
-                m.get("type"),
-                m.get("partition"),
-                used_by,
-            ]
-        )
+    ws.append(MONITORS_HEADERS)
+    for row in monitors_rows({"monitors": monitors, "usage": usage}):
+        ws.append(row)
 
 
 def build_irules_sheet(
@@ -179,20 +387,9 @@ def build_irules_sheet(
     usage: Dict[str, Any],
 ) -> None:
     ws.title = "IRules"
-    irule_usage: Dict[str, List[str]] = usage.get("irule_usage", {}) or {}
-    headers = ["IRule_Name", "Partition", "Used_By_Virtual_Servers"]
-    ws.append(headers)
-
-    for r in sorted(irules, key=lambda x: x.get("name") or ""):
-        name = r.get("name")
-        used_by = ", ".join(irule_usage.get(name, []))
-        ws.append(
-            [
-                name,
-                r.get("partition"),
-                used_by,
-            ]
-        )
+    ws.append(IRULES_HEADERS)
+    for row in irules_rows({"irules": irules, "usage": usage}):
+        ws.append(row)
 
 
 def build_ssl_profiles_sheet(
@@ -202,45 +399,205 @@ def build_ssl_profiles_sheet(
     usage: Dict[str, Any],
 ) -> None:
     ws.title = "SSL_Profiles"
-    ssl_usage: Dict[str, List[str]] = usage.get("ssl_profile_usage", {}) or {}
+    ws.append(SSL_PROFILES_HEADERS)
+    data = {"ssl_profiles": ssl_profiles, "certificates": certificates, "usage": usage}
+    for row in ssl_profiles_rows(data):
+        ws.append(row)
 
-    # Build map: cert_name -> expiration
-    cert_exp_map: Dict[str, str] = {}
-    for c in certificates:
-        # c["name"] is typically the object name; we match on last path part of profile["cert"]
-        cert_name = c.get("name")
-        cert_exp = c.get("expiration")
-        if cert_name:
-            cert_exp_map[cert_name] = cert_exp
 
-    headers = [
-        "Profile_Name",
-        "Partition",
-        "Certificate",
-        "Certificate_Expiration",
-        "Attached_Virtual_Servers",
-    ]
-    ws.append(headers)
+def build_collection_status_sheet(ws: Worksheet, incomplete: List[str]) -> None:
+    ws.title = "Collection_Status"
+    ws.append(COLLECTION_STATUS_HEADERS)
+    for row in collection_status_rows({"incomplete_sections": incomplete}):
+        ws.append(row)
 
-    for sp in sorted(ssl_profiles, key=lambda x: x.get("name") or ""):
-        name = sp.get("name")
-        cert_path = sp.get("cert")
-        cert_name = None
-        if cert_path:
-            cert_name = cert_path.split("/")[-1]
 
-        expiration = cert_exp_map.get(cert_name, None) if cert_name else None
-        attached_vips = ", ".join(ssl_usage.get(name, []))
+# ----------------------------------------------------------------------
+# Workbooks
+# ----------------------------------------------------------------------
 
-        ws.append(
-            [
-                name,
-                sp.get("partition"),
-                cert_path,
-                expiration,
-                attached_vips,
-            ]
+
+def build_workbook(data: Dict[str, Any]) -> Workbook:
+    """Per-device workbook for one as-built JSON document."""
+    virtual_servers = data.get("virtual_servers", [])
+    pools = data.get("pools", [])
+    nodes = data.get("nodes", [])
+    monitors = data.get("monitors", [])
+    irules = data.get("irules", [])
+    ssl_profiles = data.get("ssl_profiles", [])
+    certificates = data.get("certificates", [])
+    usage = data.get("usage", {}) or {}
+
+    # Create workbook and sheets
+    wb = Workbook()
+    # Default sheet becomes Virtual_Servers
+    ws_vs = wb.active
+    build_virtual_servers_sheet(ws_vs, virtual_servers)
+
+    ws_pools = wb.create_sheet(title="Pools")
+    build_pools_sheet(ws_pools, pools)
+
+    ws_nodes = wb.create_sheet(title="Nodes")
+    build_nodes_sheet(ws_nodes, nodes)
+
+    ws_mon = wb.create_sheet(title="Monitors")
+    build_monitors_sheet(ws_mon, monitors, usage)
+
+    ws_irules = wb.create_sheet(title="IRules")
+    build_irules_sheet(ws_irules, irules, usage)
+
+    ws_ssl = wb.create_sheet(title="SSL_Profiles")
+    build_ssl_profiles_sheet(ws_ssl, ssl_profiles, certificates, usage)
+
+    # One sheet per registered collector section (net, GTM, APM, ASM, ...)
+    titles = extra_sheet_titles(data, {}, set())
+    for name, section in (data.get("extra_sections") or {}).items():
+        ws_extra = wb.create_sheet(title=titles[name])
+        ws_extra.append(section["columns"])
+        for row in extra_section_rows(section):
+            ws_extra.append(row)
+
+    # Only present when some sections timed out or failed
+    incomplete = data.get("incomplete_sections") or []
+    if incomplete:
+        ws_status = wb.create_sheet(title="Collection_Status")
+        build_collection_status_sheet(ws_status, incomplete)
+
+    return wb
+
+
+def convert_file(json_path: str, out_path: str) -> str:
+    """Convert one JSON file; returns out_path. Runs in batch worker processes."""
+    build_workbook(read_json(json_path)).save(out_path)
+    return out_path
+
+
+def build_fleet_workbook(json_paths: List[str], out_path: str) -> int:
+    """
+    One workbook for many devices: every sheet gets a leading Device column.
+    The workbook is written in write-only (streaming) mode and the JSON
+    files are read one at a time, so memory stays flat with fleet size.
+    Returns the number of devices included.
+    """
+    wb = Workbook(write_only=True)
+    sheets = []
+    for title, headers, _ in SHEETS:
+        ws = wb.create_sheet(title=title)
+        ws.append(["Device", *headers])
+        sheets.append(ws)
+
+    extra_sheets: Dict[str, Any] = {}
+    titles: Dict[str, str] = {}
+    taken: Set[str] = set()
+    status_rows: List[List[Any]] = []
+    included = 0
+    for path in json_paths:
+        try:
+            data = read_json(path)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"[WARN] Skipping {path}: {e}", file=sys.stderr)
+            continue
+        device = f5_asbuilt_io.device_label(path, data)
+        for ws, (_, _, rows) in zip(sheets, SHEETS):
+            for row in rows(data):
+                ws.append([device, *row])
+        # Registered collector sheets appear when the first device has them
+        extra_sheet_titles(data, titles, taken)
+        for name, section in (data.get("extra_sections") or {}).items():
+            title = titles[name]
+            if title not in extra_sheets:
+                extra_sheets[title] = wb.create_sheet(title=title)
+                extra_sheets[title].append(["Device", *section["columns"]])
+            for row in extra_section_rows(section):
+                extra_sheets[title].append([device, *row])
+        if data.get("incomplete_sections"):
+            status_rows.extend(
+                [device, *row] for row in collection_status_rows(data, titles)
+            )
+        included += 1
+
+    if status_rows:
+        ws = wb.create_sheet(title="Collection_Status")
+        ws.append(["Device", *COLLECTION_STATUS_HEADERS])
+        for row in status_rows:
+            ws.append(row)
+
+    wb.save(out_path)
+    return included
+
+
+def convert_batch(json_dir: str, out_dir: str, jobs: int, force: bool) -> int:
+    """
+    Convert every *.json (.json.gz, .json.zst) in json_dir into out_dir on a process pool,
+    skipping files whose workbook is newer than the JSON. Returns the
+    number of failures.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    pending: List[Tuple[str, str]] = []
+    skipped = 0
+    for json_path in f5_asbuilt_io.list_json_files([json_dir]):
+        out_path = os.path.join(
+            out_dir, default_excel_name(os.path.basename(json_path))
         )
+        if (
+            not force
+            and os.path.exists(out_path)
+            and os.path.getmtime(out_path) >= os.path.getmtime(json_path)
+        ):
+            skipped += 1
+            continue
+        pending.append((json_path, out_path))
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(convert_file, j, o): j for j, o in pending}
+        for fut in as_completed(futures):
+            try:
+                print(f"Wrote Excel workbook to: {fut.result()}")
+            except Exception as e:
+                failures += 1
+                print(f"[ERROR] Failed to convert {futures[fut]}: {e}", file=sys.stderr)
+
+    print(
+        f"Converted {len(pending) - failures} file(s), "
+        f"skipped {skipped} up-to-date, {failures} failed."
+    )
+    return failures
+
+
+def convert_events(events: Iterable[str], out_dir: str, jobs: int) -> int:
+    """
+    Convert every JSON file announced by a 'file_written' event (NDJSON
+    lines from f5_asbuilt.py --events) on a process pool, starting each
+    one as soon as its event arrives. Returns the number of failures.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Runs on the pool's callback thread: report only, count below
+    def done(fut: Any) -> None:
+        try:
+            print(f"Wrote Excel workbook to: {fut.result()}")
+        except Exception as e:
+            print(f"[ERROR] Failed to convert {futures[fut]}: {e}", file=sys.stderr)
+
+    futures: Dict[Any, str] = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for line in events:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # not an event line
+            if event.get("event") != "file_written" or event.get("format") != "json":
+                continue
+            json_path = event["path"]
+            out_path = os.path.join(
+                out_dir, default_excel_name(os.path.basename(json_path))
+            )
+            fut = pool.submit(convert_file, json_path, out_path)
+            futures[fut] = json_path
+            fut.add_done_callback(done)
+    # The pool has shut down, so every future is finished
+    return sum(1 for fut in futures if fut.exception() is not None)
 
 
 # ----------------------------------------------------------------------
@@ -252,12 +609,47 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="F5 As-Built JSON → Excel generator")
     parser.add_argument(
         "json_file",
-        help="Path to JSON file generated by f5_asbuilt.py --format json",
+        nargs="?",
+        help="Path to JSON file generated by f5_asbuilt.py --format json "
+        "(.json, .json.gz or .json.zst)",
     )
     parser.add_argument(
         "-o",
         "--output",
-        help="Output Excel filename (default: same as JSON with .xlsx)",
+        help="Output Excel filename (default: same as JSON with .xlsx); "
+        "with --batch, the output directory (default: xls)",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        metavar="JSON_DIR",
+        help="Convert every *.json (also .json.gz / .json.zst) in JSON_DIR "
+        "(e.g. json/) in parallel",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for --batch and --follow (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="With --batch, also convert files whose workbook is up to date",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Read f5_asbuilt.py --events NDJSON from stdin and convert each "
+        "JSON as-built as soon as it is written (output directory: -o, "
+        "default: xls)",
+    )
+    parser.add_argument(
+        "--fleet-workbook",
+        metavar="XLSX",
+        help="With --batch, write one consolidated workbook with a Device "
+        "column instead of one workbook per device",
     )
     return parser.parse_args()
 
@@ -265,6 +657,35 @@ def parse_args() -> argparse.Namespace:
 def main() -> None:
     args = parse_args()
 
+    if args.follow:
+        failures = convert_events(sys.stdin, args.output or "xls", max(1, args.jobs))
+        if failures:
+            sys.exit(1)
+        return
+
+    if args.batch:
+        if not os.path.isdir(args.batch):
+            print(f"[ERROR] Directory not found: {args.batch}", file=sys.stderr)
+            sys.exit(1)
+        if args.fleet_workbook:
+            included = build_fleet_workbook(
+                f5_asbuilt_io.list_json_files([args.batch]), args.fleet_workbook
+            )
+            print(
+                f"Wrote fleet workbook ({included} devices) to: {args.fleet_workbook}"
+            )
+            return
+        failures = convert_batch(
+            args.batch, args.output or "xls", max(1, args.jobs), args.force
+        )
+        if failures:
+            sys.exit(1)
+        return
+
+    if not args.json_file:
+        print("[ERROR] Pass a JSON file or --batch <dir>.", file=sys.stderr)
+        sys.exit(1)
+
     # Resolve JSON path:
     # 1) if args.json_file exists as-is, use it
     # 2) otherwise, try ./json/<args.json_file>
@@ -281,37 +702,7 @@ def main() -> None:
             sys.exit(1)
 
     data = load_json(json_path)
-
-    device_report = data.get("device_report", {})
-    virtual_servers = data.get("virtual_servers", [])
-    pools = data.get("pools", [])
-    nodes = data.get("nodes", [])
-    monitors = data.get("monitors", [])
-    irules = data.get("irules", [])
-    ssl_profiles = data.get("ssl_profiles", [])
-    certificates = data.get("certificates", [])
-    usage = data.get("usage", {}) or {}
-
-    # Create workbook and sheets
-    wb = Workbook()
-    # Default sheet becomes Virtual_Servers
-    ws_vs = wb.active
-    build_virtual_servers_sheet(ws_vs, virtual_servers)
-
-    ws_pools = wb.create_sheet(title="Pools")
-    build_pools_sheet(ws_pools, pools)
-
-    ws_nodes = wb.create_sheet(title="Nodes")
-    build_nodes_sheet(ws_nodes, nodes)
-
-    ws_mon = wb.create_sheet(title="Monitors")
-    build_monitors_sheet(ws_mon, monitors, usage)
-
-    ws_irules = wb.create_sheet(title="IRules")
-    build_irules_sheet(ws_irules, irules, usage)
-
-    ws_ssl = wb.create_sheet(title="SSL_Profiles")
-    build_ssl_profiles_sheet(ws_ssl, ssl_profiles, certificates, usage)
+    wb = build_workbook(data)
 
     # Determine output filename + default XLS directory
     if args.output:
@@ -0,0 +1,220 @@
+import ipaddress
+import json
+
+import pytest
+
+import f5_asbuilt_addr
+from f5_asbuilt_addr import (
+    AddressIndex,
+    format_key,
+    iter_addresses,
+    load_index,
+    parse_address,
+    parse_query,
+)
+
+
+def ip_int(ip):
+    return int(ipaddress.ip_address(ip))
+
+
+@pytest.mark.parametrize(
+    "address, route_domain, key",
+    [
+        ("10.1.1.10", None, (0, 4, ip_int("10.1.1.10"))),
+        ("10.1.1.10%3", None, (3, 4, ip_int("10.1.1.10"))),
+        # the partition default applies only without '%<id>'
+        ("10.1.1.10", 3, (3, 4, ip_int("10.1.1.10"))),
+        ("10.1.1.10%5", 3, (5, 4, ip_int("10.1.1.10"))),
+        ("10.1.1.10%0", 3, (0, 4, ip_int("10.1.1.10"))),
+        ("2001:db8::10%2", None, (2, 6, ip_int("2001:db8::10"))),
+        ("2001:db8::10", 4, (4, 6, ip_int("2001:db8::10"))),
+        ("app.example.com", 3, None),
+        ("", None, None),
+        (None, None, None),
+    ],
+)
+def test_parse_address(address, route_domain, key):
+    assert parse_address(address, route_domain) == key
+
+
+@pytest.mark.parametrize(
+    "prefix, addr_range, query",
+    [
+        ("10.20.0.0/16", None, (4, ip_int("10.20.0.0"), ip_int("10.20.255.255"))),
+        # host bits are ignored
+        ("10.20.30.40/24", None, (4, ip_int("10.20.30.0"), ip_int("10.20.30.255"))),
+        ("10.1.1.10/32", None, (4, ip_int("10.1.1.10"), ip_int("10.1.1.10"))),
+        ("2001:db8::/126", None, (6, ip_int("2001:db8::"), ip_int("2001:db8::3"))),
+        (None, "10.1.1.1-10.1.1.50", (4, ip_int("10.1.1.1"), ip_int("10.1.1.50"))),
+        (None, "10.1.1.50 - 10.1.1.1", (4, ip_int("10.1.1.1"), ip_int("10.1.1.50"))),
+        (None, "10.1.1.7", (4, ip_int("10.1.1.7"), ip_int("10.1.1.7"))),
+    ],
+)
+def test_parse_query(prefix, addr_range, query):
+    assert parse_query(prefix, addr_range) == query
+
+
+@pytest.mark.parametrize(
+    "prefix, addr_range",
+    [
+        (None, "10.1.1.1-2001:db8::1"),
+        (None, "10.1.1.1-not-an-ip"),
+        ("10.1.1.0/33", None),
+    ],
+)
+def test_parse_query_invalid(prefix, addr_range):
+    with pytest.raises(ValueError):
+        parse_query(prefix, addr_range)
+
+
+@pytest.mark.parametrize(
+    "key, text",
+    [
+        ((0, 4, ip_int("10.1.1.10")), "10.1.1.10"),
+        ((3, 4, ip_int("10.1.1.10")), "10.1.1.10%3"),
+        ((2, 6, ip_int("2001:db8::10")), "2001:db8::10%2"),
+    ],
+)
+def test_format_key(key, text):
+    assert format_key(key) == text
+
+
+DEVICE = {
+    "device_report": {"default_route_domains": {"Common": 0, "Tenant1": 3}},
+    "virtual_servers": [
+        {
+            "name": "vs_common",
+            "partition": "Common",
+            "destination_ip": "10.1.1.10",
+            "destination_port": "443",
+            "route_domain": None,
+            "pool": "pool_common",
+        },
+        {
+            "name": "vs_tenant",
+            "partition": "Tenant1",
+            "destination_ip": "10.1.1.10",
+            "destination_port": "443",
+            "route_domain": None,
+            "pool": "pool_tenant",
+        },
+        {
+            "name": "vs_explicit",
+            "partition": "Tenant1",
+            "destination_ip": "10.1.1.20",
+            "destination_port": "80",
+            "route_domain": 5,
+            "pool": None,
+        },
+    ],
+    "pools": [
+        {
+            "name": "pool_tenant",
+            "partition": "Tenant1",
+            "members": [
+                {"name": "web1:80", "address": "10.2.0.1"},
+                {"name": "web2%7:80", "address": "10.2.0.2%7"},
+                {"name": "2001:db8::6.80", "address": "2001:db8::6"},
+            ],
+        }
+    ],
+    "nodes": [
+        {"name": "web1", "partition": "Tenant1", "address": "10.2.0.1"},
+        {"name": "shared", "partition": "Common", "address": "10.2.0.9"},
+        {"name": "fqdn", "partition": "Tenant1", "address": "app.example.com"},
+    ],
+}
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (
+            DEVICE,
+            [
+                ("vip", "vs_common", "10.1.1.10", None),
+                ("vip", "vs_tenant", "10.1.1.10%3", None),
+                ("vip", "vs_explicit", "10.1.1.20%5", None),
+                ("member", "web1:80", "10.2.0.1%3", "80"),
+                ("member", "web2%7:80", "10.2.0.2%7", "80"),
+                ("member", "2001:db8::6.80", "2001:db8::6%3", "80"),
+                ("node", "web1", "10.2.0.1%3", None),
+                ("node", "shared", "10.2.0.9", None),
+            ],
+        ),
+        # JSON written before default route domains were recorded
+        (
+            {**DEVICE, "device_report": {"hostname": "bigip1"}},
+            [
+                ("vip", "vs_common", "10.1.1.10", None),
+                ("vip", "vs_tenant", "10.1.1.10", None),
+                ("vip", "vs_explicit", "10.1.1.20%5", None),
+                ("member", "web1:80", "10.2.0.1", "80"),
+                ("member", "web2%7:80", "10.2.0.2%7", "80"),
+                ("member", "2001:db8::6.80", "2001:db8::6", "80"),
+                ("node", "web1", "10.2.0.1", None),
+                ("node", "shared", "10.2.0.9", None),
+            ],
+        ),
+    ],
+)
+def test_iter_addresses(data, expected):
+    found = [
+        (
+            rec["kind"],
+            rec["name"],
+            format_key(key),
+            rec["port"] if rec["kind"] == "member" else None,
+        )
+        for key, rec in iter_addresses("bigip1", data)
+    ]
+    assert found == expected
+
+
+@pytest.mark.parametrize(
+    "query, route_domain, kinds, names",
+    [
+        ("10.1.1.10/32", None, None, ["vs_common", "vs_tenant"]),
+        ("10.1.1.10/32", 3, None, ["vs_tenant"]),
+        ("10.1.1.10/32", 0, None, ["vs_common"]),
+        ("10.1.1.0/24", 5, None, ["vs_explicit"]),
+        ("10.2.0.0/24", 3, None, ["web1:80", "web1"]),
+        ("10.2.0.0/24", 3, ["node"], ["web1"]),
+        ("10.2.0.0/16", None, ["member"], ["web1:80", "web2%7:80"]),
+        ("10.2.0.1-10.2.0.9", 0, None, ["shared"]),
+        ("2001:db8::/64", None, None, ["2001:db8::6.80"]),
+        ("192.168.0.0/16", None, None, []),
+        ("10.1.1.10/32", 9, None, []),
+    ],
+)
+def test_index_query(query, route_domain, kinds, names):
+    index = AddressIndex.build([("bigip1", DEVICE)])
+    if "/" in query:
+        version, low, high = parse_query(query, None)
+    else:
+        version, low, high = parse_query(None, query)
+    matches = index.query(version, low, high, route_domain, kinds)
+    assert [m["name"] for m in matches] == names
+
+
+@pytest.mark.parametrize("format_changed", [False, True])
+def test_load_index_cache(tmp_path, monkeypatch, format_changed):
+    monkeypatch.setattr(f5_asbuilt_addr, "CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "f5_bigip1_asbuilt.json"
+    path.write_text(json.dumps(DEVICE))
+    first = load_index([str(path)])
+    assert first.devices == ["bigip1"]
+
+    built = []
+    build = AddressIndex.build.__func__
+    monkeypatch.setattr(
+        AddressIndex,
+        "build",
+        classmethod(lambda cls, docs: built.append(docs) or build(cls, docs)),
+    )
+    if format_changed:
+        monkeypatch.setattr(f5_asbuilt_addr, "INDEX_CACHE_FORMAT", 0)
+    second = load_index([str(path)])
+    assert second.keys == first.keys
+    assert len(built) == (1 if format_changed else 0)
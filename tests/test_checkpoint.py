@@ -0,0 +1,179 @@
+import json
+import os
+
+import pytest
+import requests
+
+import f5_asbuilt
+from f5_asbuilt import FleetCheckpoint, run_fleet
+
+DEVICES = [{"name": n, "host": n} for n in ("bigip1", "bigip2", "bigip3")]
+OPTIONS = {"format": "json"}
+
+
+class FakeClient:
+    def __init__(self, name):
+        self.name = name
+
+    def start_budget(self):
+        pass
+
+
+@pytest.fixture
+def fleet(tmp_path, monkeypatch):
+    """
+    run_fleet() with a checkpoint under tmp_path and the device I/O
+    replaced: devices in 'fail' raise during collection, devices in
+    'partial' come back with an incomplete section.
+    """
+    monkeypatch.setattr(f5_asbuilt, "STATE_DIR", str(tmp_path / "state"))
+    fail = set()
+    partial = set()
+    collected = []
+    sections = {}
+
+    def device_info(client):
+        return {
+            "hostname": client.name,
+            "sync_group": None,
+            "sync_status": "Standalone",
+            "partitions": ["Common"],
+        }
+
+    def collect_config(client, info, done_sections=None, on_section=None, **kwargs):
+        collected.append(client.name)
+        sections[client.name] = done_sections
+        if on_section:
+            on_section("virtuals", {"virtuals": []})
+        if client.name in fail:
+            raise requests.HTTPError("500 Server Error")
+        incomplete = ["pools"] if client.name in partial else []
+        return {"nodes": [], "pools": [], "incomplete": incomplete}
+
+    def write_output(device, *args, **kwargs):
+        path = tmp_path / f"{device['name']}.json"
+        path.write_text("{}")
+        return str(path)
+
+    monkeypatch.setitem(f5_asbuilt.BACKENDS, "rest", (device_info, None))
+    monkeypatch.setattr(
+        f5_asbuilt, "make_client", lambda device, *a, **kw: FakeClient(device["name"])
+    )
+    monkeypatch.setattr(f5_asbuilt, "collect_config", collect_config)
+    monkeypatch.setattr(f5_asbuilt, "write_output", write_output)
+    monkeypatch.setattr(f5_asbuilt, "build_usage_maps", lambda ltm: {})
+    monkeypatch.setattr(f5_asbuilt, "remember_concurrency_limit", lambda c: None)
+
+    def run(resume=False, section_checkpoints=False):
+        collected.clear()
+        checkpoint = FleetCheckpoint(
+            DEVICES, OPTIONS, resume=resume, sections=section_checkpoints
+        )
+        failures = run_fleet(DEVICES, "u", "p", False, "json", 2, checkpoint=checkpoint)
+        return failures, sorted(collected), checkpoint
+
+    run.fail = fail
+    run.partial = partial
+    run.sections = sections
+    run.output = lambda name: tmp_path / f"{name}.json"
+    return run
+
+
+@pytest.mark.parametrize(
+    "fail, partial, first_failures, resumed",
+    [
+        # everything written: the checkpoint is dropped, a resume starts over
+        (set(), set(), 0, ["bigip1", "bigip2", "bigip3"]),
+        ({"bigip2"}, set(), 1, ["bigip2"]),
+        ({"bigip1", "bigip3"}, set(), 2, ["bigip1", "bigip3"]),
+        # written but incomplete: collected again
+        (set(), {"bigip3"}, 0, ["bigip3"]),
+    ],
+)
+def test_resume_skips_done_devices(fleet, fail, partial, first_failures, resumed):
+    fleet.fail.update(fail)
+    fleet.partial.update(partial)
+    failures, collected, _ = fleet()
+    assert failures == first_failures
+    assert collected == ["bigip1", "bigip2", "bigip3"]
+
+    fleet.fail.clear()
+    fleet.partial.clear()
+    failures, collected, checkpoint = fleet(resume=True)
+    assert failures == 0
+    assert collected == resumed
+    # every device is done now, so the checkpoint is gone
+    assert not os.path.exists(checkpoint.path)
+
+
+def test_resume_redoes_device_whose_output_is_gone(fleet):
+    fleet.fail.add("bigip2")
+    fleet()
+    os.remove(fleet.output("bigip1"))
+    fleet.fail.clear()
+    _, collected, _ = fleet(resume=True)
+    assert collected == ["bigip1", "bigip2"]
+
+
+def test_without_resume_the_checkpoint_is_discarded(fleet):
+    fleet.fail.add("bigip2")
+    fleet()
+    fleet.fail.clear()
+    _, collected, _ = fleet(resume=False)
+    assert collected == ["bigip1", "bigip2", "bigip3"]
+
+
+def test_failed_device_resumes_from_its_sections(fleet):
+    fleet.fail.add("bigip2")
+    fleet(section_checkpoints=True)
+    fleet.fail.clear()
+    _, collected, _ = fleet(resume=True, section_checkpoints=True)
+    assert collected == ["bigip2"]
+    assert fleet.sections["bigip2"] == {"virtuals": {"virtuals": []}}
+
+
+@pytest.mark.parametrize(
+    "done, sections",
+    [
+        ("{not json", None),
+        ("[]", None),
+        ('"bigip1"', None),
+        ('{"bigip1": "done", "bigip3": {"finished": 1}}', None),
+        ('{"bigip1": {"output": 42}}', "{not json"),
+        (None, '["virtuals"]'),
+        (None, '{"virtuals": "oops"}'),
+    ],
+)
+def test_corrupt_checkpoint_is_ignored(fleet, done, sections):
+    fleet.fail.add("bigip2")
+    _, _, checkpoint = fleet(section_checkpoints=True)
+    if done is not None:
+        with open(os.path.join(checkpoint.path, "done.json"), "w") as f:
+            f.write(done)
+    if sections is not None:
+        with open(checkpoint._section_path("bigip2"), "w") as f:
+            f.write(sections)
+
+    fleet.fail.clear()
+    failures, collected, _ = fleet(resume=True, section_checkpoints=True)
+    assert failures == 0
+    if done is None:
+        assert collected == ["bigip2"]
+    else:
+        assert collected == ["bigip1", "bigip2", "bigip3"]
+    if sections is None:
+        assert fleet.sections["bigip2"] == {"virtuals": {"virtuals": []}}
+    else:
+        assert fleet.sections["bigip2"] == {}
+
+
+def test_mismatched_checkpoint_starts_fresh(fleet, capsys):
+    fleet.fail.add("bigip2")
+    _, _, checkpoint = fleet()
+    # another selection or other options have their own checkpoint
+    other = FleetCheckpoint(DEVICES[:2], OPTIONS, resume=True)
+    assert other.path != checkpoint.path
+    assert other.done == {}
+    assert "No checkpoint" in capsys.readouterr().err
+    with open(os.path.join(checkpoint.path, "done.json"), encoding="utf-8") as f:
+        assert sorted(json.load(f)) == ["bigip1", "bigip3"]
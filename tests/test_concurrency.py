@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+import pytest
+import requests
+
+from f5_asbuilt import ConcurrencyLimiter, F5Client
+
+
+@pytest.mark.parametrize(
+    "concurrency, max_concurrency, adaptive, maximum",
+    [
+        (4, None, True, 4),
+        (2, None, True, 2),
+        (4, 6, True, 6),
+        (4, 2, True, 2),
+        (4, 6, False, 4),
+        (12, None, True, 12),
+    ],
+)
+def test_client_ceiling(concurrency, max_concurrency, adaptive, maximum):
+    client = F5Client(
+        "https://bigip1",
+        "u",
+        "p",
+        concurrency=concurrency,
+        max_concurrency=max_concurrency,
+        adaptive=adaptive,
+    )
+    assert client.limiter.maximum == maximum
+    assert client.concurrency == maximum
+    assert client.limiter.limit == min(concurrency, maximum)
+
+
+def test_limit_never_exceeds_concurrency_by_default():
+    client = F5Client("https://bigip1", "u", "p", concurrency=3, adaptive=True)
+    for _ in range(50):
+        client.limiter.acquire()
+        client.limiter.release("tm/ltm/pool", 0.01)
+    assert client.limiter.limit == 3
+
+
+@pytest.mark.parametrize(
+    "warmup, endpoint, latency, cut",
+    [
+        # a big partition shard is not congestion compared to a small one
+        (
+            "tm/ltm/pool?$filter=partition eq A",
+            "tm/ltm/pool?$filter=partition eq B",
+            2.0,
+            False,
+        ),
+        (
+            "tm/ltm/pool?$filter=partition eq A",
+            "tm/ltm/pool?$filter=partition eq A",
+            2.0,
+            True,
+        ),
+        ("tm/ltm/pool", "tm/ltm/pool", 2.0, True),
+        # below LATENCY_FLOOR
+        ("tm/ltm/pool", "tm/ltm/pool", 0.4, False),
+    ],
+)
+def test_latency_is_compared_per_endpoint(warmup, endpoint, latency, cut):
+    limiter = ConcurrencyLimiter(4, 8)
+    limiter.acquire()
+    limiter.release(warmup, 0.1)
+    before = limiter.limit
+    limiter.acquire()
+    limiter.release(endpoint, latency)
+    assert (limiter.limit < before) == cut
+
+
+class FakeResponse:
+    status_code = 200
+    content = b"{}"
+    elapsed = timedelta(seconds=0.1)
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"items": []}
+
+
+@pytest.mark.parametrize(
+    "params, endpoint",
+    [
+        (None, "tm/ltm/pool"),
+        ({}, "tm/ltm/pool"),
+        (
+            {"$select": "name", "$filter": "partition eq A"},
+            "tm/ltm/pool?%24filter=partition+eq+A&%24select=name",
+        ),
+    ],
+)
+def test_send_releases_endpoint_with_params(monkeypatch, params, endpoint):
+    client = F5Client("https://bigip1", "u", "p", adaptive=True)
+    released = []
+    monkeypatch.setattr(
+        client.limiter,
+        "release",
+        lambda key, latency=None, overloaded=False: released.append(key),
+    )
+    monkeypatch.setattr(client.session, "request", lambda *a, **kw: FakeResponse())
+    client.get_collection("tm/ltm/pool", params=params)
+    assert released == [endpoint]
+
+
+def test_deadline_releases_endpoint(monkeypatch):
+    client = F5Client("https://bigip1", "u", "p", budget=0.0)
+    released = []
+    monkeypatch.setattr(
+        client.limiter,
+        "release",
+        lambda key, latency=None, overloaded=False: released.append((key, latency)),
+    )
+    with pytest.raises(requests.Timeout):
+        client.get_collection("tm/ltm/pool", params={"$select": "name"})
+    assert released == [("tm/ltm/pool?%24select=name", None)]
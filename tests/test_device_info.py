@@ -0,0 +1,125 @@
+import pytest
+import requests
+
+from f5_asbuilt import (
+    DeadlineExceeded,
+    collect_device_info,
+    mark_device_info_incomplete,
+)
+
+RESPONSES = {
+    "tm/sys/global-settings": {"hostname": "bigip1.example.com"},
+    "tm/sys/version": {
+        "entries": {
+            "0": {"nestedStats": {"entries": {"Version": {"description": "17.1.1"}}}}
+        }
+    },
+    "tm/cm/device": [
+        {"name": "bigip2", "selfDevice": "false"},
+        {
+            "name": "bigip1",
+            "selfDevice": "true",
+            "failoverState": "active",
+            "configSyncGroup": "dg1",
+        },
+    ],
+    "tm/cm/sync-status": {
+        "entries": {
+            "0": {"nestedStats": {"entries": {"status": {"description": "In Sync"}}}}
+        }
+    },
+    "tm/auth/partition": [
+        {"name": "Common", "defaultRouteDomain": 0},
+        {"name": "Tenant1", "defaultRouteDomain": 3},
+    ],
+}
+
+
+class FakeClient:
+    base_url = "https://bigip1/mgmt/"
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+
+    def _get(self, path):
+        if path in self.errors:
+            raise self.errors[path]
+        return RESPONSES[path]
+
+    def get_object(self, path, params=None):
+        return self._get(path)
+
+    def get_collection(self, path, params=None):
+        return self._get(path)
+
+
+COMPLETE = {
+    "hostname": "bigip1.example.com",
+    "version": "17.1.1",
+    "ha_status": "active",
+    "sync_group": "dg1",
+    "sync_status": "In Sync",
+    "trust_devices": ["bigip1", "bigip2"],
+    "partitions": ["Common", "Tenant1"],
+    "default_route_domains": {"Common": 0, "Tenant1": 3},
+}
+
+
+@pytest.mark.parametrize(
+    "errors, changed, incomplete",
+    [
+        ({}, {}, None),
+        (
+            {"tm/sys/global-settings": requests.HTTPError("404")},
+            {"hostname": "unknown"},
+            None,
+        ),
+        ({"tm/sys/version": ValueError("bad JSON")}, {"version": "unknown"}, None),
+        (
+            {"tm/cm/device": requests.HTTPError("401")},
+            {"ha_status": "unknown", "sync_group": "unknown", "trust_devices": []},
+            None,
+        ),
+        (
+            {"tm/cm/sync-status": requests.ReadTimeout("timed out")},
+            {"sync_status": "unknown"},
+            ["sync_status"],
+        ),
+        (
+            {
+                "tm/sys/version": requests.ReadTimeout("timed out"),
+                "tm/auth/partition": DeadlineExceeded("budget exhausted"),
+            },
+            {"version": "unknown", "partitions": [], "default_route_domains": {}},
+            ["version", "partitions"],
+        ),
+    ],
+)
+def test_collect_device_info(errors, changed, incomplete):
+    info = collect_device_info(FakeClient(errors))
+    expected = {**COMPLETE, **changed}
+    if incomplete:
+        expected["incomplete"] = incomplete
+    assert info == expected
+
+
+def test_connection_errors_propagate():
+    client = FakeClient({"tm/sys/version": requests.ConnectionError("reset")})
+    with pytest.raises(requests.ConnectionError):
+        collect_device_info(client)
+
+
+@pytest.mark.parametrize(
+    "info, incomplete, expected",
+    [
+        ({}, ["pools"], ["pools"]),
+        ({"incomplete": ["version"]}, [], ["device_report"]),
+        ({"incomplete": ["version"]}, ["pools"], ["pools", "device_report"]),
+        ({"incomplete": ["version"]}, ["device_report"], ["device_report"]),
+    ],
+)
+def test_mark_device_info_incomplete(info, incomplete, expected):
+    shared = {"pools": [], "incomplete": incomplete}
+    result = mark_device_info_incomplete(info, shared)
+    assert result["incomplete"] == expected
+    assert shared["incomplete"] == incomplete
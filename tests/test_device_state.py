@@ -0,0 +1,119 @@
+import pytest
+import requests
+
+import f5_asbuilt
+from f5_asbuilt import apply_device_state, collect_device_state
+
+NODES = [
+    {"name": "n1", "partition": "Common", "state": "down", "session": "user-disabled"}
+]
+POOLS = [
+    {
+        "name": "p1",
+        "partition": "Common",
+        "membersReference": {
+            "items": [{"name": "n1:80", "state": "down", "session": "user-disabled"}]
+        },
+    }
+]
+
+SHARED = {
+    "nodes": [
+        {"name": "n1", "partition": "Common", "state": "up", "session": "enabled"}
+    ],
+    "pools": [
+        {
+            "name": "p1",
+            "partition": "Common",
+            "members": [{"name": "n1:80", "state": "up", "session": "enabled"}],
+        }
+    ],
+    "incomplete": [],
+}
+
+
+class FakeClient:
+    base_url = "https://bigip2/mgmt/"
+
+
+@pytest.fixture
+def fetch(monkeypatch):
+    timeouts = set()
+
+    def fetch_collection(client, path, params=None, partitions=None):
+        if path in timeouts:
+            raise requests.ReadTimeout("timed out")
+        return {"tm/ltm/node": NODES, "tm/ltm/pool": POOLS}[path]
+
+    monkeypatch.setattr(f5_asbuilt, "fetch_collection", fetch_collection)
+    return timeouts
+
+
+@pytest.mark.parametrize(
+    "timeouts, node_state, member_state, incomplete",
+    [
+        (set(), "down", "down", []),
+        ({"tm/ltm/node"}, "unknown", "down", ["nodes"]),
+        ({"tm/ltm/pool"}, "down", "unknown", ["pools"]),
+        ({"tm/ltm/node", "tm/ltm/pool"}, "unknown", "unknown", ["nodes", "pools"]),
+    ],
+)
+def test_state_timeouts_are_partial(
+    fetch, timeouts, node_state, member_state, incomplete
+):
+    fetch.update(timeouts)
+    state = collect_device_state(FakeClient())
+    assert state["incomplete"] == incomplete
+
+    result = apply_device_state(SHARED, state)
+    assert result["nodes"][0]["state"] == node_state
+    assert result["pools"][0]["members"][0]["state"] == member_state
+    assert result["incomplete"] == incomplete
+    # the shared config is not modified
+    assert SHARED["nodes"][0]["state"] == "up"
+    assert SHARED["incomplete"] == []
+
+
+def test_incomplete_sections_are_merged():
+    shared = {**SHARED, "incomplete": ["monitors", "pools", "net_vlans"]}
+    state = {
+        "nodes": {},
+        "members": {},
+        "extra": {"net_vlans": {}},
+        "incomplete": ["pools"],
+    }
+    assert apply_device_state(shared, state)["incomplete"] == ["monitors", "pools"]
+
+
+@pytest.mark.parametrize(
+    "nodes, members, node_state, member_state",
+    [
+        (
+            {("Common", "n1"): ("down", "user-disabled")},
+            {("Common", "p1", "n1:80"): ("down", "user-disabled")},
+            ("down", "user-disabled"),
+            ("down", "user-disabled"),
+        ),
+        # objects the device's state lacks are not shown with the leader's state
+        (
+            {},
+            {("Common", "p1", "n1:80"): ("down", "user-disabled")},
+            ("unknown", "unknown"),
+            ("down", "user-disabled"),
+        ),
+        (
+            {("Common", "n1"): ("down", "user-disabled")},
+            {("Common", "p1", "other:80"): ("down", "user-disabled")},
+            ("down", "user-disabled"),
+            ("unknown", "unknown"),
+        ),
+        ({}, {}, ("unknown", "unknown"), ("unknown", "unknown")),
+    ],
+)
+def test_missing_state_is_unknown(nodes, members, node_state, member_state):
+    state = {"nodes": nodes, "members": members, "incomplete": []}
+    result = apply_device_state(SHARED, state)
+    node = result["nodes"][0]
+    member = result["pools"][0]["members"][0]
+    assert (node["state"], node["session"]) == node_state
+    assert (member["state"], member["session"]) == member_state
@@ -0,0 +1,114 @@
+import json
+import re
+import sys
+import threading
+import time
+
+import pytest
+
+import f5_asbuilt
+from f5_asbuilt import EventStream, emit
+
+
+class SlowOut:
+    """A file that takes one character at a time, yielding in between."""
+
+    def __init__(self, fail=False):
+        self.text = []
+        self.fail = fail
+        self.flushes = 0
+
+    def write(self, s):
+        if self.fail:
+            raise BrokenPipeError("broken pipe")
+        for ch in s:
+            self.text.append(ch)
+            time.sleep(0)
+
+    def flush(self):
+        self.flushes += 1
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    out = SlowOut()
+    monkeypatch.setattr(f5_asbuilt, "_EVENTS", EventStream(out))
+    return out
+
+
+def lines(out):
+    return [json.loads(line) for line in "".join(out.text).splitlines()]
+
+
+@pytest.mark.parametrize(
+    "event, fields, expected",
+    [
+        ("run_finished", {"devices": 3, "failures": 0}, {"devices": 3, "failures": 0}),
+        (
+            "error",
+            {"device": "bigip1", "message": "HTTP error: 500"},
+            {"device": "bigip1", "message": "HTTP error: 500"},
+        ),
+        # values JSON cannot hold are written as strings
+        ("device_done", {"output": b"x"}, {"output": "b'x'"}),
+        ("device_started", {}, {}),
+    ],
+)
+def test_record_shape(stream, event, fields, expected):
+    emit(event, **fields)
+    [record] = lines(stream)
+    ts = record.pop("ts")
+    assert re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z", ts)
+    assert record == {"event": event, **expected}
+    assert "".join(stream.text).count("\n") == 1
+    assert stream.flushes == 1
+
+
+def test_no_stream_no_events(monkeypatch):
+    monkeypatch.setattr(f5_asbuilt, "_EVENTS", None)
+    emit("device_started", device="bigip1")
+
+
+@pytest.mark.parametrize("threads, per_thread", [(2, 50), (8, 25)])
+def test_concurrent_emits_stay_one_per_line(stream, threads, per_thread):
+    def work(i):
+        for n in range(per_thread):
+            emit("section_collected", device=f"bigip{i}", section="pools", n=n)
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    records = lines(stream)
+    assert len(records) == threads * per_thread
+    for i in range(threads):
+        mine = [r["n"] for r in records if r["device"] == f"bigip{i}"]
+        assert mine == list(range(per_thread))
+
+
+def test_broken_stream_warns_once(monkeypatch, capsys):
+    monkeypatch.setattr(f5_asbuilt, "_EVENTS", EventStream(SlowOut(fail=True)))
+    emit("device_started", device="bigip1")
+    emit("device_started", device="bigip2")
+    err = capsys.readouterr().err
+    assert err.count("[WARN] Event stream closed") == 1
+
+
+def test_stdout_target_moves_other_output_to_stderr(monkeypatch, capsys):
+    monkeypatch.setattr(f5_asbuilt, "_EVENTS", None)
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    monkeypatch.setattr(sys, "argv", ["f5_asbuilt.py", "--events", "-"])
+
+    def load_inventory(path, use_cache=True):
+        print("Device report for bigip1")
+        emit("device_started", device="bigip1")
+        raise SystemExit(0)
+
+    monkeypatch.setattr(f5_asbuilt, "load_inventory", load_inventory)
+    with pytest.raises(SystemExit):
+        f5_asbuilt.main()
+    captured = capsys.readouterr()
+    [line] = captured.out.splitlines()
+    assert json.loads(line)["event"] == "device_started"
+    assert "Device report for bigip1" in captured.err
@@ -0,0 +1,113 @@
+import pytest
+import requests
+
+import f5_asbuilt
+from f5_asbuilt import run_fleet
+
+
+class FakeClient:
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+
+    def start_budget(self):
+        self.events.append(("budget", self.name))
+
+
+@pytest.fixture
+def fleet(monkeypatch):
+    """
+    run_fleet() with the device I/O replaced: 'fail' maps a device name to
+    the stage ('probe', 'config' or 'state') that raises for it.
+    """
+    fail = {}
+    written = {}
+    events = []
+
+    def make_client(device, *args, **kwargs):
+        if fail.get(device["name"]) == "probe":
+            raise requests.ConnectionError("unreachable")
+        return FakeClient(device["name"], events)
+
+    def device_info(client):
+        group = "g1" if client.name.startswith("pair") else None
+        return {
+            "hostname": client.name,
+            "ha_status": "active" if client.name.endswith("a") else "standby",
+            "sync_group": group,
+            "sync_status": "In Sync",
+            "trust_devices": ["pair-a", "pair-b"],
+            "partitions": ["Common"],
+        }
+
+    def collect_config(client, info, **kwargs):
+        events.append(("config", client.name))
+        if fail.get(client.name) == "config":
+            raise requests.HTTPError("500 Server Error")
+        return {"nodes": [], "pools": [], "incomplete": [], "source": client.name}
+
+    def collect_device_state(client, partitions, modules):
+        events.append(("state", client.name))
+        if fail.get(client.name) == "state":
+            raise requests.HTTPError("500 Server Error")
+        return {"nodes": {}, "members": {}}
+
+    def write_output(device, info, ltm_data, *args, **kwargs):
+        written[device["name"]] = ltm_data
+        return device["name"]
+
+    monkeypatch.setitem(f5_asbuilt.BACKENDS, "rest", (device_info, None))
+    monkeypatch.setattr(f5_asbuilt, "make_client", make_client)
+    monkeypatch.setattr(f5_asbuilt, "collect_config", collect_config)
+    monkeypatch.setattr(f5_asbuilt, "collect_device_state", collect_device_state)
+    monkeypatch.setattr(f5_asbuilt, "write_output", write_output)
+    monkeypatch.setattr(f5_asbuilt, "build_usage_maps", lambda ltm: {})
+    monkeypatch.setattr(f5_asbuilt, "remember_concurrency_limit", lambda c: None)
+
+    def run(names, concurrency=4):
+        devices = [{"name": n, "host": n} for n in names]
+        failures = run_fleet(devices, "u", "p", False, "json", concurrency)
+        return failures, written
+
+    run.fail = fail
+    run.events = events
+    return run
+
+
+@pytest.mark.parametrize(
+    "fail, failures, written",
+    [
+        ({}, 0, ["pair-a", "pair-b", "solo1", "solo2"]),
+        ({"solo1": "probe"}, 1, ["pair-a", "pair-b", "solo2"]),
+        ({"solo1": "config", "solo2": "config"}, 2, ["pair-a", "pair-b"]),
+        # the config comes from the other member instead
+        ({"pair-b": "config"}, 0, ["pair-a", "pair-b", "solo1", "solo2"]),
+        (
+            {"pair-a": "config", "pair-b": "config"},
+            2,
+            ["solo1", "solo2"],
+        ),
+        ({"pair-a": "probe", "solo2": "config"}, 2, ["pair-b", "solo1"]),
+    ],
+)
+def test_failures_are_counted(fleet, fail, failures, written):
+    fleet.fail.update(fail)
+    count, out = fleet(["pair-a", "pair-b", "solo1", "solo2"])
+    assert count == failures
+    assert sorted(out) == written
+
+
+def test_sync_group_shares_config(fleet):
+    _, out = fleet(["pair-a", "pair-b"])
+    # taken from the standby member
+    assert out["pair-a"]["source"] == out["pair-b"]["source"] == "pair-b"
+
+
+def test_budget_starts_with_each_members_collection(fleet):
+    fleet(["pair-a", "pair-b"])
+    assert fleet.events == [
+        ("budget", "pair-b"),
+        ("config", "pair-b"),
+        ("budget", "pair-a"),
+        ("state", "pair-a"),
+    ]
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from f5_asbuilt_html import _encode
+
+
+def decode(column):
+    """As the page reads a column back (A.loaded in PAGE_SCRIPT)."""
+    if isinstance(column, list):
+        return column
+    return [column["values"][i] for i in column["codes"]]
+
+
+def typed(values):
+    return [(type(v), v) for v in values]
+
+
+@pytest.mark.parametrize(
+    "values, encoded",
+    [
+        # equal across types: True == 1 == 1.0, False == 0
+        ([True, 1, 1.0, True, 1, 1.0, None, None] * 4, True),
+        ([0, False, 0.0, "0"] * 10, True),
+        (["Common", "Tenant1", "Common", "Common"], True),
+        ([1, 2, 3, 4], False),
+        ([["a"], ["a"], ["b"]], False),
+        ([], True),
+    ],
+)
+def test_encode_round_trip(values, encoded):
+    column = _encode(values)
+    assert isinstance(column, dict) == encoded
+    # through JSON, as the data scripts carry it
+    decoded = decode(json.loads(json.dumps(column)))
+    assert typed(decoded) == typed(values)
+
+
+def test_encode_keeps_first_seen_order():
+    column = _encode(["up", "down", "up", "up", "down", "up"])
+    assert column == {"values": ["up", "down"], "codes": [0, 1, 0, 0, 1, 0]}
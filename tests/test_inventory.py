@@ -0,0 +1,109 @@
+import pickle
+
+import pytest
+
+import f5_asbuilt
+from f5_asbuilt import load_inventory, parse_selector, select_devices
+
+INVENTORY = """
+defaults:
+  env: prod
+devices:
+  - {name: fll2-a, host: h1, site: FLL2, sync_group: fll2, tags: [dmz, pci]}
+  - {name: fll2-b, host: h2, site: FLL2, sync_group: fll2, tags: [dmz]}
+  - {name: mia1-a, host: h3, site: MIA1, tags: [lab]}
+  - {name: mia1-b, host: h4, site: MIA1, env: dev}
+  - {name: lab-1, host: h5, site: LAB, env: dev, tags: [lab]}
+"""
+
+
+@pytest.fixture
+def inventory(tmp_path, monkeypatch):
+    monkeypatch.setattr(f5_asbuilt, "CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "inventory.yml"
+    path.write_text(INVENTORY)
+    return load_inventory(str(path))
+
+
+@pytest.mark.parametrize(
+    "expr, terms",
+    [
+        ("site=FLL2", [("site", "=", ["FLL2"])]),
+        ("site=FLL2|MIA1", [("site", "=", ["FLL2", "MIA1"])]),
+        (
+            " site = FLL2 , env=prod ,",
+            [("site", "=", ["FLL2"]), ("env", "=", ["prod"])],
+        ),
+        ("tags!=lab", [("tags", "!=", ["lab"])]),
+        ("name=fll2*", [("name", "=", ["fll2*"])]),
+        ("name=~^(fll2|mia1)-a$", [("name", "=~", ["^(fll2|mia1)-a$"])]),
+        (
+            "name=~^x{1,3}$,env=dev",
+            [("name", "=~", ["^x{1,3}$"]), ("env", "=", ["dev"])],
+        ),
+        ("name=~[a,b]", [("name", "=~", ["[a,b]"])]),
+        (r"name=~a\,b,site=X", [("name", "=~", [r"a\,b"]), ("site", "=", ["X"])]),
+        ("name=a=b", [("name", "=", ["a=b"])]),
+    ],
+)
+def test_parse_selector(expr, terms):
+    assert parse_selector(expr) == terms
+
+
+@pytest.mark.parametrize(
+    "expr, message",
+    [
+        ("site", "expected key=value"),
+        ("rack=1", "unknown selector field 'rack'"),
+    ],
+)
+def test_parse_selector_errors(expr, message):
+    with pytest.raises(ValueError, match=message):
+        parse_selector(expr)
+
+
+@pytest.mark.parametrize(
+    "expr, names",
+    [
+        ("site=FLL2", ["fll2-a", "fll2-b"]),
+        ("site=FLL2|MIA1,env=prod", ["fll2-a", "fll2-b", "mia1-a"]),
+        ("name=mia1-?", ["mia1-a", "mia1-b"]),
+        ("tags=dmz,tags!=pci", ["fll2-b"]),
+        ("tags!=lab", ["fll2-a", "fll2-b", "mia1-b"]),
+        ("name=~^(fll2|mia1)-a$", ["fll2-a", "mia1-a"]),
+        ("name=~^[a-z]{3,4}[0-9]-b$,env=dev", ["mia1-b"]),
+        ("sync_group=fll2,site=MIA1", []),
+    ],
+)
+def test_select_devices(inventory, expr, names):
+    assert [d["name"] for d in select_devices(inventory, expr)] == names
+
+
+def test_defaults_are_merged(inventory):
+    envs = {d["name"]: d["env"] for d in inventory["devices"]}
+    assert envs == {
+        "fll2-a": "prod",
+        "fll2-b": "prod",
+        "mia1-a": "prod",
+        "mia1-b": "dev",
+        "lab-1": "dev",
+    }
+
+
+def test_inventory_cache_is_versioned(tmp_path, monkeypatch):
+    monkeypatch.setattr(f5_asbuilt, "CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "inventory.yml"
+    path.write_text(INVENTORY)
+    load_inventory(str(path))
+    cache_path = f5_asbuilt._inventory_cache_path(str(path))
+    with open(cache_path, "rb") as f:
+        cached = pickle.load(f)
+    cached["inventory"]["devices"] = []
+    with open(cache_path, "wb") as f:
+        pickle.dump(cached, f)
+    assert load_inventory(str(path))["devices"] == []
+
+    monkeypatch.setattr(
+        f5_asbuilt, "INVENTORY_CACHE_FORMAT", f5_asbuilt.INVENTORY_CACHE_FORMAT + 1
+    )
+    assert len(load_inventory(str(path))["devices"]) == 5
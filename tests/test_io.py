@@ -0,0 +1,142 @@
+import json
+import os
+
+import pytest
+
+import f5_asbuilt_io
+from f5_asbuilt_io import device_label, list_json_files
+
+
+@pytest.mark.parametrize(
+    "path, data, label",
+    [
+        ("json/f5_bigip1_asbuilt.json", {}, "bigip1"),
+        ("f5_bigip1_asbuilt.json.gz", {}, "bigip1"),
+        ("/a/b/f5_dc1_lb_01_asbuilt.json.zst", {}, "dc1_lb_01"),
+        (
+            "export.json",
+            {"device_report": {"hostname": "bigip1.example.com"}},
+            "bigip1.example.com",
+        ),
+        ("f5_asbuilt.json", {"device_report": {"hostname": "h"}}, "h"),
+        ("export.json", {"device_report": {}}, "export.json"),
+        ("export.json", {}, "export.json"),
+    ],
+)
+def test_device_label(path, data, label):
+    assert device_label(path, data) == label
+
+
+def touch(path, mtime=None):
+    with open(path, "w") as f:
+        f.write("{}")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_list_json_files(tmp_path):
+    (tmp_path / "single").mkdir()
+    other = tmp_path / "single" / "export.json"
+    touch(other)
+    for name in [
+        "f5_b_asbuilt.json",
+        "f5_a_asbuilt.json.gz",
+        "notes.txt",
+        "f5_c_asbuilt.md",
+    ]:
+        touch(tmp_path / name)
+    assert list_json_files([str(tmp_path), str(other)]) == [
+        str(tmp_path / "f5_a_asbuilt.json.gz"),
+        str(tmp_path / "f5_b_asbuilt.json"),
+        str(other),
+    ]
+
+
+def test_list_json_files_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        list_json_files([str(tmp_path / "missing")])
+
+
+@pytest.mark.parametrize(
+    "path, compression, stripped",
+    [
+        ("x.json", None, "x.json"),
+        ("x.json.gz", "gzip", "x.json"),
+        ("x.json.zst", "zstd", "x.json"),
+        ("x.md.gz", "gzip", "x.md"),
+        ("x.gzip", None, "x.gzip"),
+    ],
+)
+def test_compression_suffixes(path, compression, stripped):
+    assert f5_asbuilt_io.compression_for(path) == compression
+    assert f5_asbuilt_io.strip_compression(path) == stripped
+    assert f5_asbuilt_io.with_compression(stripped, compression) == (
+        path if compression else stripped
+    )
+
+
+@pytest.mark.parametrize(
+    "mtimes, kept",
+    [
+        ({"x.json": 100, "x.json.gz": 200}, ["x.json.gz"]),
+        ({"x.json": 300, "x.json.gz": 200}, ["x.json"]),
+        ({"x.json": 100, "x.json.gz": 200, "x.json.zst": 150}, ["x.json.gz"]),
+        ({"x.json.zst": 200, "y.json": 100}, ["x.json.zst", "y.json"]),
+        ({"x.json.gz": 100, "y.json.gz": 200, "y.json": 300}, ["x.json.gz", "y.json"]),
+    ],
+)
+def test_list_json_files_keeps_newest_variant(tmp_path, mtimes, kept):
+    for name, mtime in mtimes.items():
+        touch(tmp_path / name, mtime)
+    assert list_json_files([str(tmp_path)]) == [str(tmp_path / n) for n in kept]
+
+
+def test_list_json_files_dedups_given_files(tmp_path):
+    touch(tmp_path / "x.json", 100)
+    touch(tmp_path / "x.json.gz", 200)
+    paths = [str(tmp_path / "x.json"), str(tmp_path / "x.json.gz")]
+    assert list_json_files(paths) == [paths[1]]
+
+
+def write_snapshot(path, data):
+    with f5_asbuilt_io.open_snapshot(str(path), "w") as f:
+        json.dump(data, f)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+COMPRESSIONS = [
+    "x.json",
+    "x.json.gz",
+    pytest.param(
+        "x.json.zst",
+        marks=pytest.mark.skipif(
+            f5_asbuilt_io.zstandard is None, reason="zstandard not installed"
+        ),
+    ),
+]
+
+
+@pytest.mark.parametrize("name", COMPRESSIONS)
+def test_load_json_round_trip(tmp_path, name):
+    data = {"virtual_servers": [{"name": f"vs{i}"} for i in range(1000)]}
+    write_snapshot(tmp_path / name, data)
+    assert f5_asbuilt_io.load_json(str(tmp_path / name)) == data
+
+
+@pytest.mark.parametrize("name", COMPRESSIONS)
+@pytest.mark.parametrize(
+    "damage",
+    [
+        lambda raw: raw[: len(raw) // 2],  # truncated
+        lambda raw: raw[:-4],  # gzip trailer cut off
+        lambda raw: raw[:10] + b"\xff" * 32 + raw[42:],  # corrupt
+        lambda raw: b"not a snapshot",
+    ],
+)
+def test_load_json_damaged_raises_value_error(tmp_path, name, damage):
+    path = tmp_path / name
+    raw = write_snapshot(path, {"pools": [{"name": f"p{i}"} for i in range(1000)]})
+    path.write_bytes(damage(raw))
+    with pytest.raises(ValueError):
+        f5_asbuilt_io.load_json(str(path))
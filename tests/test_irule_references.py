@@ -0,0 +1,65 @@
+import pytest
+
+from f5_asbuilt import scan_irule_references
+
+
+def refs(pools=(), nodes=(), classes=(), virtuals=()):
+    return {
+        "pools": list(pools),
+        "nodes": list(nodes),
+        "classes": list(classes),
+        "virtuals": list(virtuals),
+    }
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        ("no references at all", refs()),
+        ("when HTTP_REQUEST { pool /Common/web_pool }", refs(pools=["web_pool"])),
+        ('pool "quoted_pool" member 10.0.0.1 80', refs(pools=["quoted_pool"])),
+        ("pool a; pool b\npool a", refs(pools=["a", "b"])),
+        (
+            "if { [active_members app_pool] < 1 } { node 10.1.1.1 80 }",
+            refs(pools=["app_pool"], nodes=["10.1.1.1"]),
+        ),
+        ("virtual /Common/vs_backend", refs(virtuals=["vs_backend"])),
+        (
+            "if { [class match [HTTP::uri] starts_with /Common/dg_uris] } { return }",
+            refs(classes=["dg_uris"]),
+        ),
+        ("set v [class lookup $key dg_map]", refs(classes=["dg_map"])),
+        ("class exists -- dg_exists", refs(classes=["dg_exists"])),
+        (
+            "set x [class search -all -value dg_search starts_with $k]",
+            refs(classes=["dg_search"]),
+        ),
+        (
+            "if { [matchclass [IP::client_addr] equals $::blocked_ips] } { drop }",
+            refs(classes=["blocked_ips"]),
+        ),
+    ],
+)
+def test_static_references(body, expected):
+    assert scan_irule_references(body) == expected
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        # commented out
+        "when HTTP_REQUEST {\n  # pool old_pool\n}",
+        # computed at runtime
+        "pool $my_pool",
+        "pool [string tolower web]",
+        "if { [matchclass $a equals] } { }",
+        # 'virtual name' asks for the current virtual
+        "log local0. [virtual name]",
+        # the word without arguments, or as part of another word
+        "set tpool pool; set LB::server pool",
+        "HTTP::header insert X-Pool pool_in_string",
+        "set pool_name x; my_pool foo",
+    ],
+)
+def test_no_references(body):
+    assert scan_irule_references(body) == refs()
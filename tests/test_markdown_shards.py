@@ -0,0 +1,207 @@
+import copy
+import json
+import os
+
+import pytest
+
+import f5_asbuilt
+from f5_asbuilt import (
+    DEVICE_INFO_DEFAULTS,
+    MD_SHARD_MANIFEST,
+    _shard_file_name,
+    build_usage_maps,
+    plan_markdown_shards,
+    render_markdown_shard,
+    write_markdown_shards,
+)
+
+DEVICE_INFO = {**DEVICE_INFO_DEFAULTS, "hostname": "bigip1"}
+
+
+def virtual(name, partition, ip):
+    return {
+        "name": name,
+        "partition": partition,
+        "destination_ip": ip,
+        "destination_port": "443",
+        "pool": None,
+        "profiles": [],
+        "persistence": [],
+        "irules": [],
+    }
+
+
+LTM = {
+    "virtuals": [
+        virtual("vs1", "Common", "10.0.0.1"),
+        virtual("vs2", "Tenant1", "10.0.0.2"),
+        virtual("vs3", "Tenant2", "10.0.0.3"),
+    ],
+    "pools": [
+        {
+            "name": "p1",
+            "partition": "Common",
+            "lb_method": "round-robin",
+            "monitor": None,
+            "members": [],
+        }
+    ],
+    "nodes": [],
+    "monitors": [],
+    "irules": [],
+    "ssl_profiles": [],
+    "certs": [],
+    "incomplete": [],
+}
+
+SHARDS = [
+    "virtuals/Common.md",
+    "virtuals/Tenant1.md",
+    "virtuals/Tenant2.md",
+    "pools/Common.md",
+]
+
+
+def write(path, ltm_data, jobs=1):
+    return write_markdown_shards(
+        str(path), DEVICE_INFO, ltm_data, build_usage_maps(ltm_data), jobs
+    )
+
+
+def change_ip(ltm):
+    ltm["virtuals"][1]["destination_ip"] = "10.9.9.9"
+
+
+def drop_tenant2(ltm):
+    del ltm["virtuals"][2]
+
+
+def mark_pools_incomplete(ltm):
+    ltm["incomplete"] = ["pools"]
+
+
+def test_plan_markdown_shards():
+    shards = plan_markdown_shards(DEVICE_INFO, LTM, build_usage_maps(LTM))
+    assert [s["path"] for s in shards] == SHARDS
+    assert [s["objects"] for s in shards] == [1, 1, 1, 1]
+    again = plan_markdown_shards(DEVICE_INFO, copy.deepcopy(LTM), build_usage_maps(LTM))
+    assert [s["digest"] for s in again] == [s["digest"] for s in shards]
+
+
+@pytest.mark.parametrize(
+    "change, written, skipped, files",
+    [
+        (None, 0, 4, SHARDS),
+        (change_ip, 1, 3, SHARDS),
+        (drop_tenant2, 0, 3, [p for p in SHARDS if "Tenant2" not in p]),
+        (mark_pools_incomplete, 1, 3, SHARDS),
+    ],
+)
+def test_second_run_skips_unchanged_shards(tmp_path, change, written, skipped, files):
+    _, first_written, first_skipped = write(tmp_path, LTM)
+    assert (first_written, first_skipped) == (4, 0)
+
+    ltm = copy.deepcopy(LTM)
+    if change:
+        change(ltm)
+    index, second_written, second_skipped = write(tmp_path, ltm)
+    assert (second_written, second_skipped) == (written, skipped)
+    assert os.path.exists(index)
+    found = sorted(
+        os.path.relpath(os.path.join(root, name), tmp_path)
+        for root, _, names in os.walk(tmp_path)
+        for name in names
+        if name.endswith(".md") and name != "index.md"
+    )
+    assert found == sorted(files)
+
+
+def corrupt_manifest(path):
+    (path / MD_SHARD_MANIFEST).write_text("{not json")
+
+
+def old_manifest_format(path):
+    manifest = json.loads((path / MD_SHARD_MANIFEST).read_text())
+    manifest["format"] = f5_asbuilt.MD_SHARD_FORMAT - 1
+    (path / MD_SHARD_MANIFEST).write_text(json.dumps(manifest))
+
+
+def other_python(path):
+    manifest = json.loads((path / MD_SHARD_MANIFEST).read_text())
+    manifest["python"] = [2, 7]
+    (path / MD_SHARD_MANIFEST).write_text(json.dumps(manifest))
+
+
+def manifest_not_an_object(path):
+    (path / MD_SHARD_MANIFEST).write_text("[]")
+
+
+def delete_shard(path):
+    os.remove(path / "virtuals" / "Tenant1.md")
+
+
+@pytest.mark.parametrize(
+    "damage, written",
+    [
+        (corrupt_manifest, 4),
+        (old_manifest_format, 4),
+        (other_python, 4),
+        (manifest_not_an_object, 4),
+        (delete_shard, 1),
+    ],
+)
+def test_rerender_when_manifest_or_file_is_missing(tmp_path, damage, written):
+    write(tmp_path, LTM)
+    damage(tmp_path)
+    _, second_written, second_skipped = write(tmp_path, LTM)
+    assert (second_written, second_skipped) == (written, 4 - written)
+    assert (tmp_path / "virtuals" / "Tenant1.md").exists()
+
+
+def test_shared_render_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(f5_asbuilt, "MD_SHARD_PARALLEL_MIN", 0)
+    monkeypatch.setattr(f5_asbuilt, "_RENDER_POOL", None)
+    try:
+        write(tmp_path / "a", LTM, jobs=2)
+        pool = f5_asbuilt._RENDER_POOL
+        assert pool is not None
+        write(tmp_path / "b", LTM, jobs=4)
+        # one pool per run, sized by the first caller
+        assert f5_asbuilt._RENDER_POOL is pool
+        assert pool._max_workers == 2
+    finally:
+        if f5_asbuilt._RENDER_POOL is not None:
+            f5_asbuilt._RENDER_POOL.shutdown()
+
+    shards = plan_markdown_shards(DEVICE_INFO, LTM, build_usage_maps(LTM))
+    for shard in shards:
+        expected = render_markdown_shard(shard["task"])[0]
+        assert (tmp_path / "b" / shard["path"]).read_text() == expected
+
+
+@pytest.mark.parametrize(
+    "partition, name",
+    [
+        ("Common", "Common.md"),
+        ("Tenant-1.prod", "Tenant-1.prod.md"),
+        ("a_b", "a_b.md"),
+        ("a b", "a_b~7dbde935.md"),
+        ("a/b", "a_b~3ec69c85.md"),
+    ],
+)
+def test_shard_file_name(partition, name):
+    assert _shard_file_name(partition) == name
+
+
+def test_partitions_with_the_same_safe_name(tmp_path):
+    ltm = copy.deepcopy(LTM)
+    ltm["virtuals"] = [
+        virtual("vs1", "a b", "10.0.0.1"),
+        virtual("vs2", "a_b", "10.0.0.2"),
+    ]
+    _, written, _ = write(tmp_path, ltm)
+    assert written == 3
+    files = sorted(p.name for p in (tmp_path / "virtuals").iterdir())
+    assert files == ["a_b.md", "a_b~7dbde935.md"]
+    assert "vs1" in (tmp_path / "virtuals" / "a_b~7dbde935.md").read_text()
+    assert "vs2" in (tmp_path / "virtuals" / "a_b.md").read_text()
@@ -0,0 +1,127 @@
+import pytest
+import requests
+
+from f5_asbuilt import collect_modules, probe_config_generation
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} Error", response=response)
+
+
+class FakeClient:
+    base_url = "https://bigip1/mgmt/"
+    name = "bigip1"
+    concurrency = 2
+
+    def __init__(self, errors=None, items=None):
+        self.errors = errors or {}
+        self.items = items or {}
+        self.paths = []
+
+    def get_collection(self, path, params=None):
+        self.paths.append(path)
+        if path in self.errors:
+            raise self.errors[path]
+        return self.items.get(path, [{"name": "obj", "generation": 7}])
+
+
+@pytest.mark.parametrize(
+    "errors, empty, incomplete",
+    [
+        ({}, [], []),
+        # endpoint not on this box: empty but complete
+        ({"tm/net/route": http_error(404)}, ["net_routes"], []),
+        ({"tm/net/route": http_error(500)}, ["net_routes"], ["net_routes"]),
+        ({"tm/net/self": http_error(401)}, ["net_self_ips"], ["net_self_ips"]),
+        (
+            {"tm/net/vlan": requests.ConnectionError("reset")},
+            ["net_vlans"],
+            ["net_vlans"],
+        ),
+        (
+            {
+                "tm/net/vlan": requests.ReadTimeout("timed out"),
+                "tm/net/route-domain": http_error(404),
+            },
+            ["net_vlans", "net_route_domains"],
+            ["net_vlans"],
+        ),
+    ],
+)
+def test_collect_modules_failures(errors, empty, incomplete):
+    sections, found = collect_modules(FakeClient(errors), ["net"])
+    assert found == incomplete
+    assert sorted(n for n, s in sections.items() if not s["rows"]) == sorted(empty)
+
+
+@pytest.mark.parametrize(
+    "modules, items, errors, generation",
+    [
+        (None, {}, {}, "/".join(["7:1"] * 6)),
+        (["net"], {}, {}, "/".join(["7:1"] * 10)),
+        # a module change moves the fingerprint
+        (
+            ["net"],
+            {"tm/net/self": [{"name": "s1", "generation": 9}]},
+            {},
+            "/".join(["7:1"] * 7 + ["9:1"] + ["7:1"] * 2),
+        ),
+        (
+            ["net"],
+            {},
+            {"tm/net/route": http_error(404)},
+            "/".join(["7:1"] * 8 + ["-", "7:1"]),
+        ),
+    ],
+)
+def test_probe_config_generation(modules, items, errors, generation):
+    client = FakeClient(errors, items)
+    assert probe_config_generation(client, modules) == generation
+
+
+def test_probe_config_generation_expands_modules():
+    client = FakeClient()
+    probe_config_generation(client, ["gtm"])
+    assert "tm/sys/provision" in client.paths
+    assert "tm/gtm/pool/a" in client.paths
+    assert "tm/gtm/wideip/srv" in client.paths
+    assert len(client.paths) == len(set(client.paths))
+
+
+@pytest.mark.parametrize(
+    "provision, errors, sections, incomplete",
+    [
+        # gtm provisioned: its sections are collected
+        (
+            [{"name": "gtm", "level": "nominal"}],
+            {},
+            ["sys_provision", "gtm_servers", "gtm_pools", "gtm_wideips"],
+            [],
+        ),
+        # gtm not provisioned: skipped, and the report is complete
+        ([{"name": "gtm", "level": "none"}], {}, ["sys_provision"], []),
+        # provisioning unknown: collect gtm anyway instead of skipping it
+        (
+            [],
+            {"tm/sys/provision": http_error(500)},
+            ["sys_provision", "gtm_servers", "gtm_pools", "gtm_wideips"],
+            ["sys_provision"],
+        ),
+        (
+            [],
+            {
+                "tm/sys/provision": requests.ReadTimeout("timed out"),
+                "tm/gtm/server": http_error(400),
+            },
+            ["sys_provision", "gtm_servers", "gtm_pools", "gtm_wideips"],
+            ["sys_provision", "gtm_servers"],
+        ),
+    ],
+)
+def test_collect_modules_provisioning(provision, errors, sections, incomplete):
+    client = FakeClient(errors, {"tm/sys/provision": provision})
+    found, found_incomplete = collect_modules(client, ["gtm"])
+    assert list(found) == sections
+    assert found_incomplete == incomplete
@@ -0,0 +1,119 @@
+import pytest
+
+import f5_asbuilt
+import f5_asbuilt_query
+from f5_asbuilt_query import index_payload, open_index
+
+
+def payload(*rules):
+    """As-built JSON with one iRule per (name, body)."""
+    return {
+        "device_report": {"hostname": "bigip"},
+        "irules": [
+            {"name": name, "partition": "Common", "sha256": f"sha-{body}"}
+            for name, body in rules
+        ],
+        "irule_sources": {f"sha-{body}": body for _, body in rules},
+    }
+
+
+@pytest.fixture(params=["fts", "plain"])
+def conn(request, tmp_path, monkeypatch):
+    if request.param == "plain":
+        # as on SQLite builds without FTS5
+        monkeypatch.setattr(f5_asbuilt_query, "FTS_SCHEMA", "CREATE VIRTUAL TABLE")
+    conn = open_index(str(tmp_path / "index.db"))
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "runs, bodies",
+    [
+        ([("a", payload(("r1", "when A {}")))], ["when A {}"]),
+        # a body shared by two devices is stored once
+        (
+            [("a", payload(("r1", "when A {}"))), ("b", payload(("r2", "when A {}")))],
+            ["when A {}"],
+        ),
+        (
+            [
+                ("a", payload(("r1", "when A {}"), ("r2", "when B {}"))),
+                ("b", payload(("r3", "when B {}"))),
+            ],
+            ["when A {}", "when B {}"],
+        ),
+        # re-indexing a device drops bodies no device uses any more
+        (
+            [("a", payload(("r1", "when A {}"))), ("a", payload(("r1", "when C {}")))],
+            ["when C {}"],
+        ),
+        (
+            [
+                ("a", payload(("r1", "when A {}"))),
+                ("b", payload(("r2", "when A {}"))),
+                ("a", payload()),
+            ],
+            ["when A {}"],
+        ),
+        ([("a", payload(("r1", "when A {}"))), ("a", payload())], []),
+    ],
+)
+def test_irule_bodies(conn, runs, bodies):
+    for device, data in runs:
+        index_payload(conn, device, data)
+    rows = conn.execute("SELECT sha256, body FROM irule_bodies").fetchall()
+    assert sorted(body for _, body in rows) == bodies
+    assert len({sha for sha, _ in rows}) == len(rows)
+
+
+def test_irule_bodies_in_chunks(conn, monkeypatch):
+    monkeypatch.setattr(f5_asbuilt_query, "SQL_PARAMS_CHUNK", 2)
+    rules = [(f"r{i}", f"when E{i} {{}}") for i in range(5)]
+    index_payload(conn, "a", payload(*rules))
+    index_payload(conn, "b", payload(*rules))
+    count = conn.execute("SELECT COUNT(*) FROM irule_bodies").fetchone()[0]
+    assert count == 5
+
+
+@pytest.mark.parametrize("output_format", ["json", "md"])
+def test_write_output_builds_payload_once(tmp_path, monkeypatch, output_format):
+    built = []
+    indexed = []
+    build = f5_asbuilt.build_json_payload
+
+    def build_json_payload(*args):
+        built.append(args)
+        return build(*args)
+
+    monkeypatch.setattr(f5_asbuilt, "build_json_payload", build_json_payload)
+    monkeypatch.setattr(
+        f5_asbuilt, "update_index", lambda path, device, data: indexed.append(data)
+    )
+    ltm_data = {
+        k: []
+        for k in (
+            "virtuals",
+            "pools",
+            "nodes",
+            "monitors",
+            "irules",
+            "ssl_profiles",
+            "certs",
+        )
+    }
+    ltm_data["incomplete"] = []
+    device_info = {**f5_asbuilt.DEVICE_INFO_DEFAULTS, "hostname": "bigip1"}
+    f5_asbuilt.write_output(
+        {"name": "bigip1"},
+        device_info,
+        ltm_data,
+        f5_asbuilt.build_usage_maps(ltm_data),
+        str(tmp_path / f"out.{output_format}"),
+        output_format,
+        True,
+        str(tmp_path / "index.db"),
+    )
+    assert len(built) == 1
+    assert len(indexed) == 1
+    assert indexed[0]["device_report"]["hostname"] == "bigip1"
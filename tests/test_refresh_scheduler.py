@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+import f5_asbuilt
+from f5_asbuilt import RefreshScheduler
+
+
+def make_scheduler(results):
+    """Scheduler over one device whose polls return 'results' in turn."""
+    calls = []
+
+    def poll(device, known):
+        calls.append(known)
+        return results[len(calls) - 1]
+
+    scheduler = RefreshScheduler(
+        [{"name": "bigip1"}], poll, min_interval=0.0, max_interval=0.0, jitter=0.0
+    )
+    return scheduler, calls
+
+
+@pytest.mark.parametrize(
+    "results, changes",
+    [
+        ([("g1", True)], 0),
+        ([("g1", True), ("g1", False)], 0),
+        ([("g1", True), ("g2", True)], 1),
+        ([("g1", True), ("g2", True), ("g2", False), ("g3", True)], 2),
+    ],
+)
+def test_first_poll_is_baseline(results, changes):
+    scheduler, calls = make_scheduler(results)
+    scheduler.run(max_polls=len(results))
+    st = scheduler.state["bigip1"]
+    assert st["polls"] == len(results)
+    assert st["changes"] == changes
+    assert calls[0] is None
+    assert calls[1:] == [gen for gen, _ in results[:-1]]
+
+
+def test_first_poll_keeps_interval():
+    scheduler = RefreshScheduler(
+        [{"name": "bigip1"}], lambda d, k: ("g1", True), 300.0, 3600.0
+    )
+    assert scheduler.record_success("bigip1", "g1", True) is False
+    assert scheduler.state["bigip1"]["interval"] == 450.0
+    assert scheduler.record_success("bigip1", "g2", True) is True
+    assert scheduler.state["bigip1"]["interval"] == 300.0
+
+
+def test_interrupt_cancels_pending_polls(monkeypatch):
+    scheduler, _ = make_scheduler([("g1", True)])
+
+    def interrupt(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(f5_asbuilt, "wait", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.run()
+
+
+@pytest.mark.parametrize("devices, concurrency", [(20, 2), (5, 1), (3, 4)])
+def test_waits_for_a_free_slot(monkeypatch, devices, concurrency):
+    """More due devices than slots must block, not spin, until a poll ends."""
+    loops = []
+    due_devices = RefreshScheduler.due_devices
+
+    def counting_due_devices(self, now):
+        loops.append(now)
+        return due_devices(self, now)
+
+    monkeypatch.setattr(RefreshScheduler, "due_devices", counting_due_devices)
+
+    def poll(device, known):
+        time.sleep(0.02)
+        return "g1", False
+
+    scheduler = RefreshScheduler(
+        [{"name": f"bigip{i}"} for i in range(devices)],
+        poll,
+        min_interval=3600.0,
+        max_interval=3600.0,
+        concurrency=concurrency,
+        jitter=0.0,
+    )
+    scheduler.run(max_polls=devices)
+    assert all(st["polls"] == 1 for st in scheduler.state.values())
+    # one pass per finished poll (plus the first), not thousands of spins
+    assert len(loops) <= devices + 1
@@ -0,0 +1,96 @@
+import pytest
+import requests
+
+import f5_asbuilt
+from f5_asbuilt import collect_ltm_objects, collect_modules, fetch_collection
+
+PARTITIONS = ["Common", "Tenant1", "Tenant2"]
+
+ITEMS = [
+    {"name": f"obj{i}", "partition": partition, "address": f"10.0.{p}.{i}"}
+    for p, partition in enumerate(PARTITIONS)
+    for i in range(3)
+]
+
+
+class FakeClient:
+    base_url = "https://bigip1/mgmt/"
+    name = "bigip1"
+    concurrency = 2
+
+    def __init__(self, errors=None):
+        # partition -> exception raised for that partition's shard
+        self.errors = errors or {}
+        self.params = []
+
+    def get_collection(self, path, params=None):
+        self.params.append(dict(params or {}))
+        shard = (params or {}).get("$filter")
+        if shard is None:
+            return list(ITEMS)
+        partition = shard[len("partition eq ") :]
+        if partition in self.errors:
+            raise self.errors[partition]
+        return [item for item in ITEMS if item["partition"] == partition]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [None, {"expandSubcollections": "true"}, {"$select": "name,partition"}],
+)
+def test_sharded_matches_unsharded(params):
+    client = FakeClient()
+    whole = fetch_collection(client, "tm/ltm/node", params=params)
+    sharded = fetch_collection(
+        client, "tm/ltm/node", params=params, partitions=PARTITIONS
+    )
+    assert sharded == whole
+    # one request per partition, each with the caller's params
+    assert client.params[1:] == [
+        {**(params or {}), "$filter": f"partition eq {p}"} for p in PARTITIONS
+    ]
+
+
+@pytest.mark.parametrize(
+    "errors",
+    [
+        {"Tenant1": requests.ReadTimeout("timed out")},
+        {"Tenant2": requests.ConnectionError("reset")},
+        {"Common": requests.HTTPError("500 Server Error")},
+    ],
+)
+def test_failed_shard_is_raised(errors):
+    with pytest.raises(type(next(iter(errors.values())))):
+        fetch_collection(FakeClient(errors), "tm/ltm/node", partitions=PARTITIONS)
+
+
+def test_timed_out_shard_marks_section_incomplete(monkeypatch):
+    monkeypatch.setattr(
+        f5_asbuilt,
+        "LTM_SECTIONS",
+        [("nodes", f5_asbuilt._collect_nodes, ["nodes"])],
+    )
+    client = FakeClient({"Tenant1": requests.ReadTimeout("timed out")})
+    ltm_data = collect_ltm_objects(client, PARTITIONS)
+    # the other partitions' nodes are not passed off as the whole section
+    assert ltm_data["nodes"] == []
+    assert ltm_data["incomplete"] == ["nodes"]
+
+
+@pytest.mark.parametrize(
+    "errors, incomplete, rows",
+    [
+        ({}, [], 9),
+        ({"Tenant2": requests.ReadTimeout("timed out")}, ["net_self_ips"], 6),
+        ({"Common": requests.HTTPError("500 Server Error")}, ["net_self_ips"], 6),
+    ],
+)
+def test_registered_section_reports_failed_shard(monkeypatch, errors, incomplete, rows):
+    monkeypatch.setattr(
+        f5_asbuilt,
+        "COLLECTORS",
+        {"net_self_ips": f5_asbuilt.COLLECTORS["net_self_ips"]},
+    )
+    sections, found = collect_modules(FakeClient(errors), ["net"], PARTITIONS)
+    assert found == incomplete
+    assert len(sections["net_self_ips"]["rows"]) == rows
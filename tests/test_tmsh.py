@@ -0,0 +1,422 @@
+import pytest
+import requests
+
+import f5_asbuilt
+from f5_asbuilt import (
+    _tmsh_monitor,
+    _tmsh_props,
+    collect_device_info_tmsh,
+    parse_tmsh_device_info,
+    parse_tmsh_line,
+    parse_tmsh_ltm,
+)
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("", None),
+        ("Sys::Version", None),
+        (
+            "sys global-settings { hostname bigip1 }",
+            (["sys", "global-settings"], ["hostname", "bigip1"]),
+        ),
+        ("ltm node /Common/n1 { }", (["ltm", "node", "/Common/n1"], [])),
+        # nested blocks
+        (
+            "ltm pool /Common/p1 { members { /Common/n1:80 { address 10.0.0.1 } } }",
+            (
+                ["ltm", "pool", "/Common/p1"],
+                ["members", ["/Common/n1:80", ["address", "10.0.0.1"]]],
+            ),
+        ),
+        # quoted values keep their braces and spaces, escaped quotes are unescaped
+        (
+            'ltm monitor http /Common/m { description "a { b } \\"c\\"" interval 5 }',
+            (
+                ["ltm", "monitor", "http", "/Common/m"],
+                ["description", 'a { b } "c"', "interval", "5"],
+            ),
+        ),
+        (
+            'ltm node /Common/n { description "" }',
+            (["ltm", "node", "/Common/n"], ["description", ""]),
+        ),
+        # text after the object's closing brace is ignored
+        (
+            "ltm node /Common/n { address 1.1.1.1 } trailing",
+            (["ltm", "node", "/Common/n"], ["address", "1.1.1.1"]),
+        ),
+        # truncated output keeps what was parsed
+        (
+            "ltm pool /Common/p { members { /Common/a:80 { address 1.1.1.1 }",
+            (
+                ["ltm", "pool", "/Common/p"],
+                ["members", ["/Common/a:80", ["address", "1.1.1.1"]]],
+            ),
+        ),
+    ],
+)
+def test_parse_tmsh_line(line, expected):
+    assert parse_tmsh_line(line) == expected
+
+
+@pytest.mark.parametrize(
+    "block, expected",
+    [
+        ([], {}),
+        (
+            ["address", "10.0.0.1", "state", "up"],
+            {"address": "10.0.0.1", "state": "up"},
+        ),
+        (
+            ["vlans-disabled", "translate-address", "enabled"],
+            {"vlans-disabled": True, "translate-address": "enabled"},
+        ),
+        (["enabled"], {"enabled": True}),
+        (
+            ["description", "none", "pool", "none"],
+            {"description": "none", "pool": "none"},
+        ),
+        (["profiles", ["/Common/tcp", []]], {"profiles": ["/Common/tcp", []]}),
+        (
+            [
+                "monitor",
+                "/Common/http",
+                "and",
+                "/Common/tcp",
+                "and",
+                "/Common/icmp",
+                "members",
+                [],
+            ],
+            {"monitor": "/Common/http and /Common/tcp and /Common/icmp", "members": []},
+        ),
+        # a dangling key is a flag
+        (["address", "10.0.0.1", "fqdn"], {"address": "10.0.0.1", "fqdn": True}),
+    ],
+)
+def test_tmsh_props(block, expected):
+    assert _tmsh_props(block) == expected
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        ("members { }", None),
+        ("monitor /Common/http", "/Common/http"),
+        ("monitor none", None),
+        (
+            "monitor /Common/http and /Common/tcp members { }",
+            "/Common/http and /Common/tcp",
+        ),
+        (
+            "monitor /Common/a and /Common/b and /Common/c",
+            "/Common/a and /Common/b and /Common/c",
+        ),
+        (
+            "monitor min 1 of { /Common/http /Common/tcp }",
+            "min 1 of { /Common/http /Common/tcp }",
+        ),
+    ],
+)
+def test_tmsh_monitor(body, expected):
+    _, block = parse_tmsh_line(f"ltm pool /Common/p {{ {body} }}")
+    assert _tmsh_monitor(block) == expected
+
+
+LTM_OUTPUT = "\n".join(
+    [
+        "ltm virtual /Common/vs1 { destination /Common/10.0.0.10%2:443 pool /Common/p1 "
+        "profiles { /Common/http { } /Common/clientssl { context clientside } } "
+        "persist { /Common/cookie { default yes } } rules { /Common/r1 /Common/r2 } vlans-disabled }",
+        "ltm virtual /Tenant1/app/vs2 { destination /Tenant1/2001:db8::1.80 pool none rules none }",
+        "ltm pool /Common/p1 { load-balancing-mode least-connections-member members { "
+        "/Common/n1:80 { address 10.0.0.1 session monitor-enabled state up } /Common/n2:80 { address 10.0.0.2 } } "
+        "monitor /Common/http and /Common/tcp }",
+        "ltm pool /Tenant1/p2 { monitor none members none }",
+        "ltm node /Common/n1 { address 10.0.0.1 session monitor-enabled state up }",
+        "ltm node /Common/n2 { address 10.0.0.2 description none }",
+        'ltm monitor http /Common/http { description "checks { / }" interval 5 }',
+        "ltm profile client-ssl /Common/clientssl { cert /Common/default.crt chain none }",
+        'sys crypto cert /Common/default.crt { expiration-date 1893456000 expiration-string "Jan 1 2030" }',
+        'sys crypto cert /Common/odd.crt { expiration-string "never" }',
+        "ltm rule /Common/r1 { }",
+    ]
+)
+
+
+def test_parse_tmsh_ltm():
+    ltm = parse_tmsh_ltm(LTM_OUTPUT)
+    assert ltm["virtuals"] == [
+        {
+            "name": "vs1",
+            "partition": "Common",
+            "destination_ip": "10.0.0.10",
+            "destination_port": "443",
+            "route_domain": 2,
+            "pool": "p1",
+            "profiles": ["http", "clientssl"],
+            "persistence": ["cookie"],
+            "irules": ["r1", "r2"],
+        },
+        {
+            "name": "vs2",
+            "partition": "Tenant1",
+            "destination_ip": "2001:db8::1",
+            "destination_port": "80",
+            "route_domain": None,
+            "pool": None,
+            "profiles": [],
+            "persistence": [],
+            "irules": [],
+        },
+    ]
+    assert ltm["pools"] == [
+        {
+            "name": "p1",
+            "partition": "Common",
+            "lb_method": "least-connections-member",
+            "monitor": "/Common/http and /Common/tcp",
+            "members": [
+                {
+                    "name": "n1:80",
+                    "address": "10.0.0.1",
+                    "state": "up",
+                    "session": "monitor-enabled",
+                },
+                {
+                    "name": "n2:80",
+                    "address": "10.0.0.2",
+                    "state": "unchecked",
+                    "session": "user-enabled",
+                },
+            ],
+        },
+        {
+            "name": "p2",
+            "partition": "Tenant1",
+            "lb_method": "round-robin",
+            "monitor": None,
+            "members": [],
+        },
+    ]
+    assert [n["name"] for n in ltm["nodes"]] == ["n1", "n2"]
+    assert ltm["monitors"] == [
+        {
+            "name": "http",
+            "partition": "Common",
+            "type": "http",
+            "fullPath": "/Common/http",
+        }
+    ]
+    assert ltm["ssl_profiles"][0]["chain"] == "none"
+    assert [c["expiration"] for c in ltm["certs"]] == [1893456000, "unknown"]
+
+
+@pytest.mark.parametrize(
+    "partitions, virtuals, pools",
+    [
+        (None, ["vs1", "vs2"], ["p1", "p2"]),
+        (["Common"], ["vs1"], ["p1"]),
+        (["Tenant1"], ["vs2"], ["p2"]),
+        ([], [], []),
+    ],
+)
+def test_parse_tmsh_ltm_partitions(partitions, virtuals, pools):
+    ltm = parse_tmsh_ltm(LTM_OUTPUT, partitions)
+    assert [v["name"] for v in ltm["virtuals"]] == virtuals
+    assert [p["name"] for p in ltm["pools"]] == pools
+
+
+DEVICE_OUTPUT = "\n".join(
+    [
+        "sys global-settings { hostname bigip1.example.com }",
+        "Sys::Version",
+        "Main Package",
+        "  Product     BIG-IP",
+        "  Version     17.1.1",
+        "cm device /Common/bigip2 { failover-state standby self-device false }",
+        "cm device /Common/bigip1 { failover-state active self-device true }",
+        "cm device-group /Common/device_trust_group { devices { /Common/bigip1 { } /Common/bigip2 { } } type sync-only }",
+        "cm device-group /Common/dg1 { devices { /Common/bigip1 { } /Common/bigip2 { } } type sync-failover }",
+        "CM::Sync Status",
+        "Color   green",
+        "Status  In Sync",
+        "auth partition Common { default-route-domain 0 }",
+        "auth partition Tenant1 { default-route-domain 3 }",
+    ]
+)
+
+DEVICE_INFO = {
+    "hostname": "bigip1.example.com",
+    "version": "17.1.1",
+    "ha_status": "active",
+    "sync_group": "dg1",
+    "sync_status": "In Sync",
+    "trust_devices": ["bigip1", "bigip2"],
+    "partitions": ["Common", "Tenant1"],
+    "default_route_domains": {"Common": 0, "Tenant1": 3},
+}
+
+
+def test_parse_tmsh_device_info():
+    assert parse_tmsh_device_info(DEVICE_OUTPUT) == DEVICE_INFO
+
+
+class FakeClient:
+    base_url = "https://bigip1/mgmt/"
+    name = "bigip1"
+
+    def __init__(self, bash):
+        self.bash = bash
+        self.rest = []
+
+    def run_bash(self, command):
+        if isinstance(self.bash, Exception):
+            raise self.bash
+        return self.bash
+
+
+@pytest.fixture
+def rest_readers(monkeypatch):
+    """Replace the REST device info readers; returns the parts read."""
+    read = []
+
+    def reader(part):
+        def read_part(client):
+            read.append(part)
+            if part == "version":
+                raise requests.ReadTimeout("timed out")
+            return {"hostname": "rest-host"} if part == "hostname" else {}
+
+        return read_part
+
+    for part in f5_asbuilt.DEVICE_INFO_READERS:
+        monkeypatch.setitem(f5_asbuilt.DEVICE_INFO_READERS, part, reader(part))
+    return read
+
+
+@pytest.mark.parametrize(
+    "bash, read, hostname, incomplete",
+    [
+        (DEVICE_OUTPUT, [], "bigip1.example.com", None),
+        # only the hostname and version are missing from the output
+        (
+            "\n".join(DEVICE_OUTPUT.splitlines()[5:]),
+            ["hostname", "version"],
+            "rest-host",
+            ["version"],
+        ),
+        (
+            requests.HTTPError("403 Forbidden"),
+            ["hostname", "version", "ha_status", "sync_status", "partitions"],
+            "rest-host",
+            ["version"],
+        ),
+        (
+            requests.ReadTimeout("timed out"),
+            ["hostname", "version", "ha_status", "sync_status", "partitions"],
+            "rest-host",
+            ["version"],
+        ),
+        (
+            "tmsh: command not found",
+            ["hostname", "version", "ha_status", "sync_status", "partitions"],
+            "rest-host",
+            ["version"],
+        ),
+    ],
+)
+def test_collect_device_info_tmsh_falls_back(
+    rest_readers, bash, read, hostname, incomplete
+):
+    info = collect_device_info_tmsh(FakeClient(bash))
+    assert rest_readers == read
+    assert info["hostname"] == hostname
+    assert info.get("incomplete") == incomplete
+
+
+def test_collect_device_info_tmsh_connection_error(rest_readers):
+    with pytest.raises(requests.ConnectionError):
+        collect_device_info_tmsh(FakeClient(requests.ConnectionError("reset")))
+
+
+@pytest.fixture
+def rest_sections(monkeypatch):
+    """Replace the REST LTM collectors; returns the sections read."""
+    read = []
+
+    def collector(name, keys):
+        def collect(client, partitions, **kwargs):
+            read.append(name)
+            if name == "monitors":
+                raise requests.ReadTimeout("timed out")
+            return {key: {} if key == "irule_sources" else [] for key in keys}
+
+        return collect
+
+    sections = [
+        (name, collector(name, keys), keys) for name, _, keys in f5_asbuilt.LTM_SECTIONS
+    ]
+    monkeypatch.setattr(f5_asbuilt, "LTM_SECTIONS", sections)
+    return read
+
+
+FAILED_CERTS = LTM_OUTPUT + f"\n{f5_asbuilt.TMSH_FAILED_MARKER} 1"
+ALL_REST = ["virtuals", "pools", "nodes", "irules", "monitors", "ssl_profiles", "certs"]
+
+
+@pytest.mark.parametrize(
+    "bash, read, incomplete, virtuals",
+    [
+        (LTM_OUTPUT, ["irules"], [], 2),
+        # the cert group failed: only certs come from REST
+        (FAILED_CERTS, ["irules", "certs"], [], 2),
+        # tm/util/bash not allowed: everything comes from REST
+        (requests.HTTPError("403 Forbidden"), ALL_REST, ["monitors"], 0),
+        (requests.ConnectionError("reset"), ALL_REST, ["monitors"], 0),
+        (
+            requests.ReadTimeout("timed out"),
+            ["irules"],
+            ["virtuals", "pools", "nodes", "monitors", "ssl_profiles", "certs"],
+            0,
+        ),
+    ],
+    ids=["ok", "group_failed", "http_error", "connection_error", "timeout"],
+)
+def test_collect_ltm_objects_tmsh_falls_back(
+    rest_sections, bash, read, incomplete, virtuals
+):
+    ltm = f5_asbuilt.collect_ltm_objects_tmsh(FakeClient(bash))
+    assert rest_sections == read
+    assert sorted(ltm["incomplete"]) == sorted(incomplete)
+    assert len(ltm["virtuals"]) == virtuals
+    for name, _, keys in f5_asbuilt.LTM_SECTIONS:
+        assert all(key in ltm for key in keys)
+
+
+@pytest.mark.parametrize(
+    "text, groups",
+    [
+        ("", []),
+        (LTM_OUTPUT, []),
+        (FAILED_CERTS, [1]),
+        (f"#tmsh-failed 0\nltm node /Common/n1 {{ }}\n#tmsh-failed 1\n", [0, 1]),
+        ("echo #tmsh-failed 0", []),
+    ],
+    ids=["empty", "ok", "one", "both", "not_at_line_start"],
+)
+def test_tmsh_failed_groups(text, groups):
+    assert f5_asbuilt.tmsh_failed_groups(text) == groups
+
+
+def test_run_tmsh_marks_failed_groups():
+    client = FakeClient("")
+    scripts = []
+    client.run_bash = scripts.append
+    f5_asbuilt.run_tmsh(client, [["list a"], ["list b", "list c"]])
+    assert scripts == [
+        "tmsh -q -c 'cd /; list a' || echo '#tmsh-failed 0'; "
+        "tmsh -q -c 'cd /; list b; list c' || echo '#tmsh-failed 1'"
+    ]
@@ -0,0 +1,201 @@
+import json
+
+import pytest
+from openpyxl import load_workbook
+
+from f5_asbuilt_xls import (
+    build_fleet_workbook,
+    build_workbook,
+    convert_batch,
+    convert_events,
+    extra_sheet_titles,
+)
+
+BASE_SHEETS = [
+    "Virtual_Servers",
+    "Pools",
+    "Nodes",
+    "Monitors",
+    "IRules",
+    "SSL_Profiles",
+]
+
+
+def extra(title, *names):
+    return {
+        "title": title,
+        "columns": ["name"],
+        "rows": [{"name": n} for n in names],
+    }
+
+
+def snapshot(hostname, virtuals=0, members=0, extra_sections=None, incomplete=None):
+    return {
+        "device_report": {"hostname": hostname},
+        "virtual_servers": [
+            {"name": f"vs{i}", "destination_ip": f"10.0.0.{i}"} for i in range(virtuals)
+        ],
+        "pools": [
+            {
+                "name": "p1",
+                "members": [{"name": f"m{i}:80"} for i in range(members)],
+            }
+        ],
+        "nodes": [{"name": "n1"}],
+        "monitors": [],
+        "irules": [],
+        "ssl_profiles": [],
+        "certificates": [],
+        "extra_sections": extra_sections or {},
+        "incomplete_sections": incomplete or [],
+        "usage": {},
+    }
+
+
+SNAPSHOTS = {
+    "bigip1": snapshot(
+        "bigip1",
+        virtuals=2,
+        members=3,
+        extra_sections={
+            "net_self_ips": extra("Self IPs", "self1", "self2"),
+            "gtm_wideips": extra("GTM Wide IPs", "w1"),
+            # same sheet title once normalized, or a built-in sheet's title
+            "gtm_wideips_srv": extra("GTM Wide-IPs", "w2", "w3"),
+            "custom_pools": extra("pools", "cp1"),
+        },
+    ),
+    "bigip2": snapshot(
+        "bigip2",
+        virtuals=1,
+        extra_sections={"gtm_wideips_srv": extra("GTM Wide-IPs", "w4")},
+        incomplete=["pools"],
+    ),
+    "bigip3": snapshot("bigip3"),
+}
+
+
+@pytest.fixture
+def json_dir(tmp_path):
+    path = tmp_path / "json"
+    path.mkdir()
+    for name, data in SNAPSHOTS.items():
+        (path / f"f5_{name}_asbuilt.json").write_text(json.dumps(data))
+    return path
+
+
+def rows_per_sheet(path):
+    wb = load_workbook(path, read_only=True)
+    return {ws.title: len(list(ws.values)) for ws in wb.worksheets}
+
+
+@pytest.mark.parametrize(
+    "sections, taken, expected",
+    [
+        ({"a": extra("Self IPs")}, set(), {"a": "Self_IPs"}),
+        (
+            {"a": extra("GTM Wide IPs"), "b": extra("GTM-Wide IPs")},
+            set(),
+            {"a": "GTM_Wide_IPs", "b": "GTM_Wide_IPs_2"},
+        ),
+        ({"a": extra("Pools")}, set(), {"a": "Pools_2"}),
+        ({"a": extra("collection status")}, set(), {"a": "collection_status_2"}),
+        ({"a": extra("Self IPs")}, {"self_ips", "self_ips_2"}, {"a": "Self_IPs_3"}),
+        # the suffix still fits Excel's 31 characters
+        (
+            {"a": extra("x" * 40), "b": extra("x" * 35)},
+            set(),
+            {"a": "x" * 31, "b": "x" * 29 + "_2"},
+        ),
+    ],
+)
+def test_extra_sheet_titles(sections, taken, expected):
+    assert extra_sheet_titles({"extra_sections": sections}, {}, taken) == expected
+
+
+def test_fleet_workbook(json_dir, tmp_path):
+    (json_dir / "f5_broken_asbuilt.json").write_text("{not json")
+    out = tmp_path / "fleet.xlsx"
+    paths = sorted(str(p) for p in json_dir.iterdir())
+    assert build_fleet_workbook(paths, str(out)) == 3
+
+    rows = rows_per_sheet(out)
+    assert list(rows) == BASE_SHEETS + [
+        "Self_IPs",
+        "GTM_Wide_IPs",
+        "GTM_Wide_IPs_2",
+        "pools_2",
+        "Collection_Status",
+    ]
+    # header row + data rows of every device
+    assert rows["Virtual_Servers"] == 1 + 2 + 1
+    assert rows["Pools"] == 1 + 3 + 1 + 1
+    assert rows["Nodes"] == 1 + 3
+    assert rows["Monitors"] == 1
+    assert rows["Self_IPs"] == 1 + 2
+    assert rows["GTM_Wide_IPs"] == 1 + 1
+    assert rows["GTM_Wide_IPs_2"] == 1 + 2 + 1
+    assert rows["pools_2"] == 1 + 1
+
+    wb = load_workbook(out, read_only=True)
+    wide_ips = list(wb["GTM_Wide_IPs_2"].values)
+    assert wide_ips == [
+        ("Device", "name"),
+        ("bigip1", "w2"),
+        ("bigip1", "w3"),
+        ("bigip2", "w4"),
+    ]
+    status = list(wb["Collection_Status"].values)
+    assert ("bigip2", "pools", "Pools", "INCOMPLETE") in status
+    assert ("bigip2", "gtm_wideips_srv", "GTM_Wide_IPs_2", "complete") in status
+
+
+def test_device_workbook_sheet_names():
+    wb = build_workbook(SNAPSHOTS["bigip1"])
+    assert wb.sheetnames == BASE_SHEETS + [
+        "Self_IPs",
+        "GTM_Wide_IPs",
+        "GTM_Wide_IPs_2",
+        "pools_2",
+    ]
+    assert wb["GTM_Wide_IPs_2"].max_row == 1 + 2
+
+
+def test_convert_batch(json_dir, tmp_path):
+    out_dir = tmp_path / "xls"
+    assert convert_batch(str(json_dir), str(out_dir), 2, False) == 0
+    written = sorted(p.name for p in out_dir.iterdir())
+    assert written == [f"f5_{name}_asbuilt.xlsx" for name in SNAPSHOTS]
+    assert rows_per_sheet(out_dir / "f5_bigip2_asbuilt.xlsx") == {
+        **{title: 1 for title in BASE_SHEETS},
+        "Virtual_Servers": 2,
+        "Pools": 2,
+        "Nodes": 2,
+        "GTM_Wide_IPs": 2,
+        "Collection_Status": 1 + 8,
+    }
+
+    (json_dir / "f5_broken_asbuilt.json").write_text("{not json")
+    # the three converted workbooks are up to date and skipped
+    assert convert_batch(str(json_dir), str(out_dir), 2, False) == 1
+
+
+@pytest.mark.parametrize(
+    "names, failures",
+    [
+        (["bigip1", "bigip2", "bigip3"], 0),
+        (["bigip1", "missing", "bigip3"], 1),
+        (["missing", "gone"], 2),
+    ],
+)
+def test_convert_events_counts_failures(json_dir, tmp_path, names, failures):
+    events = ["[INFO] not an event"]
+    for name in names:
+        path = json_dir / f"f5_{name}_asbuilt.json"
+        events.append(
+            json.dumps({"event": "file_written", "format": "json", "path": str(path)})
+        )
+        events.append(json.dumps({"event": "device_started", "device": name}))
+    out_dir = tmp_path / "xls"
+    assert convert_events(events, str(out_dir), 2) == failures
+    assert len(list(out_dir.iterdir())) == len(names) - failures